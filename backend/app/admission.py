@@ -0,0 +1,205 @@
+"""
+Per-user, per-network admission control.
+
+Every authenticated request is charged against a token bucket and a
+concurrency cap keyed on (user sub, network, kind), where kind is "query"
+for cheap reads and "tx" for commands that sign or broadcast. Requests over
+budget are rejected before any pocketd subprocess is started; main.py turns
+Rejected into a 429 with Retry-After.
+"""
+
+import logging
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from fastapi.responses import StreamingResponse
+
+from .config import (
+    ADMISSION_ENABLED,
+    ADMISSION_MAX_KEYS,
+    ADMISSION_QUERY_BURST,
+    ADMISSION_QUERY_CONCURRENCY,
+    ADMISSION_QUERY_RATE,
+    ADMISSION_TX_BURST,
+    ADMISSION_TX_CONCURRENCY,
+    ADMISSION_TX_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+QUERY = "query"
+TX = "tx"
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Too many requests ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class Budget:
+    # Tokens per second and bucket size; rate 0 disables the rate limit
+    rate: float
+    burst: float
+    # Requests in flight at once; 0 disables the cap
+    concurrency: int
+
+
+BUDGETS = {
+    QUERY: Budget(
+        ADMISSION_QUERY_RATE, ADMISSION_QUERY_BURST, ADMISSION_QUERY_CONCURRENCY
+    ),
+    TX: Budget(ADMISSION_TX_RATE, ADMISSION_TX_BURST, ADMISSION_TX_CONCURRENCY),
+}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now) -> float:
+        """
+        Take one token. Returns 0 on success, else seconds until one is
+        available.
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def full(self, now) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class _State:
+    __slots__ = ("bucket", "in_flight")
+
+    def __init__(self, budget: Budget):
+        self.bucket = TokenBucket(budget.rate, budget.burst) if budget.rate else None
+        self.in_flight = 0
+
+
+class Ticket:
+    """
+    An admitted request's concurrency slot; release() is idempotent.
+    """
+
+    __slots__ = ("_state",)
+
+    def __init__(self, state=None):
+        self._state = state
+
+    def release(self):
+        if self._state is not None:
+            self._state.in_flight -= 1
+            self._state = None
+
+
+class TicketStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that holds an admission ticket until it has been
+    served, however that ends: the body finished, the client left before or
+    during it, or sending failed.
+    """
+
+    def __init__(self, ticket: Ticket, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+class AdmissionControl:
+    def __init__(self, budgets=BUDGETS, enabled=ADMISSION_ENABLED):
+        self.budgets = budgets
+        self.enabled = enabled
+        # (sub, network, kind) -> _State
+        self._states: dict = {}
+        # (network, kind) -> count; rejections also keyed by reason
+        self.admitted: dict = defaultdict(int)
+        self.rejected: dict = defaultdict(int)
+
+    def acquire(self, user, network: str, kind: str) -> Ticket:
+        """
+        Admit a request or raise Rejected. The returned ticket must be
+        released when the request's work is done.
+        """
+        if not self.enabled:
+            return Ticket()
+        budget = self.budgets[kind]
+        sub = (user or {}).get("sub") or "anonymous"
+        key = (sub, network, kind)
+        state = self._states.get(key)
+        if state is None:
+            self._prune()
+            state = self._states[key] = _State(budget)
+        if budget.concurrency and state.in_flight >= budget.concurrency:
+            self._reject(network, kind, "concurrency", 1)
+        if state.bucket is not None:
+            wait = state.bucket.take(time.monotonic())
+            if wait:
+                self._reject(network, kind, "rate", math.ceil(wait))
+        self.admitted[(network, kind)] += 1
+        state.in_flight += 1
+        return Ticket(state)
+
+    @contextmanager
+    def slot(self, user, network: str, kind: str):
+        ticket = self.acquire(user, network, kind)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _reject(self, network, kind, reason, retry_after):
+        self.rejected[(network, kind, reason)] += 1
+        raise Rejected(reason, retry_after)
+
+    def _prune(self):
+        """
+        Forget idle callers (full bucket, nothing in flight) once the table
+        reaches ADMISSION_MAX_KEYS.
+        """
+        if len(self._states) < ADMISSION_MAX_KEYS:
+            return
+        now = time.monotonic()
+        for key, state in list(self._states.items()):
+            if state.in_flight == 0 and (
+                state.bucket is None or state.bucket.full(now)
+            ):
+                del self._states[key]
+
+    def stats(self):
+        in_flight, callers = defaultdict(int), defaultdict(int)
+        for (_, network, kind), state in self._states.items():
+            in_flight[(network, kind)] += state.in_flight
+            callers[(network, kind)] += 1
+        return {
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "in_flight": dict(in_flight),
+            "callers": dict(callers),
+        }
+
+
+admission = AdmissionControl()
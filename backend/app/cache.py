@@ -0,0 +1,373 @@
+"""
+Bounded read-through cache for query results.
+
+Entries are keyed by (network, command), expire after a per-call TTL and are
+evicted least-recently-used once the cache is full. Concurrent misses for the
+same key share a single upstream call. Entries can be tagged (e.g. with the
+addresses they describe) so a transaction can invalidate everything it
+touched. Entries live in this process (MemoryEntries) or, with
+SHARED_STATE_BACKEND=sqlite, in a file shared by all workers (SqliteEntries).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .config import (
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_STALE_TTL,
+    QUERY_CACHE_STALE_WHILE_REVALIDATE,
+)
+from .result import CommandResult
+from .shared_state import get_shared_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    value: dict
+    expires_at: float
+    tags: tuple = ()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class MemoryEntries:
+    """
+    Per-process entry storage, least-recently-used first.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict = OrderedDict()
+        self._tag_index: dict = {}
+        self._tag_versions: dict = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def tag_versions(self, tags) -> list:
+        return [self._tag_versions.get(tag, 0) for tag in tags]
+
+    def bump_tags(self, tags):
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def put(self, key, entry, versions, max_entries):
+        """
+        Store `entry` unless one of its tags was invalidated since `versions`
+        was read. Returns (stored, evicted count).
+        """
+        if self.tag_versions(entry.tags) != versions:
+            return False, 0
+        self._drop(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+        evicted = 0
+        while len(self._entries) > max_entries:
+            self._drop(next(iter(self._entries)))
+            evicted += 1
+        return True, evicted
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def drop_tag(self, tag) -> int:
+        """
+        Drop the entries tagged `tag` and bump its version.
+        """
+        self.bump_tags([tag])
+        keys = list(self._tag_index.get(tag, ()))
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def drop_network(self, network) -> int:
+        keys = [key for key in self._entries if key[0] == network]
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._tag_index.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _encode(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class SqliteEntries:
+    """
+    Entry storage in the shared SQLite file, so every worker sees the same
+    results and invalidations. Eviction drops the entries closest to expiry
+    rather than the least recently used, to keep hits read-only.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key):
+        rows = self.store.query(
+            "SELECT raw, stderr, exit_code, expires_at FROM query_cache WHERE key = ?",
+            (_encode(key),),
+        )
+        if not rows:
+            return None
+        raw, stderr, exit_code, expires_at = rows[0]
+        return CacheEntry(CommandResult(raw, stderr, exit_code), expires_at)
+
+    def tag_versions(self, tags, conn=None) -> list:
+        if not tags:
+            return []
+        execute = conn.execute if conn is not None else self.store.query
+        names = [_encode(tag) for tag in tags]
+        rows = execute(
+            "SELECT tag, version FROM tag_versions WHERE tag IN "
+            f"({','.join('?' * len(names))})",
+            names,
+        )
+        versions = dict(list(rows))
+        return [versions.get(name, 0) for name in names]
+
+    def bump_tags(self, tags):
+        with self.store.transaction() as conn:
+            self._bump(conn, tags)
+
+    def _bump(self, conn, tags):
+        conn.executemany(
+            "INSERT INTO tag_versions (tag, version) VALUES (?, 1) "
+            "ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+            [(_encode(tag),) for tag in tags],
+        )
+
+    def put(self, key, entry, versions, max_entries):
+        value = entry.value
+        raw = value.text("compact").encode()
+        name = _encode(key)
+        with self.store.transaction() as conn:
+            if self.tag_versions(entry.tags, conn) != versions:
+                return False, 0
+            conn.execute(
+                "INSERT OR REPLACE INTO query_cache "
+                "(key, network, raw, stderr, exit_code, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, key[0], raw, value.stderr, value.exit_code, entry.expires_at),
+            )
+            conn.execute("DELETE FROM query_cache_tags WHERE key = ?", (name,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO query_cache_tags (tag, key) VALUES (?, ?)",
+                [(_encode(tag), name) for tag in entry.tags],
+            )
+            [(count,)] = conn.execute("SELECT COUNT(*) FROM query_cache").fetchall()
+            evicted = max(0, count - max_entries)
+            if evicted:
+                conn.execute(
+                    "DELETE FROM query_cache WHERE key IN (SELECT key FROM "
+                    "query_cache ORDER BY expires_at LIMIT ?)",
+                    (evicted,),
+                )
+                self._drop_orphan_tags(conn)
+        return True, evicted
+
+    def _drop_orphan_tags(self, conn):
+        conn.execute(
+            "DELETE FROM query_cache_tags "
+            "WHERE key NOT IN (SELECT key FROM query_cache)"
+        )
+
+    def drop_tag(self, tag) -> int:
+        """
+        Drop the entries tagged `tag` and bump its version.
+        """
+        with self.store.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM query_cache WHERE key IN "
+                "(SELECT key FROM query_cache_tags WHERE tag = ?)",
+                (_encode(tag),),
+            )
+            conn.execute("DELETE FROM query_cache_tags WHERE tag = ?", (_encode(tag),))
+            self._bump(conn, [tag])
+            return cursor.rowcount
+
+    def drop_network(self, network) -> int:
+        with self.store.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM query_cache WHERE network = ?", (network,)
+            )
+            self._drop_orphan_tags(conn)
+            return cursor.rowcount
+
+    def clear(self):
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM query_cache")
+            conn.execute("DELETE FROM query_cache_tags")
+
+    def __len__(self):
+        [(count,)] = self.store.query("SELECT COUNT(*) FROM query_cache")
+        return count
+
+
+class QueryCache:
+    def __init__(
+        self,
+        max_entries=QUERY_CACHE_MAX_ENTRIES,
+        stale_while_revalidate=QUERY_CACHE_STALE_WHILE_REVALIDATE,
+        stale_ttl=QUERY_CACHE_STALE_TTL,
+        entries=None,
+    ):
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+        self._entries = entries if entries is not None else MemoryEntries()
+        self._inflight: dict = {}
+
+    async def get_or_fetch(self, key, fetch, ttl, tags=()):
+        """
+        Return the cached result for `key`, calling `fetch()` on a miss.
+        Only successful results (exit_code 0) are stored.
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self.stats.hits += 1
+                return entry.value
+            if self.stale_while_revalidate and entry.expires_at + self.stale_ttl > now:
+                self.stats.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch, ttl, tags)
+                return entry.value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            task = inflight[0]
+        else:
+            self.stats.misses += 1
+            task = self._start_fetch(key, fetch, ttl, tags)
+        # Shield so a cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key, fetch, ttl, tags):
+        tags = tuple(tags)
+        versions = self._entries.tag_versions(tags)
+
+        async def run():
+            try:
+                value = await fetch()
+                if value.get("exit_code") == 0:
+                    entry = CacheEntry(value, time.time() + ttl, tags)
+                    _, evicted = self._entries.put(
+                        key, entry, versions, self.max_entries
+                    )
+                    self.stats.evictions += evicted
+                return value
+            finally:
+                if self._inflight.get(key, (None,))[0] is task:
+                    del self._inflight[key]
+
+        task = asyncio.ensure_future(run())
+        # Background refreshes may never be awaited; don't warn about their errors
+        task.add_done_callback(_consume_exception)
+        self._inflight[key] = (task, tags)
+        return task
+
+    def invalidate_tag(self, tag):
+        """
+        Drop every entry tagged with `tag`. Fetches already in flight for it
+        are detached, so later callers start a fresh one.
+        """
+        for key, (_, tags) in list(self._inflight.items()):
+            if tag in tags:
+                del self._inflight[key]
+        self.stats.invalidations += self._entries.drop_tag(tag)
+
+    def invalidate_network(self, network):
+        """
+        Drop every entry for `network`, e.g. after chain events were missed.
+        """
+        for key, (_, tags) in list(self._inflight.items()):
+            if key[0] == network:
+                self._entries.bump_tags(tags)
+                del self._inflight[key]
+        self.stats.invalidations += self._entries.drop_network(network)
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self):
+        """
+        Counters and size, for the stats endpoint.
+        """
+        lookups = self.stats.hits + self.stats.stale_hits + self.stats.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hits": self.stats.hits,
+            "stale_hits": self.stats.stale_hits,
+            "misses": self.stats.misses,
+            "coalesced": self.stats.coalesced,
+            "evictions": self.stats.evictions,
+            "invalidations": self.stats.invalidations,
+            "hit_ratio": (
+                (self.stats.hits + self.stats.stale_hits) / lookups if lookups else 0.0
+            ),
+        }
+
+
+def _consume_exception(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Cached query failed: {task.exception()}")
+
+
+def invalidate_addresses(network, addresses):
+    """
+    Invalidate cached query results for every address touched by a tx.
+    """
+    for address in addresses:
+        if address:
+            query_cache.invalidate_tag((network, address))
+
+
+def addresses_in_command(command):
+    """
+    Pick the bech32 account addresses out of a raw pocketd command.
+    """
+    return [arg for arg in command if arg.startswith("pokt1")]
+
+
+def _default_entries():
+    store = get_shared_store()
+    return SqliteEntries(store) if store is not None else MemoryEntries()
+
+
+query_cache = QueryCache(entries=_default_entries())
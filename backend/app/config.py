@@ -12,6 +12,10 @@ def load_env():
     load_dotenv()
 
 
+def _urls(value):
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
 # Pocket network secrets
 NETWORK_SECRETS = {
     "alpha": os.getenv("ALPHA_SECRET", "alpha_default_secret"),
@@ -26,19 +30,205 @@ POCKET_CHAIN = {
     "beta": os.getenv("POCKET_CHAIN_BETA", "pocket-beta"),
     "mainnet": os.getenv("POCKET_CHAIN_MAINNET", "pocket"),
 }
-POCKET_NODE_URL = {
-    "alpha": os.getenv(
-        "POCKET_ALPHA_NODE_URL", "https://shannon-testnet-grove-rpc.alpha.poktroll.com"
+# Node (and API) URLs may be comma-separated lists; requests go to the
+# fastest healthy endpoint (see nodes.py)
+POCKET_NODE_URLS = {
+    "alpha": _urls(
+        os.getenv(
+            "POCKET_ALPHA_NODE_URL",
+            "https://shannon-testnet-grove-rpc.alpha.poktroll.com",
+        )
+    ),
+    "beta": _urls(
+        os.getenv(
+            "POCKET_BETA_NODE_URL",
+            "https://shannon-testnet-grove-rpc.beta.poktroll.com",
+        )
+    ),
+    "mainnet": _urls(
+        os.getenv(
+            "POCKET_MAINNET_NODE_URL",
+            "https://shannon-grove-rpc.mainnet.poktroll.com",
+        )
+    ),
+}
+# First URL per network
+POCKET_NODE_URL = {network: urls[0] for network, urls in POCKET_NODE_URLS.items()}
+# CometBFT websocket endpoints for block event subscriptions
+POCKET_WS_URL = {
+    network: os.getenv(
+        f"POCKET_{network.upper()}_WS_URL",
+        url.replace("http", "ws", 1).rstrip("/") + "/websocket",
+    )
+    for network, url in POCKET_NODE_URL.items()
+}
+# Networks to subscribe to block events on (comma-separated; empty disables)
+POCKET_EVENTS_NETWORKS = [
+    n.strip() for n in os.getenv("POCKET_EVENTS_NETWORKS", "").split(",") if n.strip()
+]
+# Reconnect backoff bounds in seconds
+POCKET_EVENTS_BACKOFF_MIN = float(os.getenv("POCKET_EVENTS_BACKOFF_MIN", "1"))
+POCKET_EVENTS_BACKOFF_MAX = float(os.getenv("POCKET_EVENTS_BACKOFF_MAX", "60"))
+# gRPC-gateway (REST) endpoints, used for in-process queries
+POCKET_API_URLS = {
+    "alpha": _urls(
+        os.getenv(
+            "POCKET_ALPHA_API_URL",
+            "https://shannon-testnet-grove-api.alpha.poktroll.com",
+        )
     ),
-    "beta": os.getenv(
-        "POCKET_BETA_NODE_URL", "https://shannon-testnet-grove-rpc.beta.poktroll.com"
+    "beta": _urls(
+        os.getenv(
+            "POCKET_BETA_API_URL",
+            "https://shannon-testnet-grove-api.beta.poktroll.com",
+        )
     ),
-    "mainnet": os.getenv(
-        "POCKET_MAINNET_NODE_URL", "https://shannon-grove-rpc.mainnet.poktroll.com"
+    "mainnet": _urls(
+        os.getenv(
+            "POCKET_MAINNET_API_URL",
+            "https://shannon-grove-api.mainnet.poktroll.com",
+        )
     ),
 }
+POCKET_API_URL = {network: urls[0] for network, urls in POCKET_API_URLS.items()}
+# Endpoint health probes: seconds between rounds (0 disables) and per-probe
+# timeout. After NODE_EJECT_ERRORS consecutive failures an endpoint is taken
+# out of rotation for NODE_EJECT_SECONDS (or until a probe succeeds). Failed
+# requests are retried on up to NODE_MAX_ATTEMPTS endpoints.
+NODE_PROBE_INTERVAL = float(os.getenv("NODE_PROBE_INTERVAL", "10"))
+NODE_PROBE_TIMEOUT = float(os.getenv("NODE_PROBE_TIMEOUT", "5"))
+NODE_EJECT_ERRORS = int(os.getenv("NODE_EJECT_ERRORS", "3"))
+NODE_EJECT_SECONDS = float(os.getenv("NODE_EJECT_SECONDS", "30"))
+NODE_MAX_ATTEMPTS = int(os.getenv("NODE_MAX_ATTEMPTS", "3"))
+# Hedged REST queries (account, service): a second attempt is sent once the
+# first has taken longer than HEDGE_PERCENTILE of the last HEDGE_WINDOW
+# latencies (and at least HEDGE_MIN_DELAY seconds; no hedging before
+# HEDGE_MIN_SAMPLES). Hedges are capped at HEDGE_MAX_RATIO of queries.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.05"))
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.01"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "50"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "1000"))
+POCKET_QUERY_TIMEOUT = float(os.getenv("POCKET_QUERY_TIMEOUT", "10"))
+POCKET_QUERY_POOL_SIZE = int(os.getenv("POCKET_QUERY_POOL_SIZE", "20"))
 POCKET_KEYRING_BACKEND = os.getenv("POCKET_TEST_KEYRING_BACKEND", "test")
-POCKET_BIN_PATH = "/usr/local/bin/pocketd"
+POCKET_BIN_PATH = os.getenv("POCKET_BIN_PATH", "/usr/local/bin/pocketd")
+
+# pocketd subprocess execution limits
+POCKET_MAX_CONCURRENCY = int(os.getenv("POCKET_MAX_CONCURRENCY", "32"))
+POCKET_COMMAND_TIMEOUT = float(os.getenv("POCKET_COMMAND_TIMEOUT", "60"))
+
+# POST /account/create-batch: key derivation processes (0 = one per CPU),
+# keys derived per pool task, and max accounts per request
+KEYGEN_WORKERS = int(os.getenv("KEYGEN_WORKERS", "0"))
+ACCOUNT_BATCH_CHUNK_SIZE = int(os.getenv("ACCOUNT_BATCH_CHUNK_SIZE", "50"))
+ACCOUNT_BATCH_MAX = int(os.getenv("ACCOUNT_BATCH_MAX", "10000"))
+
+# POST /service/create-batch: max services per request, seconds to wait for
+# each packed tx to commit, and txs sent per chunk when a message fails and
+# the rest have to be resent without it
+SERVICE_BATCH_MAX = int(os.getenv("SERVICE_BATCH_MAX", "1000"))
+SERVICE_BATCH_COMMIT_TIMEOUT = float(os.getenv("SERVICE_BATCH_COMMIT_TIMEOUT", "60"))
+SERVICE_BATCH_MAX_ROUNDS = int(os.getenv("SERVICE_BATCH_MAX_ROUNDS", "3"))
+
+# Offline tx pipeline: default gas per message (no simulation) and fee pricing
+POCKET_TX_GAS_LIMIT = int(os.getenv("POCKET_TX_GAS_LIMIT", "200000"))
+POCKET_TX_GAS_PRICE = float(os.getenv("POCKET_TX_GAS_PRICE", "0.000001"))
+POCKET_TX_FEE_DENOM = os.getenv("POCKET_TX_FEE_DENOM", "upokt")
+# Gas ceiling for a single multi-message tx (batches are split to stay under it)
+POCKET_TX_MAX_GAS = int(os.getenv("POCKET_TX_MAX_GAS", "5000000"))
+# Gas estimation cache: learned gas per tx shape replaces `--gas auto`
+# simulation (and the fixed offline gas limit) once a shape has
+# GAS_ESTIMATE_MIN_SAMPLES of its last GAS_ESTIMATE_WINDOW samples; the
+# largest is scaled by GAS_ESTIMATE_MULTIPLIER
+GAS_ESTIMATOR_ENABLED = os.getenv("GAS_ESTIMATOR_ENABLED", "true").lower() == "true"
+GAS_ESTIMATE_MULTIPLIER = float(os.getenv("GAS_ESTIMATE_MULTIPLIER", "1.3"))
+GAS_ESTIMATE_MIN_SAMPLES = int(os.getenv("GAS_ESTIMATE_MIN_SAMPLES", "3"))
+GAS_ESTIMATE_WINDOW = int(os.getenv("GAS_ESTIMATE_WINDOW", "20"))
+# Re-sign and rebroadcast attempts after an account sequence mismatch
+POCKET_TX_MAX_RETRIES = int(os.getenv("POCKET_TX_MAX_RETRIES", "3"))
+
+# Tx confirmation tracker: block height poll interval (s), hashes per batched
+# lookup, seconds before a tx is given up on, and results kept in memory
+TX_TRACKER_POLL_INTERVAL = float(os.getenv("TX_TRACKER_POLL_INTERVAL", "1"))
+TX_TRACKER_BATCH_SIZE = int(os.getenv("TX_TRACKER_BATCH_SIZE", "100"))
+TX_TRACKER_TIMEOUT = float(os.getenv("TX_TRACKER_TIMEOUT", "300"))
+TX_TRACKER_MAX_ENTRIES = int(os.getenv("TX_TRACKER_MAX_ENTRIES", "10000"))
+# Longest a GET /tx/{hash}?wait=true request may block
+TX_WAIT_MAX_TIMEOUT = float(os.getenv("TX_WAIT_MAX_TIMEOUT", "60"))
+
+# Seconds the startup warmup may spend opening connections and loading
+# faucet balances before the pod reports ready anyway
+STARTUP_WARMUP_TIMEOUT = float(os.getenv("STARTUP_WARMUP_TIMEOUT", "30"))
+
+# Admission control per (user, network): token bucket rate (per second) and
+# burst, and max requests in flight, for queries and for tx commands
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_QUERY_RATE = float(os.getenv("ADMISSION_QUERY_RATE", "50"))
+ADMISSION_QUERY_BURST = float(os.getenv("ADMISSION_QUERY_BURST", "100"))
+ADMISSION_QUERY_CONCURRENCY = int(os.getenv("ADMISSION_QUERY_CONCURRENCY", "32"))
+ADMISSION_TX_RATE = float(os.getenv("ADMISSION_TX_RATE", "5"))
+ADMISSION_TX_BURST = float(os.getenv("ADMISSION_TX_BURST", "20"))
+ADMISSION_TX_CONCURRENCY = int(os.getenv("ADMISSION_TX_CONCURRENCY", "8"))
+# Limiter entries kept before idle callers are forgotten
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "10000"))
+
+# Async tx jobs (?async=true): workers per (network, signer), jobs queued per
+# signer before 429s, finished jobs kept in memory, and the Retry-After cap
+JOB_WORKERS_PER_SIGNER = int(os.getenv("JOB_WORKERS_PER_SIGNER", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+JOB_MAX_ENTRIES = int(os.getenv("JOB_MAX_ENTRIES", "10000"))
+JOB_RETRY_AFTER_MAX = int(os.getenv("JOB_RETRY_AFTER_MAX", "60"))
+
+# Collect single /account/fund calls for this many seconds and send them as
+# one batch (0 disables)
+POCKET_FUND_BATCH_WINDOW = float(os.getenv("POCKET_FUND_BATCH_WINDOW", "0"))
+# /account/fund-batch: max recipients per request, and txs of one batch in
+# flight at once
+FUND_BATCH_MAX = int(os.getenv("FUND_BATCH_MAX", "1000"))
+FUND_BATCH_CONCURRENCY = int(os.getenv("FUND_BATCH_CONCURRENCY", "8"))
+
+# Where signer sequences and the query cache live: "memory" (per process)
+# or "sqlite" (a WAL-mode file shared by every worker on the machine)
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory").lower()
+SHARED_STATE_PATH = os.getenv(
+    "SHARED_STATE_PATH", os.path.join(POCKET_HOME, "shared_state.db")
+)
+# How often a worker waiting for its broadcast turn re-checks shared state
+SHARED_STATE_POLL_INTERVAL = float(os.getenv("SHARED_STATE_POLL_INTERVAL", "0.01"))
+# A turn not reached within this many seconds (e.g. the worker holding the
+# previous sequence died) resyncs the signer from chain
+SHARED_STATE_TURN_TIMEOUT = float(os.getenv("SHARED_STATE_TURN_TIMEOUT", "60"))
+
+# Persistent cache of immutable chain data (committed txs, blocks, services
+# at a height); least recently used results are evicted past the size cap
+# (0 disables)
+IMMUTABLE_CACHE_PATH = os.getenv(
+    "IMMUTABLE_CACHE_PATH", os.path.join(POCKET_HOME, "immutable_cache.db")
+)
+IMMUTABLE_CACHE_MAX_BYTES = int(os.getenv("IMMUTABLE_CACHE_MAX_BYTES", "268435456"))
+
+# Query result cache
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "10000"))
+QUERY_CACHE_ACCOUNT_TTL = float(os.getenv("QUERY_CACHE_ACCOUNT_TTL", "5"))
+QUERY_CACHE_SERVICE_TTL = float(os.getenv("QUERY_CACHE_SERVICE_TTL", "30"))
+# Account TTL while the network's block event subscription is connected
+QUERY_CACHE_EVENT_TTL = float(os.getenv("QUERY_CACHE_EVENT_TTL", "300"))
+QUERY_CACHE_STALE_WHILE_REVALIDATE = (
+    os.getenv("QUERY_CACHE_STALE_WHILE_REVALIDATE", "false").lower() == "true"
+)
+QUERY_CACHE_STALE_TTL = float(os.getenv("QUERY_CACHE_STALE_TTL", "60"))
+
+# POST /query/stream: parallel queries per request, and targets per request
+QUERY_STREAM_CONCURRENCY = int(os.getenv("QUERY_STREAM_CONCURRENCY", "16"))
+QUERY_STREAM_MAX_TARGETS = int(os.getenv("QUERY_STREAM_MAX_TARGETS", "10000"))
+
+# POST /account/balances: abci_query calls per JSON-RPC batch request (two per
+# address), batch requests in flight per request, and addresses per request
+BALANCES_BATCH_SIZE = int(os.getenv("BALANCES_BATCH_SIZE", "100"))
+BALANCES_CONCURRENCY = int(os.getenv("BALANCES_CONCURRENCY", "4"))
+BALANCES_MAX_ADDRESSES = int(os.getenv("BALANCES_MAX_ADDRESSES", "10000"))
 
 # Supabase public key for JWT verification
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
@@ -52,3 +242,17 @@ DEFAULT_FUNDING_AMOUNT = "1000000upokt"  # 1 POKT
 POCKET_ALPHA_FAUCET = os.getenv("POCKET_ALPHA_FAUCET")
 POCKET_BETA_FAUCET = os.getenv("POCKET_BETA_FAUCET")
 POCKET_MAIN_FAUCET = os.getenv("POCKET_MAIN_FAUCET")
+
+# Faucet key pool: extra comma-separated hex keys per network, and/or a JSON
+# keyfile of {"alpha": ["<hex>", ...], ...}
+POCKET_FAUCET_KEYS = {
+    "alpha": os.getenv("POCKET_ALPHA_FAUCET_KEYS", ""),
+    "beta": os.getenv("POCKET_BETA_FAUCET_KEYS", ""),
+    "mainnet": os.getenv("POCKET_MAINNET_FAUCET_KEYS", ""),
+}
+POCKET_FAUCET_KEYFILE = os.getenv("POCKET_FAUCET_KEYFILE", "")
+# "least_busy" or "round_robin"
+POCKET_FAUCET_STRATEGY = os.getenv("POCKET_FAUCET_STRATEGY", "least_busy")
+# Keys below this balance (in POCKET_TX_FEE_DENOM) are taken out of rotation
+POCKET_FAUCET_MIN_BALANCE = int(os.getenv("POCKET_FAUCET_MIN_BALANCE", "10000000"))
+POCKET_FAUCET_BALANCE_REFRESH = float(os.getenv("POCKET_FAUCET_BALANCE_REFRESH", "60"))
@@ -0,0 +1,192 @@
+"""
+Block-event driven cache invalidation.
+
+One background subscriber per network holds a CometBFT websocket open and
+subscribes to NewBlock and Tx events. Every address an event touched
+(senders, recipients, signers, reward receivers...) has its cached query
+results dropped, and signers seen using a sequence this API did not hand out
+are resynced. Committed Tx events also settle txs in the confirmation
+tracker. While a network's subscriber is connected, account queries can be
+cached for much longer (QUERY_CACHE_EVENT_TTL), since they are invalidated
+as soon as the chain changes them. A reconnect drops the network's cached
+queries, since events may have been missed, but not signer sequences.
+"""
+
+import asyncio
+import json
+import logging
+import random
+
+import websockets
+
+from .cache import invalidate_addresses, query_cache
+from .config import (
+    POCKET_EVENTS_BACKOFF_MAX,
+    POCKET_EVENTS_BACKOFF_MIN,
+    POCKET_EVENTS_NETWORKS,
+    POCKET_WS_URL,
+)
+from .sequence import sequence_manager
+from .tracker import tx_tracker
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTIONS = ("tm.event='NewBlock'", "tm.event='Tx'")
+ADDRESS_PREFIX = "pokt1"
+
+
+def touched_addresses(events: dict) -> set:
+    """
+    Every bech32 account address among an event's attribute values
+    ({"transfer.recipient": ["pokt1..."], "tx.acc_seq": ["pokt1.../7"], ...}).
+    """
+    addresses = set()
+    for values in events.values():
+        for value in values or ():
+            if isinstance(value, str) and value.startswith(ADDRESS_PREFIX):
+                addresses.add(value.split("/", 1)[0])
+    return addresses
+
+
+def signer_sequences(events: dict) -> list:
+    """
+    [(address, sequence), ...] from a Tx event's tx.acc_seq attributes.
+    """
+    pairs = []
+    for value in events.get("tx.acc_seq") or ():
+        address, _, sequence = value.rpartition("/")
+        if address and sequence.isdigit():
+            pairs.append((address, int(sequence)))
+    return pairs
+
+
+class BlockSubscriber:
+    def __init__(self, network, url=None):
+        self.network = network
+        self.url = url or POCKET_WS_URL.get(network)
+        self.connected = False
+        self.height = None
+        self.events = 0
+        self.reconnects = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        """
+        Connect, subscribe and handle events until cancelled, reconnecting
+        with jittered exponential backoff.
+        """
+        backoff = POCKET_EVENTS_BACKOFF_MIN
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None) as ws:
+                    await self._subscribe(ws)
+                    logger.info(f"Subscribed to block events on {self.network}")
+                    self.connected = True
+                    backoff = POCKET_EVENTS_BACKOFF_MIN
+                    # Events may have been missed while disconnected
+                    self._forget_queries()
+                    async for message in ws:
+                        self._handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    f"Block event subscription on {self.network} failed: {e}; "
+                    f"reconnecting in {backoff:.1f}s"
+                )
+            if self.connected:
+                self.connected = False
+                self._forget_queries()
+            self.reconnects += 1
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, POCKET_EVENTS_BACKOFF_MAX)
+
+    async def _subscribe(self, ws):
+        for i, query in enumerate(SUBSCRIPTIONS):
+            request = {
+                "jsonrpc": "2.0",
+                "id": i,
+                "method": "subscribe",
+                "params": {"query": query},
+            }
+            await ws.send(json.dumps(request))
+
+    def _forget_queries(self):
+        # Signer sequences are left alone: resyncing from the committed
+        # sequence would reuse those of txs still in the mempool. Any missed
+        # external tx shows up as a sequence mismatch and is recovered then.
+        query_cache.invalidate_network(self.network)
+
+    def _handle(self, message):
+        if message.get("error"):
+            raise RuntimeError(message["error"])
+        result = message.get("result") or {}
+        events = result.get("events")
+        if not events:
+            # Subscription acknowledgements carry no events
+            return
+        self.events += 1
+        invalidate_addresses(self.network, touched_addresses(events))
+        data = result.get("data") or {}
+        if data.get("type") == "tendermint/event/NewBlock":
+            header = ((data.get("value") or {}).get("block") or {}).get("header", {})
+            if header.get("height"):
+                self.height = int(header["height"])
+        elif data.get("type") == "tendermint/event/Tx":
+            self._handle_tx(events, (data.get("value") or {}).get("TxResult") or {})
+
+    def _handle_tx(self, events, tx_result):
+        for address, sequence in signer_sequences(events):
+            sequence_manager.observe(address, self.network, sequence)
+        result = {
+            "height": tx_result.get("height", 0),
+            "tx_result": tx_result.get("result") or {},
+        }
+        for txhash in events.get("tx.hash") or ():
+            tx_tracker.observe(txhash, self.network, result)
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "height": self.height,
+            "events": self.events,
+            "reconnects": self.reconnects,
+        }
+
+
+class BlockEvents:
+    def __init__(self, networks=POCKET_EVENTS_NETWORKS):
+        self.subscribers = {n: BlockSubscriber(n) for n in networks}
+
+    def connected(self, network) -> bool:
+        subscriber = self.subscribers.get(network)
+        return subscriber is not None and subscriber.connected
+
+    def start(self):
+        for subscriber in self.subscribers.values():
+            subscriber.start()
+
+    async def stop(self):
+        for subscriber in self.subscribers.values():
+            await subscriber.stop()
+
+    def stats(self):
+        return {n: s.stats() for n, s in self.subscribers.items()}
+
+
+block_events = BlockEvents()
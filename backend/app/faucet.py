@@ -0,0 +1,211 @@
+"""
+Pool of faucet signing keys per network.
+
+A single signer can only advance one sequence at a time, so funding is
+spread across several faucet keys. Each key's in-flight txs and balance are
+tracked; keys whose balance drops below POCKET_FAUCET_MIN_BALANCE are taken
+out of rotation until a balance refresh shows they were topped up.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .config import (
+    POCKET_ALPHA_FAUCET,
+    POCKET_BETA_FAUCET,
+    POCKET_FAUCET_BALANCE_REFRESH,
+    POCKET_FAUCET_KEYFILE,
+    POCKET_FAUCET_KEYS,
+    POCKET_FAUCET_MIN_BALANCE,
+    POCKET_FAUCET_STRATEGY,
+    POCKET_MAIN_FAUCET,
+    POCKET_TX_FEE_DENOM,
+)
+from .query_client import query_client
+from .tx import resolve_address
+
+logger = logging.getLogger(__name__)
+
+# from_account value that means "any key from the faucet pool"
+FAUCET_ACCOUNT = "faucet"
+
+
+@dataclass
+class FaucetKey:
+    name: str
+    network: str
+    hex_key: str = field(repr=False)
+    address: Optional[str] = None
+    balance: Optional[int] = None
+    balance_checked_at: float = 0.0
+    in_flight: int = 0
+    sent: int = 0
+    in_rotation: bool = True
+
+
+def load_faucet_keys() -> dict:
+    """
+    Collect faucet hex keys per network from the single-key env vars,
+    POCKET_<NETWORK>_FAUCET_KEYS and POCKET_FAUCET_KEYFILE.
+    Returns {network: [FaucetKey, ...]}.
+    """
+    hex_keys = {
+        "alpha": [POCKET_ALPHA_FAUCET],
+        "beta": [POCKET_BETA_FAUCET],
+        "mainnet": [POCKET_MAIN_FAUCET],
+    }
+    for network, value in POCKET_FAUCET_KEYS.items():
+        hex_keys[network].extend(k.strip() for k in value.split(","))
+    if POCKET_FAUCET_KEYFILE:
+        try:
+            with open(POCKET_FAUCET_KEYFILE) as f:
+                for network, keys in json.load(f).items():
+                    hex_keys.setdefault(network, []).extend(keys)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read faucet keyfile {POCKET_FAUCET_KEYFILE}: {e}")
+    pool = {}
+    for network, keys in hex_keys.items():
+        unique = list(dict.fromkeys(k for k in keys if k))
+        # The first key keeps the historical faucet_<network> name
+        pool[network] = [
+            FaucetKey(
+                name=f"faucet_{network}" if i == 0 else f"faucet_{network}_{i}",
+                network=network,
+                hex_key=hex_key,
+            )
+            for i, hex_key in enumerate(unique)
+        ]
+    return pool
+
+
+class FaucetPool:
+    def __init__(self, keys=None, strategy=POCKET_FAUCET_STRATEGY):
+        self._keys = keys if keys is not None else load_faucet_keys()
+        self.strategy = strategy
+        self._round_robin = itertools.count()
+        self._refreshing: set = set()
+
+    def keys(self, network) -> list:
+        return self._keys.get(network, [])
+
+    def is_pooled(self, from_account, network) -> bool:
+        """
+        True if `from_account` should be served by the pool on this network.
+        """
+        return from_account == FAUCET_ACCOUNT and bool(self.keys(network))
+
+    def pick(self, network) -> Optional[FaucetKey]:
+        """
+        Choose a key in rotation, by least in-flight txs or round robin.
+        """
+        candidates = [k for k in self.keys(network) if k.in_rotation]
+        self._schedule_refresh(network)
+        if not candidates:
+            return None
+        offset = next(self._round_robin) % len(candidates)
+        rotated = candidates[offset:] + candidates[:offset]
+        if self.strategy == "round_robin":
+            return rotated[0]
+        return min(rotated, key=lambda k: k.in_flight)
+
+    @asynccontextmanager
+    async def checkout(self, network):
+        """
+        Reserve a key for one tx. Yields None if no key is in rotation.
+        """
+        key = self.pick(network)
+        if key is None:
+            yield None
+            return
+        key.in_flight += 1
+        try:
+            yield key
+        finally:
+            key.in_flight -= 1
+
+    def record_spend(self, key: FaucetKey, amount: int):
+        """
+        Deduct a successful send (amount + fee) from the tracked balance.
+        """
+        key.sent += 1
+        if key.balance is not None:
+            key.balance -= amount
+            self._update_rotation(key)
+
+    def _update_rotation(self, key):
+        in_rotation = key.balance is None or key.balance >= POCKET_FAUCET_MIN_BALANCE
+        if key.in_rotation and not in_rotation:
+            logger.warning(
+                f"Faucet key {key.name} balance {key.balance} is below "
+                f"{POCKET_FAUCET_MIN_BALANCE}; taking it out of rotation"
+            )
+        elif in_rotation and not key.in_rotation:
+            logger.info(f"Faucet key {key.name} is back in rotation")
+        key.in_rotation = in_rotation
+
+    async def refresh_balance(self, key: FaucetKey):
+        key.balance_checked_at = time.monotonic()
+        if key.address is None:
+            key.address, error = await resolve_address(key.name, key.network)
+            if error is not None:
+                logger.error(f"Cannot resolve faucet key {key.name}: {error}")
+                return
+        data, error = await query_client.get_json(
+            f"/cosmos/bank/v1beta1/balances/{key.address}/by_denom"
+            f"?denom={POCKET_TX_FEE_DENOM}",
+            key.network,
+        )
+        if error is not None:
+            logger.error(f"Failed to refresh balance of {key.name}: {error}")
+            return
+        key.balance = int((data.get("balance") or {}).get("amount", 0))
+        self._update_rotation(key)
+
+    async def refresh_balances(self, network=None):
+        networks = [network] if network else list(self._keys)
+        await asyncio.gather(
+            *(self.refresh_balance(k) for n in networks for k in self.keys(n))
+        )
+
+    def _schedule_refresh(self, network):
+        """
+        Refresh balances in the background once they are older than
+        POCKET_FAUCET_BALANCE_REFRESH seconds.
+        """
+        now = time.monotonic()
+        for key in self.keys(network):
+            if (
+                now - key.balance_checked_at >= POCKET_FAUCET_BALANCE_REFRESH
+                and key.name not in self._refreshing
+            ):
+                self._refreshing.add(key.name)
+                task = asyncio.ensure_future(self.refresh_balance(key))
+                task.add_done_callback(
+                    lambda _, name=key.name: self._refreshing.discard(name)
+                )
+
+    def stats(self, network=None):
+        networks = [network] if network else list(self._keys)
+        return {
+            n: [
+                {
+                    "name": k.name,
+                    "address": k.address,
+                    "balance": k.balance,
+                    "in_flight": k.in_flight,
+                    "sent": k.sent,
+                    "in_rotation": k.in_rotation,
+                }
+                for k in self.keys(n)
+            ]
+            for n in networks
+        }
+
+
+faucet_pool = FaucetPool()
@@ -0,0 +1,198 @@
+"""
+Batched funding from a faucet account.
+
+A batch of (address, amount) recipients is packed into as few multi-message
+txs as POCKET_TX_MAX_GAS allows; txs from the "faucet" account are spread
+across the faucet key pool. FundAccumulator optionally collects single
+/account/fund calls for a short window and sends them as one batch; every
+caller still gets the result of the tx that carried its transfer.
+"""
+
+import asyncio
+import logging
+from functools import partial
+
+from .cache import invalidate_addresses
+from .config import (
+    FUND_BATCH_CONCURRENCY,
+    POCKET_FUND_BATCH_WINDOW,
+    POCKET_TX_FEE_DENOM,
+    POCKET_TX_GAS_LIMIT,
+    POCKET_TX_MAX_GAS,
+)
+from .faucet import faucet_pool
+from .result import CommandResult
+from .tx import (
+    chunk_messages,
+    estimate_fee,
+    msg_send,
+    parse_coins,
+    resolve_address,
+    submit_tx,
+)
+from .utils import run_bounded
+
+logger = logging.getLogger(__name__)
+
+
+def _error_result(error):
+    return CommandResult.failure(error)
+
+
+def _resolve(batch, results):
+    for (_, _, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+
+async def send_batch(from_account, recipients, network="alpha") -> list:
+    """
+    Send `recipients` ([(address, amount), ...]) from `from_account`.
+    Returns one CommandResult per recipient, in order; all
+    recipients packed into the same tx share its result. The "faucet"
+    account spreads the txs across the faucet key pool. At most
+    FUND_BATCH_CONCURRENCY txs are in flight at once.
+    """
+    results = [None] * len(recipients)
+    valid = []
+    for index, (address, amount) in enumerate(recipients):
+        try:
+            valid.append((index, address, parse_coins(amount)))
+        except ValueError as e:
+            results[index] = _error_result(str(e))
+    chunks = chunk_messages(valid)
+    calls = (partial(_send_chunk, from_account, chunk, network) for chunk in chunks)
+    async for i, tx_result in run_bounded(calls, FUND_BATCH_CONCURRENCY):
+        for index, _, _ in chunks[i]:
+            results[index] = tx_result
+    return results
+
+
+async def _send_chunk(from_account, chunk, network):
+    if not faucet_pool.is_pooled(from_account, network):
+        return await _send_from(from_account, chunk, network)
+    async with faucet_pool.checkout(network) as key:
+        if key is None:
+            return _error_result(f"No faucet key in rotation for {network}")
+        result = await _send_from(key.name, chunk, network)
+        if result["exit_code"] == 0:
+            spent = sum(
+                int(coin["amount"])
+                for _, _, coins in chunk
+                for coin in coins
+                if coin["denom"] == POCKET_TX_FEE_DENOM
+            )
+            fee = estimate_fee(int(result.data["gas_wanted"]))
+            faucet_pool.record_spend(key, spent + fee)
+        return result
+
+
+async def _send_from(signer, chunk, network):
+    from_address, error = await resolve_address(signer, network)
+    if error is not None:
+        return _error_result(error)
+    messages = [
+        msg_send(from_address, address, coins) for _, address, coins in chunk
+    ]
+    result = await submit_tx(signer, messages, network)
+    invalidate_addresses(network, [from_address] + [a for _, a, _ in chunk])
+    return result
+
+
+async def fund_batch(from_account, recipients, network="alpha") -> list:
+    """
+    Like send_batch, but returns FundResult-shaped dicts.
+    """
+    results = await send_batch(from_account, recipients, network)
+    return [
+        {
+            "address": address,
+            "amount": amount,
+            "exit_code": result["exit_code"],
+            "txhash": result["txhash"],
+            "stderr": result["stderr"],
+        }
+        for (address, amount), result in zip(recipients, results)
+    ]
+
+
+class FundAccumulator:
+    """
+    Collects single fund requests per (network, from_account) and flushes
+    them as one batch after `window` seconds, or as soon as a tx is full.
+    """
+
+    def __init__(self, window=POCKET_FUND_BATCH_WINDOW):
+        self.window = window
+        self.max_batch = max(1, POCKET_TX_MAX_GAS // POCKET_TX_GAS_LIMIT)
+        self._pending: dict[tuple, list] = {}
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    async def fund(self, from_account, address, amount, network="alpha") -> dict:
+        """
+        Queue one transfer and wait for the result of the tx that carries it.
+        """
+        loop = asyncio.get_running_loop()
+        key = (network, from_account)
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((address, amount, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if batch:
+            task = asyncio.ensure_future(self._send(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key, batch):
+        network, from_account = key
+        recipients = [(address, amount) for address, amount, _ in batch]
+        logger.info(f"Flushing {len(batch)} fund requests from {from_account}")
+        try:
+            results = await send_batch(from_account, recipients, network)
+        except asyncio.CancelledError:
+            _resolve(batch, [_error_result("Funding cancelled") for _ in batch])
+            raise
+        except Exception as e:
+            logger.error(f"Batched funding failed: {e}")
+            results = [_error_result(str(e)) for _ in batch]
+        _resolve(batch, results)
+
+    async def stop(self):
+        """
+        Drop batches still collecting and cancel those being sent; every
+        waiting caller gets a failed result.
+        """
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for batch in self._pending.values():
+            _resolve(batch, [_error_result("Funding cancelled") for _ in batch])
+        self._pending.clear()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "pending": sum(len(batch) for batch in self._pending.values()),
+            "flushing": len(self._tasks),
+        }
+
+
+fund_accumulator = FundAccumulator()
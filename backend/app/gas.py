@@ -0,0 +1,208 @@
+"""
+Gas estimation cache.
+
+Gas for txs of the same shape (message type and rough payload size) barely
+changes, so it is learned instead of simulated every time: from the
+`gas estimate:` pocketd prints when simulating `--gas auto`, and from the
+actual gas_used of committed txs reported by the confirmation tracker. Once
+a shape has GAS_ESTIMATE_MIN_SAMPLES samples, `--gas auto` is replaced with
+the largest recent sample times GAS_ESTIMATE_MULTIPLIER and pocketd skips
+its simulate round trip; the offline tx pipeline uses the same estimate as
+its gas limit. An out-of-gas failure forgets the shape's samples, so the
+next tx simulates again (or uses the fixed POCKET_TX_GAS_LIMIT offline).
+"""
+
+import json
+import logging
+import math
+import re
+from collections import OrderedDict, defaultdict, deque
+from typing import Optional
+
+from .config import (
+    GAS_ESTIMATE_MIN_SAMPLES,
+    GAS_ESTIMATE_MULTIPLIER,
+    GAS_ESTIMATE_WINDOW,
+    GAS_ESTIMATOR_ENABLED,
+)
+from .utils import is_tx_command
+
+logger = logging.getLogger(__name__)
+
+_GAS_ESTIMATE_RE = re.compile(r"gas estimate: (\d+)")
+# sdkerrors.ErrOutOfGas
+_OUT_OF_GAS_CODE = 11
+# Txs awaiting a gas_used report from the tracker
+_MAX_PENDING = 10000
+
+
+def is_out_of_gas(code, codespace="", log="") -> bool:
+    return (code == _OUT_OF_GAS_CODE and codespace in ("", "sdk")) or (
+        "out of gas" in (log or "")
+    )
+
+
+def _size_bucket(size: int) -> int:
+    # Payloads within a factor of two of each other share an estimate
+    return max(size, 1).bit_length()
+
+
+def command_shape(command) -> Optional[tuple]:
+    """
+    (message type, size bucket) of a raw `tx <module> <action> ...` command,
+    e.g. ("bank send", 6); None if it is not a tx.
+    """
+    if not is_tx_command(command):
+        return None
+    words = command[1:3]
+    if len(words) < 2 or any(w.startswith("-") for w in words):
+        return None
+    arguments, skip = [], False
+    for arg in command[3:]:
+        if skip:
+            skip = False
+        elif arg.startswith("-"):
+            skip = "=" not in arg
+        else:
+            arguments.append(arg)
+    return " ".join(words), _size_bucket(sum(len(a) for a in arguments))
+
+
+def messages_shape(messages: list) -> tuple:
+    """
+    (message types and count, size bucket) of the offline pipeline's messages.
+    """
+    types = ",".join(sorted({m.get("@type", "") for m in messages}))
+    size = len(json.dumps(messages, separators=(",", ":")))
+    return f"{types}x{len(messages)}", _size_bucket(size)
+
+
+def _gas_flag(command):
+    """
+    (index, value) of the --gas flag, or (None, None).
+    """
+    for i, arg in enumerate(command):
+        if arg.startswith("--gas="):
+            return i, arg.split("=", 1)[1]
+        if arg == "--gas" and i + 1 < len(command):
+            return i, command[i + 1]
+    return None, None
+
+
+class GasEstimator:
+    def __init__(
+        self,
+        enabled=GAS_ESTIMATOR_ENABLED,
+        multiplier=GAS_ESTIMATE_MULTIPLIER,
+        min_samples=GAS_ESTIMATE_MIN_SAMPLES,
+        window=GAS_ESTIMATE_WINDOW,
+    ):
+        self.enabled = enabled
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.window = window
+        # (network, shape) -> deque of recent gas amounts
+        self._samples: dict = {}
+        # (network, txhash) -> shape, oldest first
+        self._pending: OrderedDict = OrderedDict()
+        # (network, outcome) -> count
+        self.counts: dict = defaultdict(int)
+
+    def estimate(self, network: str, shape) -> Optional[int]:
+        """
+        A gas limit for a tx of this shape, or None if there are too few
+        samples to be confident.
+        """
+        if not self.enabled or shape is None:
+            return None
+        samples = self._samples.get((network, shape))
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        return math.ceil(max(samples) * self.multiplier)
+
+    def observe(self, network: str, shape, gas: int):
+        if not self.enabled or shape is None or gas <= 0:
+            return
+        key = (network, shape)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(gas)
+
+    def out_of_gas(self, network: str, shape):
+        """
+        Forget a shape after a tx of it ran out of gas.
+        """
+        if self._samples.pop((network, shape), None) is not None:
+            logger.warning(f"Out of gas for {shape} on {network}; re-estimating")
+        self.counts[(network, "out_of_gas")] += 1
+
+    def expect(self, txhash: str, network: str, shape):
+        """
+        Remember a broadcast tx's shape so its gas_used can be learned.
+        """
+        if not self.enabled or not txhash or shape is None:
+            return
+        self._pending[(network, txhash.upper())] = shape
+        while len(self._pending) > _MAX_PENDING:
+            self._pending.popitem(last=False)
+
+    def settle(self, txhash, network, gas_used, code, codespace="", log=""):
+        """
+        Learn from a committed tx (called by the confirmation tracker).
+        """
+        shape = self._pending.pop((network, txhash.upper()), None)
+        if shape is None:
+            return
+        if is_out_of_gas(code, codespace, log):
+            self.out_of_gas(network, shape)
+        elif code == 0:
+            self.observe(network, shape, gas_used or 0)
+
+    def prepare(self, command, network: str):
+        """
+        For a raw command using `--gas auto`, swap in a learned gas limit
+        when there is one. Returns (command, shape, estimated).
+        """
+        shape = command_shape(command) if self.enabled else None
+        index, value = _gas_flag(command)
+        if shape is None or value != "auto":
+            return command, None, False
+        gas = self.estimate(network, shape)
+        if gas is None:
+            self.counts[(network, "simulated")] += 1
+            return command, shape, False
+        self.counts[(network, "estimated")] += 1
+        command = list(command)
+        if command[index] == "--gas":
+            command[index + 1] = str(gas)
+        else:
+            command[index] = f"--gas={gas}"
+        return command, shape, True
+
+    def record(self, network: str, shape, result, estimated: bool) -> bool:
+        """
+        Learn from a finished raw tx command. Returns True if it ran out
+        of an estimated gas limit at CheckTx, so it was not included and can
+        be re-run with simulation.
+        """
+        if shape is None:
+            return False
+        if not estimated:
+            match = _GAS_ESTIMATE_RE.search(result.stderr or "")
+            if match:
+                self.observe(network, shape, int(match.group(1)))
+        data = result.data if isinstance(result.data, dict) else {}
+        code = int(data.get("code") or 0)
+        if is_out_of_gas(code, data.get("codespace", ""), data.get("raw_log", "")):
+            self.out_of_gas(network, shape)
+            return estimated
+        if code == 0:
+            self.expect(result.txhash, network, shape)
+        return False
+
+    def stats(self):
+        return {"counts": dict(self.counts), "shapes": len(self._samples)}
+
+
+gas_estimator = GasEstimator()
@@ -0,0 +1,119 @@
+"""
+Request hedging for idempotent upstream queries.
+
+When a query has not answered within the recently observed HEDGE_PERCENTILE
+latency for its type, a second copy is sent to the next-best endpoint.
+Networks with a single endpoint are not hedged. The first good answer wins
+and the other request is cancelled. Hedges are paid for out of a budget that
+grows by HEDGE_MAX_RATIO per hedgeable query (one with a second endpoint to
+go to), so they never add more than that fraction of upstream load.
+"""
+
+import logging
+import math
+from collections import defaultdict, deque
+
+from .config import (
+    HEDGE_ENABLED,
+    HEDGE_MAX_RATIO,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+# Samples between percentile recomputations
+_REFRESH_EVERY = 16
+# Most hedges that can be saved up during quiet periods
+_BUDGET_MAX = 10.0
+
+
+class _Latencies:
+    __slots__ = ("samples", "fresh", "percentile")
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.fresh = 0
+        self.percentile = None
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        enabled=HEDGE_ENABLED,
+        max_ratio=HEDGE_MAX_RATIO,
+        percentile=HEDGE_PERCENTILE,
+        min_delay=HEDGE_MIN_DELAY,
+        min_samples=HEDGE_MIN_SAMPLES,
+        window=HEDGE_WINDOW,
+    ):
+        self.enabled = enabled
+        self.max_ratio = max_ratio
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = 0.0
+        # (network, query) -> _Latencies
+        self._latencies: dict = {}
+        # (network, query, outcome) -> count
+        self.counts: dict = defaultdict(int)
+
+    def delay(self, network: str, query: str):
+        """
+        Seconds to wait before hedging a query that is starting now, or
+        None if it should not be hedged (disabled, or too few samples yet).
+        """
+        if not self.enabled:
+            return None
+        self.counts[(network, query, "requests")] += 1
+        self.budget = min(self.budget + self.max_ratio, _BUDGET_MAX)
+        latencies = self._latencies.get((network, query))
+        if latencies is None or len(latencies.samples) < self.min_samples:
+            return None
+        if latencies.percentile is None or latencies.fresh >= _REFRESH_EVERY:
+            ranked = sorted(latencies.samples)
+            index = math.ceil(len(ranked) * self.percentile / 100) - 1
+            latencies.percentile = ranked[max(index, 0)]
+            latencies.fresh = 0
+        return max(latencies.percentile, self.min_delay)
+
+    def observe(self, network: str, query: str, elapsed: float):
+        if not self.enabled:
+            return
+        latencies = self._latencies.get((network, query))
+        if latencies is None:
+            latencies = self._latencies[(network, query)] = _Latencies(self.window)
+        latencies.samples.append(elapsed)
+        latencies.fresh += 1
+
+    def allow(self, network: str, query: str) -> bool:
+        """
+        Spend one hedge from the budget; False (and counted as throttled)
+        when it is exhausted.
+        """
+        if self.budget >= 1:
+            self.budget -= 1
+            self.counts[(network, query, "hedged")] += 1
+            return True
+        self.counts[(network, query, "throttled")] += 1
+        return False
+
+    def won(self, network: str, query: str):
+        self.counts[(network, query, "hedge_won")] += 1
+
+    def stats(self):
+        return {
+            "counts": dict(self.counts),
+            "delays": {
+                key: latencies.percentile
+                for key, latencies in self._latencies.items()
+                if latencies.percentile is not None
+            },
+            "budget": self.budget,
+        }
+
+
+query_hedging = HedgePolicy()
@@ -0,0 +1,225 @@
+"""
+Persistent cache for immutable chain data.
+
+Some query results never change once they exist: a committed tx, a block at
+a given height or hash, a service as of a given height. They are stored in a
+local SQLite file (IMMUTABLE_CACHE_PATH) indexed by key, so they survive
+restarts and are shared by all workers; a warm restart answers them without
+going upstream. The file is capped at IMMUTABLE_CACHE_MAX_BYTES of results,
+evicting the least recently read first.
+"""
+
+import json
+import logging
+import time
+
+from .config import IMMUTABLE_CACHE_MAX_BYTES, IMMUTABLE_CACHE_PATH
+from .result import CommandResult
+from .shared_state import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    network TEXT NOT NULL,
+    raw BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS totals (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Reads refresh an entry's LRU position at most this often (seconds), so
+# hot entries don't cost a write per hit
+_TOUCH_INTERVAL = 60
+# Entries removed per eviction round
+_EVICT_BATCH = 64
+
+
+def _flag(command, name):
+    """
+    Value of `--name value` or `--name=value` in a command, else None.
+    """
+    for i, arg in enumerate(command):
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+        if arg == name and i + 1 < len(command):
+            return command[i + 1]
+    return None
+
+
+def _arguments(command):
+    """
+    Positional arguments of a command: everything but flags and their values.
+    """
+    arguments, skip = [], False
+    for arg in command:
+        if skip:
+            skip = False
+        elif arg.startswith("-"):
+            skip = "=" not in arg
+        else:
+            arguments.append(arg)
+    return arguments
+
+
+def is_immutable_query(command) -> bool:
+    """
+    Whether a raw pocketd command reads data that can never change: a tx by
+    hash, a block by height or hash, or a service at a fixed height.
+    """
+    arguments = _arguments(command)
+    if arguments[:2] == ["query", "tx"]:
+        by_hash = _flag(command, "--type") in (None, "hash")
+        return by_hash and len(arguments) > 2
+    if arguments[:2] == ["query", "block"]:
+        if len(arguments) < 3:
+            return False
+        if _flag(command, "--type") in ("height", "hash"):
+            return True
+        return arguments[2].isdigit() and int(arguments[2]) > 0
+    if arguments[:3] == ["query", "service", "show-service"]:
+        height = _flag(command, "--height") or ""
+        return len(arguments) > 3 and height.isdigit() and int(height) > 0
+    return False
+
+
+class ImmutableCache:
+    def __init__(self, path=IMMUTABLE_CACHE_PATH, max_bytes=IMMUTABLE_CACHE_MAX_BYTES):
+        self.store = SqliteStore(path, schema=SCHEMA)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(network, parts) -> str:
+        return json.dumps([network, *parts], separators=(",", ":"))
+
+    def get(self, key: str):
+        """
+        Stored bytes for a key, or None.
+        """
+        if not self.enabled:
+            return None
+        try:
+            rows = self.store.query(
+                "SELECT raw, accessed_at FROM entries WHERE key = ?", (key,)
+            )
+            if rows and rows[0][1] < time.time() - _TOUCH_INTERVAL:
+                with self.store.transaction() as conn:
+                    conn.execute(
+                        "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+        except Exception as e:
+            logger.warning(f"Immutable cache read failed: {e}")
+            rows = None
+        if not rows:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return bytes(rows[0][0])
+
+    def put(self, key: str, network: str, raw: bytes):
+        if not self.enabled or not raw or len(raw) > self.max_bytes:
+            return
+        try:
+            with self.store.transaction() as conn:
+                old = conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (key, network, raw, len(raw), time.time()),
+                )
+                total = self._add_bytes(conn, len(raw) - (old[0] if old else 0))
+                if total > self.max_bytes:
+                    self._evict(conn, total)
+        except Exception as e:
+            logger.warning(f"Immutable cache write failed: {e}")
+            return
+        self.writes += 1
+
+    def _add_bytes(self, conn, delta) -> int:
+        """
+        Adjust the stored-bytes total and return it.
+        """
+        conn.execute(
+            "INSERT INTO totals VALUES ('bytes', ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (delta,),
+        )
+        row = conn.execute("SELECT value FROM totals WHERE name = 'bytes'")
+        return row.fetchone()[0]
+
+    def _evict(self, conn, total):
+        """
+        Drop least recently read entries until the total fits max_bytes.
+        """
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT ?",
+                (_EVICT_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            freed = 0
+            for key, size in rows:
+                if total - freed <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                freed += size
+                self.evictions += 1
+            total = self._add_bytes(conn, -freed)
+
+    def get_result(self, key: str):
+        """
+        A stored CommandResult, or None.
+        """
+        raw = self.get(key)
+        return CommandResult(raw) if raw is not None else None
+
+    async def get_or_fetch(self, key: str, network: str, fetch) -> CommandResult:
+        """
+        Serve a stored result or call `fetch` (an async callable returning a
+        CommandResult) and store it if it succeeded.
+        """
+        result = self.get_result(key)
+        if result is not None:
+            return result
+        result = await fetch()
+        if result.exit_code == 0 and result.data is not None:
+            self.put(key, network, result.text("compact").encode())
+        return result
+
+    def stats(self):
+        entries, size = 0, 0
+        if self.enabled:
+            try:
+                entries, size = self.store.query(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                )[0]
+            except Exception as e:
+                logger.warning(f"Immutable cache stats failed: {e}")
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+immutable_cache = ImmutableCache()
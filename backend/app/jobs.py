@@ -0,0 +1,200 @@
+"""
+Asynchronous tx jobs.
+
+Tx routes called with ?async=true enqueue the sign-and-broadcast as a job and
+answer 202 with its id right away. Each (network, signer) pair has its own
+bounded queue, worked by up to JOB_WORKERS_PER_SIGNER tasks that exit once
+the queue drains (the last one drops the lane); the SequenceManager still
+orders that signer's sequences. A full queue raises QueueFull, which routes
+turn into 429 with a Retry-After estimated from how long recent jobs of that
+signer took. A job holds its
+request's admission ticket until it finishes, so queued work counts against
+the caller's concurrency cap.
+"""
+
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from .admission import Ticket
+from .config import (
+    JOB_MAX_ENTRIES,
+    JOB_QUEUE_SIZE,
+    JOB_RETRY_AFTER_MAX,
+    JOB_WORKERS_PER_SIGNER,
+)
+from .result import CommandResult
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Weight of the latest job in a lane's average duration
+_EWMA_ALPHA = 0.2
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    network: str
+    signer: str
+    # Dropped once the job finishes, with everything it closes over
+    run: Optional[Callable[[], Awaitable[CommandResult]]] = field(repr=False)
+    ticket: Optional[Ticket] = field(default=None, repr=False)
+    status: str = QUEUED
+    result: Optional[CommandResult] = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self, output="pretty"):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "network": self.network,
+            "signer": self.signer,
+            "status": self.status,
+            "result": self.result.to_dict(output) if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class _Lane:
+    def __init__(self):
+        self.queue: deque = deque()
+        self.workers: set = set()
+        self.running = 0
+        # Average job duration in seconds, for Retry-After
+        self.duration = 1.0
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers=JOB_WORKERS_PER_SIGNER,
+        queue_size=JOB_QUEUE_SIZE,
+        max_entries=JOB_MAX_ENTRIES,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_entries = max_entries
+        # (network, signer) -> _Lane
+        self._lanes: dict = {}
+        # job id -> Job, oldest first
+        self._jobs: OrderedDict = OrderedDict()
+        self.rejected = 0
+
+    def submit(self, kind: str, network: str, signer: str, run, ticket=None) -> Job:
+        """
+        Queue `run` (an async callable returning a CommandResult); the job
+        releases `ticket` when it finishes. Raises QueueFull if the signer's
+        queue is at capacity (the ticket is then still the caller's).
+        """
+        key = (network, signer)
+        lane = self._lanes.setdefault(key, _Lane())
+        if len(lane.queue) >= self.queue_size:
+            self.rejected += 1
+            raise QueueFull(self._retry_after(lane))
+        job = Job(uuid.uuid4().hex, kind, network, signer, run, ticket)
+        self._jobs[job.id] = job
+        self._evict()
+        lane.queue.append(job)
+        if len(lane.workers) < self.workers:
+            lane.workers.add(asyncio.ensure_future(self._work(key, lane)))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _retry_after(self, lane) -> int:
+        backlog = len(lane.queue) + lane.running
+        seconds = backlog * lane.duration / max(self.workers, 1)
+        return max(1, min(math.ceil(seconds), JOB_RETRY_AFTER_MAX))
+
+    def _evict(self):
+        """
+        Drop the oldest finished jobs beyond max_entries.
+        """
+        excess = len(self._jobs) - self.max_entries
+        if excess <= 0:
+            return
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in (DONE, FAILED)
+        ]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+
+    async def _work(self, key, lane):
+        try:
+            while lane.queue:
+                await self._run(lane, lane.queue.popleft())
+        finally:
+            # No await between the queue running dry and here, so submit()
+            # never counts an exiting worker or appends to a dropped lane
+            lane.workers.discard(asyncio.current_task())
+            if not lane.workers and not lane.queue and self._lanes.get(key) is lane:
+                del self._lanes[key]
+
+    async def _run(self, lane, job):
+        lane.running += 1
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = await job.run()
+            job.status = DONE if job.result.exit_code == 0 else FAILED
+            job.error = job.result.stderr if job.status == FAILED else ""
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            if job.ticket is not None:
+                job.ticket.release()
+            job.run = job.ticket = None
+            lane.running -= 1
+            job.finished_at = time.time()
+            elapsed = job.finished_at - job.started_at
+            lane.duration += _EWMA_ALPHA * (elapsed - lane.duration)
+
+    async def stop(self):
+        workers = [w for lane in self._lanes.values() for w in lane.workers]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Jobs that never started give their admission tickets back too
+        for lane in self._lanes.values():
+            for job in lane.queue:
+                if job.ticket is not None:
+                    job.ticket.release()
+                    job.ticket = None
+        self._lanes.clear()
+
+    def stats(self):
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {**counts, "rejected": self.rejected, "lanes": len(self._lanes)}
+
+
+job_queue = JobQueue()
@@ -0,0 +1,174 @@
+"""
+In-process key derivation for bulk account creation.
+
+Generates BIP39 mnemonics and derives secp256k1 keys on the Cosmos HD path
+(m/44'/118'/0'/0/0) and bech32 `pokt` addresses, matching `pocketd keys add`.
+Derivation (PBKDF2 + EC math) is CPU-bound, so batches run on a process
+pool; each derived key is then imported into the keyring with
+`keys import-hex`, which leaves the keyring format to pocketd.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import ecdsa
+from mnemonic import Mnemonic
+
+from .config import ACCOUNT_BATCH_CHUNK_SIZE, KEYGEN_WORKERS, POCKET_MAX_CONCURRENCY
+from .keyring import keyring_index
+from .pocket import import_hex_key_async
+from .utils import run_bounded
+
+logger = logging.getLogger(__name__)
+
+ADDRESS_PREFIX = "pokt"
+HARDENED = 0x80000000
+# m/44'/118'/0'/0/0
+HD_PATH = (44 | HARDENED, 118 | HARDENED, 0 | HARDENED, 0, 0)
+PUBKEY_TYPE = "/cosmos.crypto.secp256k1.PubKey"
+
+_CURVE_ORDER = ecdsa.SECP256k1.order
+_BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_BECH32_GENERATOR = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+
+_mnemonic = Mnemonic("english")
+_pool = None
+
+
+def _bech32_polymod(values):
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            checksum ^= _BECH32_GENERATOR[i] if (top >> i) & 1 else 0
+    return checksum
+
+
+def bech32_encode(hrp: str, data: bytes) -> str:
+    # Regroup 8-bit bytes into 5-bit words
+    words, acc, bits = [], 0, 0
+    for byte in data:
+        acc = (acc << 8) | byte
+        bits += 8
+        while bits >= 5:
+            bits -= 5
+            words.append((acc >> bits) & 31)
+    if bits:
+        words.append((acc << (5 - bits)) & 31)
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    polymod = _bech32_polymod(expanded + words + [0] * 6) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(_BECH32_CHARSET[w] for w in words + checksum)
+
+
+def _compressed_pubkey(private_key: bytes) -> bytes:
+    signing_key = ecdsa.SigningKey.from_string(private_key, curve=ecdsa.SECP256k1)
+    return signing_key.get_verifying_key().to_string("compressed")
+
+
+def derive_private_key(seed: bytes, path=HD_PATH) -> bytes:
+    """
+    BIP32 private key derivation from a BIP39 seed.
+    """
+    digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+    key, chain_code = digest[:32], digest[32:]
+    for index in path:
+        if index & HARDENED:
+            data = b"\x00" + key
+        else:
+            data = _compressed_pubkey(key)
+        digest = hmac.new(
+            chain_code, data + index.to_bytes(4, "big"), hashlib.sha512
+        ).digest()
+        child = int.from_bytes(digest[:32], "big") + int.from_bytes(key, "big")
+        key = (child % _CURVE_ORDER).to_bytes(32, "big")
+        chain_code = digest[32:]
+    return key
+
+
+def pubkey_address(pubkey: bytes, prefix=ADDRESS_PREFIX) -> str:
+    sha = hashlib.sha256(pubkey).digest()
+    return bech32_encode(prefix, hashlib.new("ripemd160", sha).digest())
+
+
+def derive_account(name: str, mnemonic: str = None) -> tuple:
+    """
+    Returns (`keys add --output json` dict, private key hex) for a new key,
+    or for `mnemonic` if given.
+    """
+    mnemonic = mnemonic or _mnemonic.generate(strength=256)
+    private_key = derive_private_key(_mnemonic.to_seed(mnemonic))
+    pubkey = _compressed_pubkey(private_key)
+    info = {
+        "name": name,
+        "type": "local",
+        "address": pubkey_address(pubkey),
+        "pubkey": json.dumps(
+            {"@type": PUBKEY_TYPE, "key": base64.b64encode(pubkey).decode()},
+            separators=(",", ":"),
+        ),
+        "mnemonic": mnemonic,
+    }
+    return info, private_key.hex()
+
+
+def derive_accounts(names: list) -> list:
+    return [derive_account(name) for name in names]
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=KEYGEN_WORKERS or None)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def _import_account(name, chunk_future, offset, network):
+    try:
+        info, hex_key = (await chunk_future)[offset]
+    except Exception as e:
+        logger.error(f"Key derivation failed for {name}: {e}")
+        return {"name": name, "error": f"Key derivation failed: {e}"}
+    imported = await import_hex_key_async(info["name"], hex_key, network)
+    if not imported:
+        return {"name": info["name"], "error": "Failed to import key into keyring"}
+    keyring_index.add(info)
+    return info
+
+
+async def create_accounts(names: list, network: str = "alpha"):
+    """
+    Derive keys for `names` on the process pool and import them into the
+    keyring, yielding each account's `keys add` output (or {"name",
+    "error"}) as soon as it is stored.
+    """
+    loop = asyncio.get_running_loop()
+    size = ACCOUNT_BATCH_CHUNK_SIZE
+    chunks = [
+        loop.run_in_executor(_get_pool(), derive_accounts, names[i : i + size])
+        for i in range(0, len(names), size)
+    ]
+    calls = (
+        partial(_import_account, name, chunks[i // size], i % size, network)
+        for i, name in enumerate(names)
+    )
+    try:
+        async for _, result in run_bounded(calls, POCKET_MAX_CONCURRENCY):
+            yield result
+    finally:
+        for chunk in chunks:
+            chunk.cancel()
@@ -0,0 +1,227 @@
+"""
+In-memory index of the local keyring (name -> address, pubkey, type).
+
+With the file-based keyring backends ("test", "file") every key is stored as
+<POCKET_HOME>/keyring-<backend>/<name>.info, so key existence is answered
+from a directory scan instead of a `keys show` subprocess. The scan records
+each .info file's mtime; it reruns when the directory's mtime changes, and
+at least every _RESCAN_INTERVAL seconds, since overwriting a file in place
+(re-importing a name) leaves the directory's mtime alone. Only keys whose
+file appeared or changed are reloaded, with one `keys show` each; a single
+`keys list` loads everything at startup or when many keys changed at once.
+Keys created through the API are added directly from the `keys add` output.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import POCKET_HOME, POCKET_KEYRING_BACKEND
+from .pocket import run_pocket_command, run_pocket_command_async
+
+logger = logging.getLogger(__name__)
+
+INFO_SUFFIX = ".info"
+# Seconds between rescans of file mtimes while the directory is unchanged
+_RESCAN_INTERVAL = 1.0
+# Most changed keys reloaded with `keys show` rather than one `keys list`
+_SHOW_MAX = 8
+
+
+@dataclass
+class KeyInfo:
+    name: str
+    address: str
+    pubkey: str = ""
+    type: str = "local"
+
+
+def _key_info(key: dict) -> KeyInfo:
+    return KeyInfo(
+        name=key["name"],
+        address=key.get("address", ""),
+        pubkey=key.get("pubkey", ""),
+        type=key.get("type", "local"),
+    )
+
+
+class KeyringIndex:
+    def __init__(self, home=POCKET_HOME, backend=POCKET_KEYRING_BACKEND):
+        self.directory = os.path.join(home, f"keyring-{backend}")
+        # Other backends (os, kwallet, ...) have no directory to scan
+        self.available = backend in ("test", "file")
+        self._keys: dict[str, KeyInfo] = {}
+        # name -> mtime of its .info file, as of the last scan
+        self._mtimes: dict[str, float] = {}
+        # names whose .info file changed since their details were loaded
+        self._stale: set = set()
+        self._dir_mtime = None
+        self._scanned_at = 0.0
+        # Whether a `keys list` has loaded every key yet
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refresh_lock = None
+
+    def _scan(self):
+        """
+        Re-read the keyring directory if its mtime changed or the last scan
+        is _RESCAN_INTERVAL old. Cheap enough to run on every lookup: one
+        stat when nothing changed.
+        """
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        now = time.monotonic()
+        if (
+            dir_mtime == self._dir_mtime
+            and dir_mtime is not None
+            and now - self._scanned_at < _RESCAN_INTERVAL
+        ):
+            return
+        mtimes = {}
+        if dir_mtime is not None:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(INFO_SUFFIX):
+                        name = entry.name[: -len(INFO_SUFFIX)]
+                        mtimes[name] = entry.stat().st_mtime_ns
+        with self._lock:
+            for name in set(self._keys) - set(mtimes):
+                del self._keys[name]
+            for name, mtime in mtimes.items():
+                if self._mtimes.get(name) != mtime:
+                    self._stale.add(name)
+            self._stale &= set(mtimes)
+            self._mtimes = mtimes
+            self._dir_mtime = dir_mtime
+            self._scanned_at = now
+
+    def exists(self, name: str) -> Optional[bool]:
+        """
+        Whether `name` is in the keyring, or None if the backend can't be
+        scanned (callers then fall back to `keys show`).
+        """
+        if not self.available:
+            return None
+        self._scan()
+        return name in self._mtimes
+
+    def _needs_refresh(self) -> bool:
+        if not self.available:
+            return True
+        self._scan()
+        return bool(self._stale)
+
+    def _commands(self) -> list:
+        """
+        The pocketd commands that load the stale keys: `keys show` for each
+        when only a few changed since the index was loaded, else `keys list`.
+        """
+        stale = sorted(self._stale)
+        if self.available and self._loaded and len(stale) <= _SHOW_MAX:
+            return [["keys", "show", name] for name in stale]
+        return [["keys", "list"]]
+
+    def _apply(self, command, result):
+        if command[1] == "list":
+            self._load(result)
+        else:
+            self._load_key(command[2], result)
+
+    def _load_key(self, name, result):
+        with self._lock:
+            self._stale.discard(name)
+            if result["exit_code"] == 0 and isinstance(result.data, dict):
+                self._keys[name] = _key_info(result.data)
+                return
+            # Lookups fall back to `keys show` until the file changes again
+            self._keys.pop(name, None)
+        logger.error(f"Failed to load key {name}: {result['stderr']}")
+
+    def _load(self, result):
+        try:
+            if result["exit_code"] != 0:
+                raise ValueError(result["stderr"])
+            keys = result.data
+            if keys is None and result.raw.strip():
+                raise ValueError(f"unexpected output: {result.text()}")
+        except ValueError as e:
+            # Lookups fall back to `keys show` until the keyring changes again
+            logger.error(f"Failed to list keyring: {e}")
+            self._stale.clear()
+            return
+        # `keys list` returns every key, so it replaces the index wholesale
+        with self._lock:
+            self._keys = {key["name"]: _key_info(key) for key in keys or []}
+            self._stale.clear()
+            self._loaded = True
+
+    def refresh(self, network="alpha"):
+        """
+        Load details of new or changed keys (blocking).
+        """
+        if self._needs_refresh():
+            for command in self._commands():
+                self._apply(command, run_pocket_command(command, network))
+
+    async def refresh_async(self, network="alpha"):
+        """
+        Load details of new or changed keys; concurrent callers share one
+        `keys list`.
+        """
+        if not self._needs_refresh():
+            return
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if self._needs_refresh():
+                commands = self._commands()
+                results = await asyncio.gather(
+                    *(run_pocket_command_async(c, network) for c in commands)
+                )
+                for command, result in zip(commands, results):
+                    self._apply(command, result)
+
+    def add(self, key: dict):
+        """
+        Record a key from `keys add` output without re-listing the keyring.
+        """
+        info = _key_info(key)
+        path = os.path.join(self.directory, info.name + INFO_SUFFIX)
+        with self._lock:
+            self._keys[info.name] = info
+            try:
+                self._mtimes[info.name] = os.stat(path).st_mtime_ns
+                self._stale.discard(info.name)
+            except OSError:
+                pass
+
+    async def get(self, name: str, network="alpha") -> Optional[KeyInfo]:
+        if not self.available:
+            return None
+        await self.refresh_async(network)
+        return self._keys.get(name)
+
+    async def page(self, offset=0, limit=100, network="alpha"):
+        """
+        Returns (total, [KeyInfo, ...]) for one page of keys sorted by name.
+        """
+        await self.refresh_async(network)
+        names = sorted(self._keys)
+        return len(names), [self._keys[n] for n in names[offset : offset + limit]]
+
+    def stats(self):
+        return {
+            "directory": self.directory,
+            "available": self.available,
+            "keys": len(self._keys),
+            "stale": len(self._stale),
+        }
+
+
+keyring_index = KeyringIndex()
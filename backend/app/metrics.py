@@ -0,0 +1,265 @@
+"""
+Minimal Prometheus metrics: counters, gauges and histograms with labels,
+rendered in the text exposition format for GET /metrics.
+
+Recording is a dict lookup and a few additions, so it is cheap enough to
+leave on under full load. Values owned by other components (cache, queues,
+faucet keys) are read through collector callbacks at scrape time.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+_metrics = []
+_collectors = []
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _metrics.append(self)
+
+    def _header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        self._values[labels] = value
+
+    @contextmanager
+    def track_inprogress(self, *labels):
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        state = self._values.get(labels)
+        if state is None:
+            # [per-bucket counts..., +Inf count], sum
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def render(self):
+        lines = self._header()
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+def register_collector(collect):
+    """
+    Register a callback returning [(name, kind, help, {labels: value}), ...]
+    evaluated at scrape time.
+    """
+    _collectors.append(collect)
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, documentation, samples in collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples.items():
+                names = [n for n, _ in labels]
+                values = [v for _, v in labels]
+                lines.append(
+                    f"{name}{_format_labels(names, values)} {_format_value(value)}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template (not raw
+    path, to keep label cardinality bounded).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                value=time.perf_counter() - start,
+            )
+
+
+def command_label(command) -> str:
+    """
+    Low-cardinality label for a pocketd command: its leading subcommand words
+    (e.g. "query auth account", "tx bank send", "keys show"), never arguments.
+    """
+    words = []
+    limit = 2 if command[:1] == ["keys"] else 3
+    for arg in command:
+        if (
+            len(words) == limit
+            or arg.startswith("-")
+            or not arg.replace("-", "").isalpha()
+        ):
+            break
+        words.append(arg)
+    return " ".join(words) or "unknown"
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "pocket_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+COMMAND_DURATION = Histogram(
+    "pocketd_command_duration_seconds",
+    "pocketd subprocess spawn-to-exit time",
+    ("command",),
+)
+COMMAND_QUEUE_WAIT = Histogram(
+    "pocketd_command_queue_wait_seconds",
+    "Time spent waiting for a pocketd concurrency slot",
+    ("command",),
+)
+COMMAND_JSON_DURATION = Histogram(
+    "pocketd_command_json_seconds",
+    "Time spent parsing pocketd JSON output and re-serializing it pretty-printed",
+    ("command", "operation"),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+)
+COMMANDS_TOTAL = Counter(
+    "pocketd_commands_total",
+    "pocketd commands run, by exit code",
+    ("command", "exit_code"),
+)
+COMMAND_ERRORS = Counter(
+    "pocketd_command_errors_total",
+    "pocketd commands that failed to run or timed out",
+    ("command", "reason"),
+)
+COMMANDS_IN_FLIGHT = Gauge(
+    "pocketd_commands_in_flight",
+    "pocketd subprocesses currently running",
+)
+COMMANDS_WAITING = Gauge(
+    "pocketd_commands_waiting",
+    "pocketd commands waiting for a concurrency slot",
+)
+UPSTREAM_DURATION = Histogram(
+    "pocket_upstream_request_duration_seconds",
+    "In-process REST and JSON-RPC request latency",
+    ("client", "network", "outcome"),
+)
+
+COMMANDS_IN_FLIGHT.set(value=0)
+COMMANDS_WAITING.set(value=0)
@@ -2,16 +2,20 @@
 Pydantic models for request and response bodies.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 
-from .config import DEFAULT_FUNDING_AMOUNT
+from .config import DEFAULT_FUNDING_AMOUNT, POCKET_CHAIN
+
+# A configured network; unknown names are rejected rather than falling back
+# to alpha under a name of their own (and their own admission budget)
+Network = Literal[tuple(POCKET_CHAIN)]
 
 
 class CommandRequest(BaseModel):
     command: List[str]
-    network: str = "alpha"
+    network: Network = "alpha"
 
 
 class CommandResponse(BaseModel):
@@ -22,10 +26,17 @@ class CommandResponse(BaseModel):
 
 
 class CreateAccountRequest(BaseModel):
-    network: str = "alpha"
+    network: Network = "alpha"
     key_name: Optional[str] = None
 
 
+class CreateAccountBatchRequest(BaseModel):
+    network: Network = "alpha"
+    count: int = 1
+    key_names: Optional[List[str]] = None
+    prefix: str = "user"
+
+
 class AccountResponse(BaseModel):
     address: str
     name: str
@@ -33,16 +44,131 @@ class AccountResponse(BaseModel):
     message: str
 
 
+class KeyInfoResponse(BaseModel):
+    name: str
+    address: str
+    pubkey: str = ""
+    type: str = "local"
+
+
+class KeyListResponse(BaseModel):
+    keys: List[KeyInfoResponse]
+    total: int
+    offset: int
+    limit: int
+
+
 class FundAccountRequest(BaseModel):
     address: str
     amount: str = DEFAULT_FUNDING_AMOUNT
-    network: str = "alpha"
+    network: Network = "alpha"
     from_account: str = "faucet"
 
 
+class FundRecipient(BaseModel):
+    address: str
+    amount: str = DEFAULT_FUNDING_AMOUNT
+
+
+class FundBatchRequest(BaseModel):
+    recipients: List[FundRecipient]
+    network: Network = "alpha"
+    from_account: str = "faucet"
+
+
+class FundResult(BaseModel):
+    address: str
+    amount: str
+    exit_code: int
+    txhash: Optional[str] = None
+    stderr: str = ""
+
+
+class FundBatchResponse(BaseModel):
+    results: List[FundResult]
+
+
+class BalancesRequest(BaseModel):
+    addresses: List[str]
+    network: Network = "alpha"
+
+
+class Coin(BaseModel):
+    denom: str
+    amount: str
+
+
+class AccountBalances(BaseModel):
+    address: str
+    account: Optional[Dict] = None
+    balances: Optional[List[Coin]] = None
+    error: Optional[str] = None
+
+
+class BalancesResponse(BaseModel):
+    results: List[AccountBalances]
+
+
 class ServiceRequest(BaseModel):
     service_id: str
     service_name: str
     compute_units: int = 10
     from_account: str
-    network: str = "alpha"
+    network: Network = "alpha"
+
+
+class ServiceBatchRequest(BaseModel):
+    services: List[ServiceRequest]
+
+
+class ServiceResult(BaseModel):
+    service_id: str
+    from_account: str
+    network: str
+    exit_code: int
+    status: Optional[str] = None
+    txhash: Optional[str] = None
+    height: Optional[int] = None
+    stderr: str = ""
+
+
+class ServiceBatchResponse(BaseModel):
+    results: List[ServiceResult]
+
+
+class QueryTarget(BaseModel):
+    type: Literal["account", "service"]
+    id: str
+
+
+class QueryStreamRequest(BaseModel):
+    targets: List[QueryTarget]
+    network: Network = "alpha"
+    concurrency: Optional[int] = None
+
+
+class TxStatusResponse(BaseModel):
+    txhash: str
+    network: str
+    status: str
+    height: Optional[int] = None
+    code: Optional[int] = None
+    codespace: str = ""
+    gas_wanted: Optional[int] = None
+    gas_used: Optional[int] = None
+    raw_log: str = ""
+    submitted_at: float
+    finished_at: Optional[float] = None
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    network: str
+    signer: str
+    status: str
+    result: Optional[CommandResponse] = None
+    error: str = ""
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
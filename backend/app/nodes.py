@@ -0,0 +1,184 @@
+"""
+Multi-endpoint node pools with health checks and latency-aware routing.
+
+Each network may list several RPC (POCKET_<NET>_NODE_URL) and REST
+(POCKET_<NET>_API_URL) endpoints. Every request records its latency into an
+EWMA per endpoint, and requests go to the endpoint with the lowest EWMA
+(weighted by its requests in flight). An endpoint that fails
+NODE_EJECT_ERRORS times in a row is taken out of rotation for
+NODE_EJECT_SECONDS; a background probe per pool measures idle endpoints and
+readmits ejected ones as soon as they answer again. Endpoints are labelled
+by host in stats, since URL paths often carry API keys.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import (
+    NODE_EJECT_ERRORS,
+    NODE_EJECT_SECONDS,
+    NODE_PROBE_INTERVAL,
+    NODE_PROBE_TIMEOUT,
+    POCKET_API_URLS,
+    POCKET_NODE_URLS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest sample in an endpoint's latency average
+_EWMA_ALPHA = 0.3
+
+
+class Endpoint:
+    def __init__(self, url: str, name: str):
+        self.url = url.rstrip("/")
+        self.name = name
+        # Seconds; None until the first sample, so new endpoints get tried
+        self.latency: Optional[float] = None
+        self.in_flight = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+        self.last_error = ""
+
+    def available(self, now) -> bool:
+        return self.ejected_until <= now
+
+    def score(self) -> float:
+        return (self.latency or 0.0) * (self.in_flight + 1)
+
+    def to_dict(self):
+        return {
+            "endpoint": self.name,
+            "healthy": self.available(time.monotonic()),
+            "latency": self.latency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejections": self.ejections,
+            "last_error": self.last_error,
+        }
+
+
+def _names(urls):
+    """
+    Host of each URL, suffixed with its position when hosts repeat.
+    """
+    hosts = [urlsplit(url).netloc or url for url in urls]
+    return [
+        f"{host}#{i}" if hosts.count(host) > 1 else host
+        for i, host in enumerate(hosts)
+    ]
+
+
+class NodePool:
+    def __init__(self, kind: str, urls: dict, probe_path: str):
+        self.kind = kind
+        self.probe_path = probe_path
+        # network -> [Endpoint]
+        self.endpoints = {
+            network: [Endpoint(url, name) for url, name in zip(items, _names(items))]
+            for network, items in urls.items()
+        }
+        self._task = None
+        self._client = None
+
+    def _network_endpoints(self, network):
+        return self.endpoints.get(network) or self.endpoints["alpha"]
+
+    def candidates(self, network: str) -> list:
+        """
+        Endpoints in the order to try them: available ones by score, then
+        ejected ones, soonest readmitted first, as a last resort.
+        """
+        now = time.monotonic()
+        endpoints = self._network_endpoints(network)
+        available = [e for e in endpoints if e.available(now)]
+        ejected = [e for e in endpoints if not e.available(now)]
+        return sorted(available, key=Endpoint.score) + sorted(
+            ejected, key=lambda e: e.ejected_until
+        )
+
+    def best(self, network: str) -> Endpoint:
+        return self.candidates(network)[0]
+
+    def succeeded(self, endpoint: Endpoint, elapsed: float, probe=False):
+        endpoint.requests += not probe
+        endpoint.failures = 0
+        if endpoint.latency is None:
+            endpoint.latency = elapsed
+        else:
+            endpoint.latency += _EWMA_ALPHA * (elapsed - endpoint.latency)
+        if endpoint.ejected_until:
+            endpoint.ejected_until = 0.0
+            logger.info(f"{self.kind} endpoint {endpoint.name} back in rotation")
+
+    def failed(self, endpoint: Endpoint, error, probe=False):
+        endpoint.requests += not probe
+        endpoint.errors += not probe
+        endpoint.failures += 1
+        endpoint.last_error = str(error) or type(error).__name__
+        now = time.monotonic()
+        if endpoint.failures >= NODE_EJECT_ERRORS and endpoint.available(now):
+            endpoint.ejected_until = now + NODE_EJECT_SECONDS
+            endpoint.ejections += 1
+            logger.warning(
+                f"Ejected {self.kind} endpoint {endpoint.name} for "
+                f"{NODE_EJECT_SECONDS}s after {endpoint.failures} errors: "
+                f"{endpoint.last_error}"
+            )
+
+    async def _probe(self, endpoint: Endpoint):
+        start = time.perf_counter()
+        try:
+            resp = await self._client.get(endpoint.url + self.probe_path)
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            self.failed(endpoint, e, probe=True)
+            return
+        self.succeeded(endpoint, time.perf_counter() - start, probe=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.gather(
+                *(
+                    self._probe(endpoint)
+                    for endpoints in self.endpoints.values()
+                    for endpoint in endpoints
+                )
+            )
+            await asyncio.sleep(NODE_PROBE_INTERVAL)
+
+    def start(self):
+        if NODE_PROBE_INTERVAL <= 0 or self._task is not None:
+            return
+        self._client = httpx.AsyncClient(timeout=NODE_PROBE_TIMEOUT)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        return {
+            network: [endpoint.to_dict() for endpoint in endpoints]
+            for network, endpoints in self.endpoints.items()
+        }
+
+
+rpc_nodes = NodePool("rpc", POCKET_NODE_URLS, "/status")
+api_nodes = NodePool(
+    "rest", POCKET_API_URLS, "/cosmos/base/tendermint/v1beta1/syncing"
+)
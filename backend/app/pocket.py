@@ -2,7 +2,7 @@
 Pocket command helpers and utilities.
 """
 
-import json
+import asyncio
 import logging
 import os
 import platform
@@ -13,10 +13,24 @@ from .config import (
     NETWORK_SECRETS,
     POCKET_BIN_PATH,
     POCKET_CHAIN,
+    POCKET_COMMAND_TIMEOUT,
     POCKET_HOME,
     POCKET_KEYRING_BACKEND,
-    POCKET_NODE_URL,
+    POCKET_MAX_CONCURRENCY,
 )
+from .metrics import (
+    COMMAND_DURATION,
+    COMMAND_ERRORS,
+    COMMAND_QUEUE_WAIT,
+    COMMANDS_IN_FLIGHT,
+    COMMANDS_TOTAL,
+    COMMANDS_WAITING,
+    command_label,
+)
+from .gas import gas_estimator
+from .nodes import rpc_nodes
+from .query_client import query_client
+from .result import CommandResult
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,68 +43,40 @@ class AccountState:
     account_number: int
     sequence: int
 
-# Internal cache for account_number and sequence
-# Maps address (str) -> AccountState
-_account_state_cache: dict[str, AccountState] = {}
-
 
-def get_account_state(address, network="alpha"):
+async def query_account_state(address, network="alpha") -> AccountState:
     """
-    Get (account_number, sequence) for an address. Uses cache if available, else queries pocketd.
+    Query the committed account_number and sequence for an address from the
+    node's REST API. Uncached; see sequence.SequenceManager for allocation.
     """
-    if address in _account_state_cache:
-        state = _account_state_cache[address]
-        return state.account_number, state.sequence
-
-    # Query pocketd for account info
-    cmd = [
-        "query", "auth", "account", address, "-o", "json"
-    ]
-    result = run_pocket_command(cmd, network)
+    result = await query_client.get_account(address, network)
     if result["exit_code"] != 0:
         logger.error(f"Failed to query account state: {result['stderr']}")
         raise Exception(f"Failed to query account state: {result['stderr']}")
     try:
-        data = json.loads(result["stdout"])
-        value = data["account"]["value"]
-        acc_num = int(value["account_number"])
-        seq = int(value["sequence"])
-        _account_state_cache[address] = AccountState(account_number=acc_num, sequence=seq)
-        return acc_num, seq
+        value = result.data["account"]["value"]
+        return AccountState(
+            account_number=int(value["account_number"]),
+            sequence=int(value.get("sequence", 0)),
+        )
     except Exception as e:
         logger.error(f"Error parsing account state: {e}")
         raise
 
-def update_account_sequence(address, increment=1):
-    """
-    Increment the cached sequence for an address (after sending a tx).
-    """
-    if address in _account_state_cache:
-        _account_state_cache[address].sequence += increment
 
-def clear_account_cache(address=None):
+def _prepare_command(command, network="alpha"):
     """
-    Clear the cache for a specific address or all addresses.
+    Build the full pocketd argv and environment for a command.
+    Returns (cmd, env), or a failed CommandResult if the binary is missing.
     """
-    if address:
-        _account_state_cache.pop(address, None)
-    else:
-        _account_state_cache.clear()
-
-
-def run_pocket_command(command, network="alpha", requires_confirmation=False):
     chain_id = POCKET_CHAIN.get(network, POCKET_CHAIN["alpha"])
-    node_url = POCKET_NODE_URL.get(network, POCKET_NODE_URL["alpha"])
+    # The fastest healthy RPC endpoint, as ranked by the in-process clients
+    node_url = rpc_nodes.best(network).url
     network_secret = NETWORK_SECRETS.get(network, NETWORK_SECRETS["alpha"])
     logger.info(f"Using pocketd binary at: {POCKET_BIN_PATH}")
     if not os.path.exists(POCKET_BIN_PATH):
         logger.error(f"pocketd binary not found at {POCKET_BIN_PATH}")
-        return {
-            "stdout": "",
-            "stderr": f"pocketd binary not found at {POCKET_BIN_PATH}",
-            "exit_code": 1,
-            "txhash": None,
-        }
+        return CommandResult.failure(f"pocketd binary not found at {POCKET_BIN_PATH}")
     file_stat = os.stat(POCKET_BIN_PATH)
     is_executable = bool(file_stat.st_mode & stat.S_IXUSR)
     logger.info(
@@ -108,55 +94,183 @@ def run_pocket_command(command, network="alpha", requires_confirmation=False):
         cmd.extend(["--home", POCKET_HOME])
     if "--output" not in command:
         cmd.extend(["--output", "json"])
+    env = os.environ.copy()
+    if network_secret:
+        env["NETWORK_SECRET"] = network_secret
+    return cmd, env
+
+
+def _format_result(stdout, stderr, exit_code, label="unknown") -> CommandResult:
+    """
+    Wrap raw stdout in a CommandResult; JSON is parsed only when needed.
+    """
+    COMMANDS_TOTAL.inc(label, str(exit_code))
+    return CommandResult(stdout, stderr, exit_code, label=label)
+
+
+def run_pocket_command(command, network="alpha", requires_confirmation=False):
+    """
+    Run a pocketd command synchronously. Blocks the calling thread, so only
+    use it outside the event loop (startup threads, scripts).
+    """
+    prepared = _prepare_command(command, network)
+    if isinstance(prepared, CommandResult):
+        return prepared
+    cmd, env = prepared
+    label = command_label(command)
     try:
-        env = os.environ.copy()
-        if network_secret:
-            env["NETWORK_SECRET"] = network_secret
         logger.info(f"Executing command: {' '.join(cmd)}")
-        if requires_confirmation:
+        with COMMANDS_IN_FLIGHT.track_inprogress(), COMMAND_DURATION.time(label):
             result = subprocess.run(
-                cmd, capture_output=True, text=True, env=env, input="yes\n"
+                cmd,
+                capture_output=True,
+                env=env,
+                input=b"yes\n" if requires_confirmation else None,
+                timeout=POCKET_COMMAND_TIMEOUT,
             )
-        else:
-            result = subprocess.run(cmd, capture_output=True, text=True, env=env)
         logger.info(f"Command exit code: {result.returncode}")
-        stdout = result.stdout
-        txhash = None
-        try:
-            if stdout and stdout.strip():
-                json_data = json.loads(stdout)
-                stdout = json.dumps(json_data, indent=2)
-                txhash = json_data.get("txhash")
-        except json.JSONDecodeError:
-            pass
-        return {
-            "stdout": stdout,
-            "stderr": result.stderr,
-            "exit_code": result.returncode,
-            "txhash": txhash,
-        }
+        stderr = result.stderr.decode(errors="replace")
+        return _format_result(result.stdout, stderr, result.returncode, label)
     except Exception as e:
+        COMMAND_ERRORS.inc(label, type(e).__name__)
         logger.error(f"Error executing command: {str(e)}")
         import traceback
 
         logger.error(traceback.format_exc())
-        return {"stdout": "", "stderr": str(e), "exit_code": 1, "txhash": None}
+        return CommandResult.failure(str(e))
+
+
+# Caps the number of pocketd subprocesses in flight across all requests
+_command_semaphore = asyncio.Semaphore(POCKET_MAX_CONCURRENCY)
+
+
+async def run_pocket_command_async(
+    command, network="alpha", requires_confirmation=False, timeout=None
+):
+    """
+    Run a pocketd command without blocking the event loop.
+    At most POCKET_MAX_CONCURRENCY commands run at once; the rest wait for a
+    slot. A command still running after `timeout` seconds (default
+    POCKET_COMMAND_TIMEOUT) is killed and reported as a failure.
+    Txs using `--gas auto` get a learned gas limit instead of a simulation
+    when one is known, and are simulated after all if it runs out.
+    """
+    estimated_command, shape, estimated = gas_estimator.prepare(command, network)
+    result = await _run_async(
+        estimated_command, network, requires_confirmation, timeout
+    )
+    if gas_estimator.record(network, shape, result, estimated):
+        result = await _run_async(command, network, requires_confirmation, timeout)
+        gas_estimator.record(network, shape, result, False)
+    return result
+
+
+async def _run_async(command, network, requires_confirmation, timeout):
+    prepared = _prepare_command(command, network)
+    if isinstance(prepared, CommandResult):
+        return prepared
+    cmd, env = prepared
+    if timeout is None:
+        timeout = POCKET_COMMAND_TIMEOUT
+    label = command_label(command)
+    with COMMANDS_WAITING.track_inprogress(), COMMAND_QUEUE_WAIT.time(label):
+        await _command_semaphore.acquire()
+    try:
+        with COMMANDS_IN_FLIGHT.track_inprogress(), COMMAND_DURATION.time(label):
+            stdout, stderr, returncode = await _communicate(
+                cmd, env, requires_confirmation, timeout, label
+            )
+    except _CommandFailed as e:
+        return CommandResult.failure(str(e))
+    finally:
+        _command_semaphore.release()
+    logger.info(f"Command exit code: {returncode}")
+    return _format_result(stdout, stderr.decode(errors="replace"), returncode, label)
+
+
+class _CommandFailed(Exception):
+    """The subprocess could not be started or timed out."""
+
+
+async def _communicate(cmd, env, requires_confirmation, timeout, label):
+    """
+    Spawn pocketd and wait for it to exit. Returns (stdout, stderr, returncode).
+    """
+    logger.info(f"Executing command: {' '.join(cmd)}")
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=(
+                asyncio.subprocess.PIPE
+                if requires_confirmation
+                else asyncio.subprocess.DEVNULL
+            ),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+    except Exception as e:
+        COMMAND_ERRORS.inc(label, "spawn")
+        logger.error(f"Error executing command: {str(e)}")
+        raise _CommandFailed(str(e))
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            proc.communicate(b"yes\n" if requires_confirmation else None),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        await _kill_process(proc)
+        COMMAND_ERRORS.inc(label, "timeout")
+        logger.error(f"Command timed out after {timeout}s: {' '.join(cmd)}")
+        raise _CommandFailed(f"Command timed out after {timeout}s")
+    except asyncio.CancelledError:
+        await _kill_process(proc)
+        raise
+    return stdout, stderr, proc.returncode
+
+
+async def _kill_process(proc):
+    """
+    Kill a subprocess (if still running) and reap it.
+    """
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    await proc.wait()
 
 
 def key_exists(name: str, network: str = "alpha") -> bool:
     """
     Check if a key exists in the keyring.
     """
+    # Imported here: the keyring index runs its listings through this module
+    from .keyring import keyring_index
+
+    exists = keyring_index.exists(name)
+    if exists is not None:
+        return exists
     cmd = ["keys", "show", name]
     result = run_pocket_command(cmd, network)
     return result["exit_code"] == 0
 
 
-def import_hex_key(name: str, hex_key: str, network: str = "alpha") -> bool:
+async def key_exists_async(name: str, network: str = "alpha") -> bool:
     """
-    Import a key from a hex string.
+    Check if a key exists in the keyring without blocking the event loop.
     """
-    cmd = [
+    from .keyring import keyring_index
+
+    exists = keyring_index.exists(name)
+    if exists is not None:
+        return exists
+    result = await run_pocket_command_async(["keys", "show", name], network)
+    return result["exit_code"] == 0
+
+
+def _import_hex_key_command(name: str, hex_key: str) -> list:
+    return [
         "keys",
         "import-hex",
         name,
@@ -166,5 +280,21 @@ def import_hex_key(name: str, hex_key: str, network: str = "alpha") -> bool:
         "--keyring-backend",
         POCKET_KEYRING_BACKEND,
     ]
+
+
+def import_hex_key(name: str, hex_key: str, network: str = "alpha") -> bool:
+    """
+    Import a key from a hex string.
+    """
+    cmd = _import_hex_key_command(name, hex_key)
     result = run_pocket_command(cmd, network, requires_confirmation=True)
     return result["exit_code"] == 0
+
+
+async def import_hex_key_async(name: str, hex_key: str, network: str = "alpha") -> bool:
+    """
+    Import a key from a hex string without blocking the event loop.
+    """
+    cmd = _import_hex_key_command(name, hex_key)
+    result = await run_pocket_command_async(cmd, network, requires_confirmation=True)
+    return result["exit_code"] == 0
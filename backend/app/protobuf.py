@@ -0,0 +1,117 @@
+"""
+Minimal protobuf wire-format codec.
+
+Enough to build the small query request messages sent with `abci_query` and
+to read the responses without generated code: messages are decoded into
+{field number: [values]}, with length-delimited values left as bytes for the
+caller to interpret (string, bytes or nested message) by the schema it
+expects. A field of the wrong wire type for how it is read raises
+ValueError, like any other malformed input.
+"""
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH = 2
+_FIXED32 = 5
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _decode_varint(data: bytes, pos: int):
+    value, shift = 0, 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+        if shift > 63:
+            raise ValueError("varint too long")
+
+
+def encode_message(fields) -> bytes:
+    """
+    Encode [(field number, value), ...]; ints are varints, str/bytes are
+    length-delimited. None values are skipped, like unset fields.
+    """
+    out = bytearray()
+    for number, value in fields:
+        if value is None:
+            continue
+        if isinstance(value, int):
+            out += encode_varint(number << 3 | _VARINT) + encode_varint(value)
+            continue
+        if isinstance(value, str):
+            value = value.encode()
+        out += encode_varint(number << 3 | _LENGTH)
+        out += encode_varint(len(value)) + value
+    return bytes(out)
+
+
+def _expect(value, kind):
+    if not isinstance(value, kind):
+        wire = "length-delimited" if kind is bytes else "varint"
+        raise ValueError(f"expected a {wire} field, got {value!r:.40}")
+    return value
+
+
+def decode_message(data: bytes) -> dict:
+    """
+    {field number: [values]} of an encoded message.
+    """
+    _expect(data, bytes)
+    fields: dict = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = _decode_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == _VARINT:
+            value, pos = _decode_varint(data, pos)
+        elif wire_type == _LENGTH:
+            size, pos = _decode_varint(data, pos)
+            value = data[pos : pos + size]
+            if len(value) != size:
+                raise ValueError("truncated field")
+            pos += size
+        elif wire_type in (_FIXED64, _FIXED32):
+            size = 8 if wire_type == _FIXED64 else 4
+            value = int.from_bytes(data[pos : pos + size], "little")
+            pos += size
+        else:
+            raise ValueError(f"unsupported wire type {wire_type}")
+        fields.setdefault(number, []).append(value)
+    return fields
+
+
+def first(fields: dict, number: int, default=None):
+    values = fields.get(number)
+    return values[0] if values else default
+
+
+def raw(fields: dict, number: int) -> bytes:
+    return _expect(first(fields, number, b""), bytes)
+
+
+def text(fields: dict, number: int) -> str:
+    return raw(fields, number).decode()
+
+
+def texts(fields: dict, number: int) -> list:
+    return [_expect(value, bytes).decode() for value in fields.get(number, [])]
+
+
+def varint(fields: dict, number: int) -> int:
+    return _expect(first(fields, number, 0), int)
@@ -0,0 +1,58 @@
+"""
+Cached chain queries shared by the single-target routes and the bulk
+streaming endpoint.
+"""
+
+from typing import Optional
+
+from .cache import query_cache
+from .config import (
+    QUERY_CACHE_ACCOUNT_TTL,
+    QUERY_CACHE_EVENT_TTL,
+    QUERY_CACHE_SERVICE_TTL,
+)
+from .events import block_events
+from .immutable import immutable_cache
+from .query_client import query_client
+
+
+async def get_account(address: str, network: str = "alpha") -> dict:
+    # Block events invalidate changed accounts, so they can be kept longer
+    if block_events.connected(network):
+        ttl = QUERY_CACHE_EVENT_TTL
+    else:
+        ttl = QUERY_CACHE_ACCOUNT_TTL
+    return await query_cache.get_or_fetch(
+        (network, ("query", "auth", "account", address)),
+        lambda: query_client.get_account(address, network),
+        ttl=ttl,
+        tags=[(network, address)],
+    )
+
+
+async def get_service(
+    service_id: str, network: str = "alpha", height: Optional[int] = None
+) -> dict:
+    # A service as of a past height never changes
+    if height:
+        return await immutable_cache.get_or_fetch(
+            immutable_cache.key(
+                network, ("query", "service", "show-service", service_id, height)
+            ),
+            network,
+            lambda: query_client.get_service(service_id, network, height),
+        )
+    return await query_cache.get_or_fetch(
+        (network, ("query", "service", "show-service", service_id)),
+        lambda: query_client.get_service(service_id, network),
+        ttl=QUERY_CACHE_SERVICE_TTL,
+        tags=[(network, f"service:{service_id}")],
+    )
+
+
+# query target type -> fetch(id, network)
+QUERY_TYPES = {
+    "account": get_account,
+    "service": get_service,
+}
+
@@ -0,0 +1,351 @@
+"""
+In-process clients for the Pocket gRPC-gateway (REST) API and the CometBFT
+JSON-RPC endpoint.
+
+Queries and broadcasts go straight to the node over a pooled keep-alive
+connection per endpoint instead of starting a pocketd process. Each request
+goes to the fastest healthy endpoint of the network's NodePool and fails
+over to the next one on connection errors. Results use the same shape as
+run_pocket_command.
+"""
+
+import asyncio
+import logging
+import time
+
+import httpx
+
+from .config import NODE_MAX_ATTEMPTS, POCKET_QUERY_POOL_SIZE, POCKET_QUERY_TIMEOUT
+from .hedge import query_hedging
+from .metrics import UPSTREAM_DURATION
+from .nodes import NodePool, api_nodes, rpc_nodes
+from .result import CommandResult
+
+logger = logging.getLogger(__name__)
+
+
+def _command_result(data=None, error=None) -> CommandResult:
+    """
+    Build a CommandResult from parsed JSON or an error message.
+    """
+    if error is not None:
+        return CommandResult.failure(error)
+    return CommandResult.from_data(data)
+
+
+def _account_to_cli_json(data):
+    """
+    Convert a REST account response ({"account": {"@type": ..., ...}}) to the
+    {"account": {"type": ..., "value": {...}}} shape printed by pocketd.
+    """
+    account = dict(data.get("account") or {})
+    account_type = account.pop("@type", "")
+    return {"account": {"type": account_type, "value": account}}
+
+
+# Gateway errors mean the endpoint (or its proxy) is unwell, not the query
+_RETRYABLE_STATUS = (502, 503, 504)
+# Failures where the request never reached the endpoint
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class PooledClient:
+    """
+    Base for HTTP clients that keep one keep-alive pool per endpoint.
+    """
+
+    kind = ""
+    default_nodes: NodePool = None
+
+    def __init__(self, base_urls=None, timeout=POCKET_QUERY_TIMEOUT, transport=None):
+        if base_urls is None:
+            self.nodes = self.default_nodes
+        else:
+            self.nodes = NodePool(
+                self.kind,
+                {n: [u] if isinstance(u, str) else u for n, u in base_urls.items()},
+                self.default_nodes.probe_path,
+            )
+        self.timeout = timeout
+        self._transport = transport
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def _client(self, url):
+        client = self._clients.get(url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=POCKET_QUERY_POOL_SIZE,
+                    max_keepalive_connections=POCKET_QUERY_POOL_SIZE,
+                ),
+                transport=self._transport,
+            )
+            self._clients[url] = client
+        return client
+
+    async def _attempt(self, endpoint, method, path, **kwargs):
+        """
+        One request to one endpoint, recording the outcome in its pool.
+        """
+        endpoint.in_flight += 1
+        start = time.perf_counter()
+        try:
+            resp = await self._client(endpoint.url).request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.nodes.failed(endpoint, e)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+        if resp.status_code in _RETRYABLE_STATUS:
+            self.nodes.failed(endpoint, f"HTTP {resp.status_code}")
+        else:
+            self.nodes.succeeded(endpoint, time.perf_counter() - start)
+        return resp
+
+    async def _send(self, network, method, path, retry=True, candidates=None, **kw):
+        """
+        Send a request to the network's best endpoint, failing over to the
+        next one on connection errors, and also on timeouts and gateway
+        errors when `retry` is set (requests that are safe to repeat).
+        """
+        if candidates is None:
+            candidates = self.nodes.candidates(network)[: max(NODE_MAX_ATTEMPTS, 1)]
+        if not candidates:
+            # Raised like a connection failure so callers report it the same way
+            raise httpx.ConnectError(f"No {self.kind} endpoints for {network}")
+        for attempt, endpoint in enumerate(candidates, 1):
+            last = attempt == len(candidates)
+            try:
+                resp = await self._attempt(endpoint, method, path, **kw)
+            except httpx.HTTPError as e:
+                if last or not (retry or isinstance(e, _NOT_SENT)):
+                    raise
+                logger.warning(
+                    f"{method} {path} to {endpoint.name} failed, failing over: {e!r}"
+                )
+                continue
+            if retry and not last and resp.status_code in _RETRYABLE_STATUS:
+                continue
+            return resp
+
+    async def _send_hedged(self, network, query, method, path, **kw):
+        """
+        Like _send, for idempotent queries: once the first attempt has run
+        longer than the query type's hedge delay, race a second attempt on
+        the next endpoint and return whichever answers well first. Not
+        hedged when the network has a single endpoint.
+        """
+        candidates = self.nodes.candidates(network)[: max(NODE_MAX_ATTEMPTS, 1)]
+        # Only queries that could be hedged count towards the hedge budget
+        delay = query_hedging.delay(network, query) if len(candidates) > 1 else None
+        start = time.perf_counter()
+        if delay is None:
+            resp = await self._send(network, method, path, candidates=candidates, **kw)
+        else:
+            resp = await self._race(network, query, delay, candidates, method, path, kw)
+        query_hedging.observe(network, query, time.perf_counter() - start)
+        return resp
+
+    async def _race(self, network, query, delay, candidates, method, path, kw):
+        # The primary keeps its failover order minus the hedge's endpoint
+        spare = candidates[1]
+        primary = asyncio.ensure_future(
+            self._send(
+                network,
+                method,
+                path,
+                candidates=[c for c in candidates if c is not spare],
+                **kw,
+            )
+        )
+        tasks = [primary]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if done or not query_hedging.allow(network, query):
+                return await primary
+            hedge = asyncio.ensure_future(self._attempt(spare, method, path, **kw))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None and (
+                        task.result().status_code not in _RETRYABLE_STATUS
+                    ):
+                        if task is hedge:
+                            query_hedging.won(network, query)
+                        return task.result()
+            # Neither answered well: report the primary's outcome
+            if hedge.exception() is None and primary.exception() is not None:
+                return hedge.result()
+            return primary.result()
+        finally:
+            # Cancel the loser; retrieve errors of finished ones so they
+            # aren't logged as unhandled
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+class QueryClient(PooledClient):
+    """
+    Client for chain queries over the gRPC-gateway REST API.
+    """
+
+    kind = "rest"
+    default_nodes = api_nodes
+
+    async def get_json(self, path, network="alpha", headers=None, query=None):
+        """
+        GET a REST path. Returns (data, error); exactly one of them is None.
+        Queries named by `query` (e.g. "account") may be hedged.
+        """
+        start = time.perf_counter()
+        try:
+            if query is not None:
+                resp = await self._send_hedged(
+                    network, query, "GET", path, headers=headers
+                )
+            else:
+                resp = await self._send(network, "GET", path, headers=headers)
+        except httpx.HTTPError as e:
+            UPSTREAM_DURATION.observe(
+                "rest", network, "error", value=time.perf_counter() - start
+            )
+            logger.error(f"Query {path} on {network} failed: {e}")
+            return None, f"Error querying {path}: {e}"
+        UPSTREAM_DURATION.observe(
+            "rest", network, str(resp.status_code), value=time.perf_counter() - start
+        )
+        try:
+            data = resp.json()
+        except ValueError:
+            data = None
+        if resp.status_code != 200:
+            message = data.get("message") if isinstance(data, dict) else None
+            return None, message or f"HTTP {resp.status_code}: {resp.text}"
+        if data is None:
+            return None, f"Invalid JSON response from {path}"
+        return data, None
+
+    async def get_account(self, address, network="alpha"):
+        """
+        Equivalent of `pocketd query auth account <address>`.
+        """
+        data, error = await self.get_json(
+            f"/cosmos/auth/v1beta1/accounts/{address}", network, query="account"
+        )
+        if error is not None:
+            return _command_result(error=error)
+        return _command_result(_account_to_cli_json(data))
+
+    async def get_service(self, service_id, network="alpha", height=None):
+        """
+        Equivalent of `pocketd query service show-service <service_id>`, at
+        `height` if given.
+        """
+        headers = {"x-cosmos-block-height": str(height)} if height else None
+        data, error = await self.get_json(
+            f"/pokt-network/poktroll/service/service/{service_id}",
+            network,
+            headers,
+            query="service",
+        )
+        if error is not None:
+            return _command_result(error=error)
+        return _command_result(data)
+
+
+class RpcClient(PooledClient):
+    """
+    Client for the CometBFT JSON-RPC endpoint (POCKET_NODE_URL).
+    """
+
+    kind = "rpc"
+    default_nodes = rpc_nodes
+
+    async def call(self, method, params=None, network="alpha"):
+        """
+        Make a JSON-RPC call. Returns (result, error); exactly one is None.
+        Only connection failures are retried on another endpoint for
+        broadcasts, which must not be sent twice.
+        """
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+        start = time.perf_counter()
+        try:
+            resp = await self._send(
+                network,
+                "POST",
+                "/",
+                retry=not method.startswith("broadcast"),
+                json=payload,
+            )
+            data = resp.json()
+        except (httpx.HTTPError, ValueError) as e:
+            UPSTREAM_DURATION.observe(
+                "rpc", network, "error", value=time.perf_counter() - start
+            )
+            logger.error(f"RPC {method} on {network} failed: {e}")
+            return None, f"Error calling {method}: {e}"
+        UPSTREAM_DURATION.observe(
+            "rpc", network, str(resp.status_code), value=time.perf_counter() - start
+        )
+        return _rpc_outcome(data)
+
+    async def call_batch(self, calls, network="alpha"):
+        """
+        Send several JSON-RPC calls ([(method, params), ...]) in one HTTP
+        request. Returns [(result, error), ...] in the same order.
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params or {}}
+            for i, (method, params) in enumerate(calls)
+        ]
+        start = time.perf_counter()
+        try:
+            resp = await self._send(network, "POST", "/", json=payload)
+            data = resp.json()
+            if not isinstance(data, list):
+                raise ValueError(f"expected a batch response, got {data!r}")
+        except (httpx.HTTPError, ValueError) as e:
+            UPSTREAM_DURATION.observe(
+                "rpc", network, "error", value=time.perf_counter() - start
+            )
+            logger.error(f"RPC batch of {len(calls)} on {network} failed: {e}")
+            return [(None, f"Error calling RPC batch: {e}")] * len(calls)
+        UPSTREAM_DURATION.observe(
+            "rpc", network, str(resp.status_code), value=time.perf_counter() - start
+        )
+        by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        return [_rpc_outcome(by_id.get(i, {})) for i in range(len(calls))]
+
+
+def _rpc_outcome(data):
+    """
+    (result, error) for one JSON-RPC response object.
+    """
+    if not isinstance(data, dict):
+        return None, f"Invalid JSON-RPC response: {data!r:.200}"
+    if data.get("error"):
+        error = data["error"]
+        if not isinstance(error, dict):
+            return None, str(error)
+        return None, error.get("data") or error.get("message") or str(error)
+    if "result" not in data:
+        return None, "Missing JSON-RPC response"
+    return data["result"], None
+
+
+query_client = QueryClient()
+rpc_client = RpcClient()
@@ -0,0 +1,157 @@
+"""
+Parse-once result of a pocketd command or in-process query.
+
+CommandResult keeps pocketd's stdout as raw bytes and parses the JSON only
+when someone asks for `.data`; the pretty-printed form is rendered at most
+once, and only for clients that ask for it. Routes serialize results with
+command_response(), which skips the response-model round trip and uses
+orjson when it is installed.
+"""
+
+import json
+import time
+from collections.abc import Mapping
+from typing import Literal
+
+from fastapi.responses import Response
+
+from .metrics import COMMAND_JSON_DURATION
+
+try:
+    import orjson
+except ImportError:  # optional fast serializer
+    orjson = None
+
+_UNPARSED = object()
+# ?output= on routes returning a CommandResponse
+OutputFormat = Literal["pretty", "compact"]
+
+
+def loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(data, pretty=False) -> bytes:
+    """
+    Serialize to JSON bytes: compact, or indented by 2 spaces.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(data, indent=2).encode()
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class CommandResult(Mapping):
+    """
+    Also readable as the CommandResponse dict ({"stdout", "stderr",
+    "exit_code", "txhash"}), where "stdout" is the pretty-printed output.
+    """
+
+    __slots__ = ("raw", "stderr", "exit_code", "label", "_data", "_pretty")
+
+    _fields = ("stdout", "stderr", "exit_code", "txhash")
+
+    def __init__(self, raw=b"", stderr="", exit_code=0, data=_UNPARSED, label=None):
+        self.raw = raw.encode() if isinstance(raw, str) else raw
+        self.stderr = stderr
+        self.exit_code = exit_code
+        # pocketd subcommand, for the JSON timing metric; None for results
+        # that did not come from pocketd
+        self.label = label
+        self._data = data
+        self._pretty = None
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Result for already-parsed JSON (in-process queries).
+        """
+        return cls(raw=None, data=data)
+
+    @classmethod
+    def failure(cls, stderr, exit_code=1):
+        return cls(b"", stderr, exit_code, data=None)
+
+    @property
+    def data(self):
+        """
+        Parsed JSON stdout, or None if stdout is empty or not JSON.
+        """
+        if self._data is _UNPARSED:
+            start = time.perf_counter()
+            try:
+                self._data = loads(self.raw) if self.raw.strip() else None
+            except ValueError:
+                self._data = None
+            self._observe("parse", start)
+        return self._data
+
+    def _observe(self, operation, start):
+        if self.label is not None:
+            COMMAND_JSON_DURATION.observe(
+                self.label, operation, value=time.perf_counter() - start
+            )
+
+    @property
+    def txhash(self):
+        data = self.data
+        return data.get("txhash") if isinstance(data, dict) else None
+
+    def text(self, output="pretty") -> str:
+        """
+        Stdout as a string: pretty-printed or compact JSON, or as-is if it
+        is not JSON.
+        """
+        if self.raw is None:
+            self.raw = dumps(self._data)
+        if self.data is None:
+            return self.raw.decode(errors="replace")
+        if output == "compact":
+            # pocketd already prints compact JSON
+            return self.raw.decode(errors="replace")
+        if self._pretty is None:
+            start = time.perf_counter()
+            self._pretty = dumps(self._data, pretty=True).decode()
+            self._observe("serialize", start)
+        return self._pretty
+
+    def to_dict(self, output="pretty") -> dict:
+        return {
+            "stdout": self.text(output),
+            "stderr": self.stderr,
+            "exit_code": self.exit_code,
+            "txhash": self.txhash,
+        }
+
+    def __getitem__(self, key):
+        if key == "stdout":
+            return self.text()
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return f"CommandResult(exit_code={self.exit_code}, {len(self.raw or b'')}B)"
+
+
+def command_response(result, output="pretty", status_code=200) -> Response:
+    """
+    Serialize a CommandResult (or CommandResponse-shaped dict) straight to a
+    JSON response.
+    """
+    if isinstance(result, CommandResult):
+        body = result.to_dict(output)
+    else:
+        body = dict(result)
+    return Response(
+        dumps(body), status_code=status_code, media_type="application/json"
+    )
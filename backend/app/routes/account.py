@@ -2,31 +2,52 @@
 Account-related API endpoints.
 """
 
-import json
+from dataclasses import asdict
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 
+from ..admission import QUERY, TX, TicketStreamingResponse, admission
 from ..auth import verify_token
-from ..config import POCKET_HOME
+from ..balances import get_balances
+from ..config import (
+    ACCOUNT_BATCH_MAX,
+    BALANCES_MAX_ADDRESSES,
+    FUND_BATCH_MAX,
+    POCKET_HOME,
+)
+from ..funding import fund_accumulator, fund_batch, send_batch
+from ..keygen import create_accounts
+from ..keyring import keyring_index
 from ..models import (
     AccountResponse,
+    BalancesRequest,
+    BalancesResponse,
     CommandResponse,
+    CreateAccountBatchRequest,
     CreateAccountRequest,
     FundAccountRequest,
+    FundBatchRequest,
+    FundBatchResponse,
+    KeyListResponse,
+    Network,
 )
-from ..pocket import import_hex_key, key_exists, run_pocket_command
+from ..pocket import import_hex_key_async, run_pocket_command_async
+from ..queries import get_account as query_account
+from ..result import OutputFormat, command_response, dumps
+from ..tx import parse_coins
 from ..utils import generate_random_key_name
+from .jobs import ACCEPTED_RESPONSES, enqueue_job
 
 router = APIRouter(prefix="/account", tags=["account"])
 
 
 @router.post("/import-hex", response_model=CommandResponse)
 async def import_account_hex(
-    name: str = Body(...), hex_key: str = Body(...), network: str = Body("alpha")
+    name: str = Body(...), hex_key: str = Body(...), network: Network = Body("alpha")
 ):
     """Import a private key from hex for an account."""
-    success = import_hex_key(name, hex_key, network)
+    success = await import_hex_key_async(name, hex_key, network)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to import hex key")
     return {
@@ -42,29 +63,29 @@ async def create_account_mock(request: CreateAccountRequest):
     """Create a new account (wallet) in the Pocket network without authentication."""
     key_name = request.key_name or generate_random_key_name()
     cmd = ["keys", "add", key_name, "--output", "json"]
-    result = run_pocket_command(cmd, request.network)
+    result = await run_pocket_command_async(cmd, request.network)
     if result["exit_code"] != 0:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create account: {result['stderr']}",
         )
-    try:
-        account_data = json.loads(result["stdout"])
-        return {
-            "address": account_data.get("address", ""),
-            "name": key_name,
-            "mnemonic": account_data.get("mnemonic", ""),
-            "message": "Account created successfully",
-        }
-    except json.JSONDecodeError:
+    account_data = result.data
+    if not isinstance(account_data, dict):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to parse account data: {result['stdout']}",
+            detail=f"Failed to parse account data: {result.text()}",
         )
+    keyring_index.add({**account_data, "name": key_name})
+    return {
+        "address": account_data.get("address", ""),
+        "name": key_name,
+        "mnemonic": account_data.get("mnemonic", ""),
+        "message": "Account created successfully",
+    }
 
 
 @router.get("/export-hex/{name}")
-async def export_account_hex(name: str, network: str = "alpha"):
+async def export_account_hex(name: str, network: Network = "alpha"):
     """
     Export the private key for a given account name as an unarmored hex string.
     WARNING: This is unsafe and for demo/dev only!
@@ -77,13 +98,13 @@ async def export_account_hex(name: str, network: str = "alpha"):
         "--unarmored-hex",
         f"--home={POCKET_HOME}",
     ]
-    result = run_pocket_command(cmd, network, requires_confirmation=True)
+    result = await run_pocket_command_async(cmd, network, requires_confirmation=True)
     if result["exit_code"] != 0:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to export private key: {result['stderr']}",
         )
-    hex_key = result["stdout"].strip().replace("\n", "")
+    hex_key = result.text("compact").strip().replace("\n", "")
     return JSONResponse(content={"hex": hex_key})
 
 
@@ -92,50 +113,166 @@ async def create_account(request: CreateAccountRequest, user=Depends(verify_toke
     """Create a new account (wallet) in the Pocket network."""
     key_name = request.key_name or generate_random_key_name()
     cmd = ["keys", "add", key_name, "--output", "json"]
-    result = run_pocket_command(cmd, request.network)
+    with admission.slot(user, request.network, TX):
+        result = await run_pocket_command_async(cmd, request.network)
     if result["exit_code"] != 0:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create account: {result['stderr']}",
         )
-    try:
-        account_data = json.loads(result["stdout"])
-        return {
-            "address": account_data.get("address", ""),
-            "name": key_name,
-            "mnemonic": account_data.get("mnemonic", ""),
-            "message": "Account created successfully",
-        }
-    except json.JSONDecodeError:
+    account_data = result.data
+    if not isinstance(account_data, dict):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to parse account data: {result['stdout']}",
+            detail=f"Failed to parse account data: {result.text()}",
         )
+    keyring_index.add({**account_data, "name": key_name})
+    return {
+        "address": account_data.get("address", ""),
+        "name": key_name,
+        "mnemonic": account_data.get("mnemonic", ""),
+        "message": "Account created successfully",
+    }
 
 
-@router.post("/fund", response_model=CommandResponse)
-async def fund_account(request: FundAccountRequest, user=Depends(verify_token)):
-    """Fund an account with tokens."""
-    cmd = [
-        "tx",
-        "bank",
-        "send",
-        request.from_account,
-        request.address,
-        request.amount,
-        "--yes",
-    ]
-    result = run_pocket_command(cmd, request.network)
+@router.post("/create-batch")
+async def create_account_batch(
+    request: CreateAccountBatchRequest, user=Depends(verify_token)
+):
+    """
+    Create many accounts, deriving keys in-process instead of running
+    `keys add` per account. Streams one NDJSON line per account as it is
+    stored: the `keys add --output json` object, or {"name", "error"}.
+    """
+    names = request.key_names or []
+    if not names:
+        taken = set()
+        while len(names) < min(request.count, ACCOUNT_BATCH_MAX):
+            name = generate_random_key_name(request.prefix)
+            if name not in taken and not keyring_index.exists(name):
+                taken.add(name)
+                names.append(name)
+    if not 0 < len(names) <= ACCOUNT_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Create between 1 and {ACCOUNT_BATCH_MAX} accounts per request",
+        )
+    if len(set(names)) != len(names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate key names in request",
+        )
+    existing = [n for n in names if keyring_index.exists(n)]
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Keys already exist: {', '.join(existing[:10])}",
+        )
+
+    ticket = admission.acquire(user, request.network, TX)
+
+    async def lines():
+        async for account in create_accounts(names, request.network):
+            yield dumps(account) + b"\n"
+
+    return TicketStreamingResponse(
+        ticket, lines(), media_type="application/x-ndjson"
+    )
+
+
+async def _fund(request: FundAccountRequest):
+    if fund_accumulator.enabled:
+        return await fund_accumulator.fund(
+            request.from_account, request.address, request.amount, request.network
+        )
+    [result] = await send_batch(
+        request.from_account, [(request.address, request.amount)], request.network
+    )
+    return result
+
+
+@router.post("/fund", response_model=CommandResponse, responses=ACCEPTED_RESPONSES)
+async def fund_account(
+    request: FundAccountRequest,
+    output: OutputFormat = "pretty",
+    run_async: bool = Query(False, alias="async"),
+    user=Depends(verify_token),
+):
+    """Fund an account with tokens (queued as a job with ?async=true)."""
+    try:
+        parse_coins(request.amount)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if run_async:
+        return enqueue_job(
+            "fund",
+            request.network,
+            request.from_account,
+            lambda: _fund(request),
+            admission.acquire(user, request.network, TX),
+        )
+    with admission.slot(user, request.network, TX):
+        result = await _fund(request)
     if result["exit_code"] != 0:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fund account: {result['stderr']}",
         )
-    return result
+    return command_response(result, output)
+
+
+@router.post("/fund-batch", response_model=FundBatchResponse)
+async def fund_account_batch(request: FundBatchRequest, user=Depends(verify_token)):
+    """Fund many accounts, packing the transfers into as few txs as possible."""
+    if not 0 < len(request.recipients) <= FUND_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Fund between 1 and {FUND_BATCH_MAX} recipients per request",
+        )
+    recipients = [(r.address, r.amount) for r in request.recipients]
+    with admission.slot(user, request.network, TX):
+        results = await fund_batch(request.from_account, recipients, request.network)
+    return {"results": results}
+
+
+@router.post("/balances", response_model=BalancesResponse)
+async def account_balances(request: BalancesRequest, user=Depends(verify_token)):
+    """Accounts and bank balances of many addresses via batched JSON-RPC."""
+    if not 0 < len(request.addresses) <= BALANCES_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Query between 1 and {BALANCES_MAX_ADDRESSES} addresses",
+        )
+    with admission.slot(user, request.network, QUERY):
+        results = await get_balances(request.addresses, request.network)
+    return {"results": results}
+
+
+@router.get("/list", response_model=KeyListResponse)
+async def list_accounts(
+    network: Network = "alpha",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    user=Depends(verify_token),
+):
+    """List keyring accounts, sorted by name, from the in-memory index."""
+    total, keys = await keyring_index.page(offset, limit, network)
+    return {
+        "keys": [asdict(key) for key in keys],
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+    }
 
 
 @router.get("/{address}", response_model=CommandResponse)
-async def get_account(address: str, network: str = "alpha", user=Depends(verify_token)):
+async def get_account(
+    address: str,
+    network: Network = "alpha",
+    output: OutputFormat = "pretty",
+    user=Depends(verify_token),
+):
     """Get account information."""
-    cmd = ["query", "account", address]
-    return run_pocket_command(cmd, network)
+    with admission.slot(user, network, QUERY):
+        result = await query_account(address, network)
+    return command_response(result, output)
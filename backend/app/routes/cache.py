@@ -0,0 +1,16 @@
+"""
+Query cache inspection endpoints.
+"""
+
+from fastapi import APIRouter, Depends
+
+from ..auth import verify_token
+from ..cache import query_cache
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+@router.get("/stats")
+async def cache_stats(user=Depends(verify_token)):
+    """Hit/miss counters and size of the query cache."""
+    return query_cache.snapshot()
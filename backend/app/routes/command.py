@@ -4,22 +4,76 @@ Command execution API endpoints.
 
 import json
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
+from ..admission import QUERY, TX, admission
 from ..auth import verify_token
+from ..cache import addresses_in_command, invalidate_addresses
+from ..immutable import immutable_cache, is_immutable_query
 from ..models import CommandRequest, CommandResponse
-from ..pocket import run_pocket_command
+from ..pocket import run_pocket_command_async
+from ..result import OutputFormat, command_response
+from ..tracker import tx_tracker
+from ..utils import is_tx_command
+from .jobs import ACCEPTED_RESPONSES, enqueue_job
 
 router = APIRouter(tags=["command"])
 
 
-@router.post("/run", response_model=CommandResponse)
-async def run_command(request: CommandRequest, user=Depends(verify_token)):
-    """Execute a raw pocket command."""
-    result = run_pocket_command(request.command, request.network)
+def _signer(command):
+    """
+    The --from value of a raw tx command ("" if it has none).
+    """
+    for i, arg in enumerate(command):
+        if arg.startswith("--from="):
+            return arg.split("=", 1)[1]
+        if arg == "--from" and i + 1 < len(command):
+            return command[i + 1]
+    return ""
+
+
+async def _run(request: CommandRequest):
+    if is_immutable_query(request.command):
+        return await immutable_cache.get_or_fetch(
+            immutable_cache.key(request.network, request.command),
+            request.network,
+            lambda: run_pocket_command_async(request.command, request.network),
+        )
+    result = await run_pocket_command_async(request.command, request.network)
+    if is_tx_command(request.command):
+        invalidate_addresses(request.network, addresses_in_command(request.command))
+        if result.exit_code == 0:
+            tx_tracker.track(result.txhash, request.network)
     return result
 
 
+@router.post("/run", response_model=CommandResponse, responses=ACCEPTED_RESPONSES)
+async def run_command(
+    request: CommandRequest,
+    output: OutputFormat = "pretty",
+    run_async: bool = Query(False, alias="async"),
+    user=Depends(verify_token),
+):
+    """Execute a raw pocket command (tx commands can be queued with ?async=true)."""
+    is_tx = is_tx_command(request.command)
+    if run_async and not is_tx:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only tx commands can run as async jobs",
+        )
+    if run_async:
+        return enqueue_job(
+            "run",
+            request.network,
+            _signer(request.command),
+            lambda: _run(request),
+            admission.acquire(user, request.network, TX),
+        )
+    with admission.slot(user, request.network, TX if is_tx else QUERY):
+        result = await _run(request)
+    return command_response(result, output)
+
+
 @router.post("/run-mock", response_model=CommandResponse)
 async def run_mock_command(request: CommandRequest):
     """Mock endpoint for testing without authentication."""
@@ -0,0 +1,18 @@
+"""
+Faucet key pool endpoints.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+
+from ..auth import verify_token
+from ..faucet import faucet_pool
+
+router = APIRouter(prefix="/faucet", tags=["faucet"])
+
+
+@router.get("/keys")
+async def faucet_keys(network: Optional[str] = None, user=Depends(verify_token)):
+    """Balance, in-flight txs and rotation status of each faucet key."""
+    return faucet_pool.stats(network)
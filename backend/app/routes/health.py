@@ -0,0 +1,33 @@
+"""
+Liveness and readiness probes, and upstream endpoint health.
+"""
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from ..nodes import api_nodes, rpc_nodes
+from ..startup import readiness
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: 503 until the startup warmup has finished."""
+    if readiness.ready:
+        return JSONResponse(readiness.to_dict())
+    return JSONResponse(
+        readiness.to_dict(), status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+@router.get("/nodes")
+async def nodes():
+    """Per-endpoint health, latency and error counts of the node pools."""
+    return {"rpc": rpc_nodes.stats(), "rest": api_nodes.stats()}
@@ -0,0 +1,57 @@
+"""
+Async tx job API endpoints.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse, Response
+
+from ..admission import Ticket
+from ..auth import verify_token
+from ..jobs import QueueFull, job_queue
+from ..models import JobResponse
+from ..result import OutputFormat, dumps
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# For the routes that accept ?async=true
+ACCEPTED_RESPONSES = {
+    202: {"model": JobResponse, "description": "Tx queued as a job"},
+    429: {"description": "Signer's job queue is full; see Retry-After"},
+}
+
+
+def enqueue_job(
+    kind: str, network: str, signer: str, run, ticket: Ticket
+) -> JSONResponse:
+    """
+    Queue a tx job and answer 202 with its status, or raise 429 when the
+    signer's queue is full. The job holds the admission `ticket` until it
+    finishes.
+    """
+    try:
+        job = job_queue.submit(kind, network, signer, run, ticket)
+    except QueueFull as e:
+        ticket.release()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return JSONResponse(
+        job.to_dict(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str, output: OutputFormat = "pretty", user=Depends(verify_token)
+):
+    """Status of an async tx job, with its result once finished."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found"
+        )
+    return Response(dumps(job.to_dict(output)), media_type="application/json")
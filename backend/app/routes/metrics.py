@@ -0,0 +1,320 @@
+"""
+Prometheus metrics endpoint.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..admission import admission
+from ..cache import query_cache
+from ..events import block_events
+from ..faucet import faucet_pool
+from ..funding import fund_accumulator
+from ..gas import gas_estimator
+from ..hedge import query_hedging
+from ..immutable import immutable_cache
+from ..jobs import job_queue
+from ..metrics import register_collector, render
+from ..nodes import api_nodes, rpc_nodes
+from ..sequence import sequence_manager
+from ..tracker import tx_tracker
+
+router = APIRouter(tags=["metrics"])
+
+
+def _collect_cache():
+    stats = query_cache.snapshot()
+    counters = (
+        "hits",
+        "stale_hits",
+        "misses",
+        "coalesced",
+        "evictions",
+        "invalidations",
+    )
+    return [
+        (
+            "pocket_query_cache_events_total",
+            "counter",
+            "Query cache lookups and maintenance events",
+            {(("event", name),): stats[name] for name in counters},
+        ),
+        (
+            "pocket_query_cache_entries",
+            "gauge",
+            "Entries currently in the query cache",
+            {(): stats["entries"]},
+        ),
+        (
+            "pocket_query_cache_inflight",
+            "gauge",
+            "Upstream fetches in flight for the query cache",
+            {(): stats["inflight"]},
+        ),
+    ]
+
+
+def _collect_queues():
+    accumulator = fund_accumulator.stats()
+    signers = sequence_manager.snapshot()
+    return [
+        (
+            "pocket_fund_batch_pending",
+            "gauge",
+            "Fund requests waiting in the batch accumulator",
+            {(): accumulator["pending"]},
+        ),
+        (
+            "pocket_signer_txs_in_flight",
+            "gauge",
+            "Txs holding a sequence lease, per signer",
+            {(("signer", signer),): s["in_flight"] for signer, s in signers.items()},
+        ),
+    ]
+
+
+def _collect_faucet():
+    in_flight, balance, in_rotation = {}, {}, {}
+    for network, keys in faucet_pool.stats().items():
+        for key in keys:
+            labels = (("network", network), ("key", key["name"]))
+            in_flight[labels] = key["in_flight"]
+            in_rotation[labels] = int(key["in_rotation"])
+            if key["balance"] is not None:
+                balance[labels] = key["balance"]
+    return [
+        ("pocket_faucet_txs_in_flight", "gauge", "Txs in flight per key", in_flight),
+        ("pocket_faucet_balance", "gauge", "Last known key balance", balance),
+        ("pocket_faucet_in_rotation", "gauge", "1 if key is in rotation", in_rotation),
+    ]
+
+
+def _collect_tracker():
+    stats = tx_tracker.stats()
+    statuses = ("pending", "committed", "failed", "expired")
+    return [
+        (
+            "pocket_tracked_txs",
+            "gauge",
+            "Txs in the confirmation tracker, by status",
+            {(("status", name),): stats[name] for name in statuses},
+        ),
+        (
+            "pocket_tx_tracker_checks_total",
+            "counter",
+            "Batched tx status lookups sent upstream",
+            {(): stats["checks"]},
+        ),
+    ]
+
+
+def _collect_admission():
+    stats = admission.stats()
+
+    def labelled(counts, *names):
+        return {tuple(zip(names, key)): value for key, value in counts.items()}
+
+    return [
+        (
+            "pocket_admission_admitted_total",
+            "counter",
+            "Requests admitted by the per-user limiter",
+            labelled(stats["admitted"], "network", "kind"),
+        ),
+        (
+            "pocket_admission_rejected_total",
+            "counter",
+            "Requests rejected with 429 by the per-user limiter",
+            labelled(stats["rejected"], "network", "kind", "reason"),
+        ),
+        (
+            "pocket_admission_in_flight",
+            "gauge",
+            "Admitted requests still running",
+            labelled(stats["in_flight"], "network", "kind"),
+        ),
+        (
+            "pocket_admission_callers",
+            "gauge",
+            "Users with limiter state",
+            labelled(stats["callers"], "network", "kind"),
+        ),
+    ]
+
+
+def _collect_jobs():
+    stats = job_queue.stats()
+    statuses = ("queued", "running", "done", "failed")
+    return [
+        (
+            "pocket_jobs",
+            "gauge",
+            "Async tx jobs in memory, by status",
+            {(("status", name),): stats[name] for name in statuses},
+        ),
+        (
+            "pocket_jobs_rejected_total",
+            "counter",
+            "Async tx jobs rejected with 429 because the queue was full",
+            {(): stats["rejected"]},
+        ),
+    ]
+
+
+def _collect_events():
+    connected, events, reconnects, height = {}, {}, {}, {}
+    for network, stats in block_events.stats().items():
+        labels = (("network", network),)
+        connected[labels] = int(stats["connected"])
+        events[labels] = stats["events"]
+        reconnects[labels] = stats["reconnects"]
+        if stats["height"] is not None:
+            height[labels] = stats["height"]
+    return [
+        (
+            "pocket_block_events_connected",
+            "gauge",
+            "1 if the block event subscription is connected",
+            connected,
+        ),
+        (
+            "pocket_block_events_total",
+            "counter",
+            "Block and tx events received",
+            events,
+        ),
+        (
+            "pocket_block_events_reconnects_total",
+            "counter",
+            "Block event subscription reconnect attempts",
+            reconnects,
+        ),
+        ("pocket_block_height", "gauge", "Last block height seen in events", height),
+    ]
+
+
+def _collect_immutable():
+    stats = immutable_cache.stats()
+    counters = ("hits", "misses", "writes", "evictions")
+    return [
+        (
+            "pocket_immutable_cache_events_total",
+            "counter",
+            "Persistent immutable cache lookups, writes and evictions",
+            {(("event", name),): stats[name] for name in counters},
+        ),
+        (
+            "pocket_immutable_cache_entries",
+            "gauge",
+            "Entries in the persistent immutable cache",
+            {(): stats["entries"]},
+        ),
+        (
+            "pocket_immutable_cache_bytes",
+            "gauge",
+            "Bytes of results stored in the persistent immutable cache",
+            {(): stats["bytes"]},
+        ),
+    ]
+
+
+def _collect_nodes():
+    healthy, latency, requests, errors, ejections = {}, {}, {}, {}, {}
+    for pool in (rpc_nodes, api_nodes):
+        for network, endpoints in pool.stats().items():
+            for endpoint in endpoints:
+                labels = (
+                    ("client", pool.kind),
+                    ("network", network),
+                    ("endpoint", endpoint["endpoint"]),
+                )
+                healthy[labels] = int(endpoint["healthy"])
+                requests[labels] = endpoint["requests"]
+                errors[labels] = endpoint["errors"]
+                ejections[labels] = endpoint["ejections"]
+                if endpoint["latency"] is not None:
+                    latency[labels] = endpoint["latency"]
+    return [
+        ("pocket_node_healthy", "gauge", "1 if the endpoint is in rotation", healthy),
+        (
+            "pocket_node_latency_seconds",
+            "gauge",
+            "Moving average of endpoint response time",
+            latency,
+        ),
+        ("pocket_node_requests_total", "counter", "Requests sent", requests),
+        ("pocket_node_errors_total", "counter", "Failed requests", errors),
+        (
+            "pocket_node_ejections_total",
+            "counter",
+            "Times the endpoint was taken out of rotation",
+            ejections,
+        ),
+    ]
+
+
+def _collect_hedging():
+    stats = query_hedging.stats()
+    counts = {
+        (("network", network), ("query", query), ("outcome", outcome)): value
+        for (network, query, outcome), value in stats["counts"].items()
+    }
+    delays = {
+        (("network", network), ("query", query)): value
+        for (network, query), value in stats["delays"].items()
+    }
+    return [
+        (
+            "pocket_hedged_queries_total",
+            "counter",
+            "Hedgeable queries, hedges sent, hedges that answered first, and "
+            "hedges skipped by the rate cap",
+            counts,
+        ),
+        (
+            "pocket_hedge_delay_seconds",
+            "gauge",
+            "Current hedge delay (observed latency percentile) per query type",
+            delays,
+        ),
+    ]
+
+
+def _collect_gas():
+    stats = gas_estimator.stats()
+    return [
+        (
+            "pocket_gas_estimates_total",
+            "counter",
+            "Txs signed with a learned gas limit, simulated, or out of gas",
+            {
+                (("network", network), ("outcome", outcome)): value
+                for (network, outcome), value in stats["counts"].items()
+            },
+        ),
+        (
+            "pocket_gas_estimate_shapes",
+            "gauge",
+            "Tx shapes with learned gas samples",
+            {(): stats["shapes"]},
+        ),
+    ]
+
+
+register_collector(_collect_cache)
+register_collector(_collect_queues)
+register_collector(_collect_faucet)
+register_collector(_collect_tracker)
+register_collector(_collect_admission)
+register_collector(_collect_jobs)
+register_collector(_collect_events)
+register_collector(_collect_immutable)
+register_collector(_collect_nodes)
+register_collector(_collect_hedging)
+register_collector(_collect_gas)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of API and pocketd metrics."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,67 @@
+"""
+Bulk query API endpoints.
+"""
+
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..admission import QUERY, TicketStreamingResponse, admission
+from ..auth import verify_token
+from ..config import QUERY_STREAM_CONCURRENCY, QUERY_STREAM_MAX_TARGETS
+from ..models import QueryStreamRequest
+from ..queries import QUERY_TYPES
+from ..result import CommandResult, dumps
+from ..utils import run_bounded
+
+router = APIRouter(prefix="/query", tags=["query"])
+
+
+def _result_line(target, index, result) -> bytes:
+    data = None
+    if result.exit_code == 0:
+        data = result.data if result.data is not None else result.text()
+    line = {
+        "index": index,
+        "type": target.type,
+        "id": target.id,
+        "exit_code": result.exit_code,
+        "data": data,
+        "error": result.stderr or None,
+    }
+    return dumps(line) + b"\n"
+
+
+@router.post("/stream")
+async def query_stream(request: QueryStreamRequest, user=Depends(verify_token)):
+    """
+    Run many account/service queries with bounded parallelism and stream
+    each result as an NDJSON line as soon as it completes (not in request
+    order; every line carries the target's index).
+    """
+    if len(request.targets) > QUERY_STREAM_MAX_TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {QUERY_STREAM_MAX_TARGETS} targets per request",
+        )
+    limit = QUERY_STREAM_CONCURRENCY
+    if request.concurrency:
+        limit = max(1, min(request.concurrency, limit))
+    targets = request.targets
+    calls = (partial(_safe_fetch, t, request.network) for t in targets)
+    ticket = admission.acquire(user, request.network, QUERY)
+
+    async def lines():
+        async for index, result in run_bounded(calls, limit):
+            yield _result_line(targets[index], index, result)
+
+    return TicketStreamingResponse(
+        ticket, lines(), media_type="application/x-ndjson"
+    )
+
+
+async def _safe_fetch(target, network):
+    try:
+        return await QUERY_TYPES[target.type](target.id, network)
+    except Exception as e:
+        return CommandResult.failure(str(e))
@@ -2,42 +2,105 @@
 Service-related API endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from contextlib import ExitStack
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..admission import QUERY, TX, admission
 from ..auth import verify_token
-from ..models import CommandResponse, ServiceRequest
-from ..pocket import run_pocket_command
+from ..cache import invalidate_addresses, query_cache
+from ..config import SERVICE_BATCH_MAX
+from ..models import (
+    CommandResponse,
+    Network,
+    ServiceBatchRequest,
+    ServiceBatchResponse,
+    ServiceRequest,
+)
+from ..queries import get_service as query_service
+from ..result import CommandResult, OutputFormat, command_response
+from ..services import create_services
+from ..tx import msg_add_service, resolve_address, submit_tx
+from .jobs import ACCEPTED_RESPONSES, enqueue_job
 
 router = APIRouter(prefix="/service", tags=["service"])
 
 
-@router.post("/create", response_model=CommandResponse)
-async def create_service(request: ServiceRequest, user=Depends(verify_token)):
-    """Create a new service on the Pocket network."""
-    cmd = [
-        "tx",
-        "service",
-        "add-service",
-        request.service_id,
-        request.service_name,
-        str(request.compute_units),
-        "--from",
-        request.from_account,
-        "--yes",
-    ]
-    result = run_pocket_command(cmd, request.network)
+async def _create_service(request: ServiceRequest) -> CommandResult:
+    owner_address, error = await resolve_address(request.from_account, request.network)
+    if error is not None:
+        return CommandResult.failure(error)
+    msg = msg_add_service(
+        owner_address, request.service_id, request.service_name, request.compute_units
+    )
+    result = await submit_tx(request.from_account, [msg], request.network)
+    query_cache.invalidate_tag((request.network, f"service:{request.service_id}"))
+    invalidate_addresses(request.network, [owner_address])
+    return result
+
+
+@router.post("/create", response_model=CommandResponse, responses=ACCEPTED_RESPONSES)
+async def create_service(
+    request: ServiceRequest,
+    output: OutputFormat = "pretty",
+    run_async: bool = Query(False, alias="async"),
+    user=Depends(verify_token),
+):
+    """Create a new service on the Pocket network (queued with ?async=true)."""
+    if run_async:
+        return enqueue_job(
+            "service_create",
+            request.network,
+            request.from_account,
+            lambda: _create_service(request),
+            admission.acquire(user, request.network, TX),
+        )
+    with admission.slot(user, request.network, TX):
+        result = await _create_service(request)
     if result["exit_code"] != 0:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create service: {result['stderr']}",
         )
-    return result
+    return command_response(result, output)
+
+
+@router.post("/create-batch", response_model=ServiceBatchResponse)
+async def create_service_batch(
+    request: ServiceBatchRequest, user=Depends(verify_token)
+):
+    """Create many services, packing them into as few txs as possible."""
+    if not 0 < len(request.services) <= SERVICE_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Create between 1 and {SERVICE_BATCH_MAX} services per request",
+        )
+    seen = set()
+    for service in request.services:
+        key = (service.network, service.service_id)
+        if key in seen:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Duplicate service_id {service.service_id!r}",
+            )
+        seen.add(key)
+    with ExitStack() as stack:
+        for network in sorted({s.network for s in request.services}):
+            stack.enter_context(admission.slot(user, network, TX))
+        results = await create_services(request.services)
+    return {"results": results}
 
 
 @router.get("/{service_id}", response_model=CommandResponse)
 async def get_service(
-    service_id: str, network: str = "alpha", user=Depends(verify_token)
+    service_id: str,
+    network: Network = "alpha",
+    height: Optional[int] = Query(None, gt=0),
+    output: OutputFormat = "pretty",
+    user=Depends(verify_token),
 ):
-    """Get service information."""
-    cmd = ["query", "service", "show-service", service_id]
-    return run_pocket_command(cmd, network)
+    """Get service information (as of `height` if given)."""
+    with admission.slot(user, network, QUERY):
+        result = await query_service(service_id, network, height)
+    return command_response(result, output)
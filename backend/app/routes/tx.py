@@ -0,0 +1,50 @@
+"""
+Transaction status API endpoints.
+"""
+
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..admission import QUERY, admission
+from ..auth import verify_token
+from ..config import TX_WAIT_MAX_TIMEOUT
+from ..models import Network, TxStatusResponse
+from ..tracker import tx_tracker
+
+router = APIRouter(prefix="/tx", tags=["tx"])
+
+_TXHASH_RE = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+@router.get("/{txhash}", response_model=TxStatusResponse)
+async def get_tx(
+    txhash: str,
+    network: Network = "alpha",
+    wait: bool = False,
+    timeout: float = Query(30, gt=0),
+    user=Depends(verify_token),
+):
+    """
+    Confirmation status of a tx, served from the in-memory tracker. With
+    wait=true, block until it is committed (or `timeout` seconds pass).
+    """
+    if not _TXHASH_RE.match(txhash):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid txhash"
+        )
+    try:
+        with admission.slot(user, network, QUERY):
+            tx = await tx_tracker.lookup(txhash, network)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to query tx: {e}",
+        )
+    if tx is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Tx {txhash} not found"
+        )
+    if wait:
+        await tx_tracker.wait(tx, min(timeout, TX_WAIT_MAX_TIMEOUT))
+    return tx.to_dict()
@@ -0,0 +1,394 @@
+"""
+Per-signer account sequence allocation.
+
+Each (network, address) gets its own state and lock. Sequences are handed
+out atomically so many txs from one signer can be signed concurrently and
+broadcast back-to-back without waiting for inclusion. Broadcasts are let
+through in sequence order; when one fails or hits an "account sequence
+mismatch", the signer is resynced and only the txs holding now-invalid
+sequences are retried.
+
+With SHARED_STATE_BACKEND=sqlite, SharedSequenceManager keeps the counters
+in the shared SQLite file so every uvicorn worker allocates from the same
+sequence per signer.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from .config import SHARED_STATE_POLL_INTERVAL, SHARED_STATE_TURN_TIMEOUT
+from .pocket import AccountState, query_account_state
+from .shared_state import get_shared_store
+
+logger = logging.getLogger(__name__)
+
+_EXPECTED_SEQUENCE_RE = re.compile(r"account sequence mismatch, expected (\d+)")
+
+
+def is_sequence_mismatch(log: str) -> bool:
+    return "account sequence mismatch" in (log or "")
+
+
+def expected_sequence(log: str):
+    """
+    Pull the sequence the node expected out of a mismatch error, if present.
+    """
+    match = _EXPECTED_SEQUENCE_RE.search(log or "")
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class Lease:
+    """
+    A sequence handed out to one tx. Invalid once `generation` is stale.
+    """
+
+    network: str
+    address: str
+    account_number: int
+    sequence: int
+    generation: int
+
+
+class _SignerState:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.turn = asyncio.Condition(self.lock)
+        self.account: AccountState = None
+        # Next sequence to hand out, and next one allowed to broadcast
+        self.next_sequence = 0
+        self.broadcast_sequence = 0
+        self.generation = 0
+        self.in_flight = 0
+
+
+class SequenceManager:
+    def __init__(self):
+        self._signers: dict[tuple, _SignerState] = {}
+
+    def _state(self, network, address) -> _SignerState:
+        key = (network, address)
+        state = self._signers.get(key)
+        if state is None:
+            state = self._signers[key] = _SignerState()
+        return state
+
+    async def acquire(self, address, network="alpha") -> Lease:
+        """
+        Reserve the next sequence for a signer, syncing from chain if needed.
+        """
+        state = self._state(network, address)
+        async with state.lock:
+            if state.account is None:
+                state.account = await query_account_state(address, network)
+                state.next_sequence = state.account.sequence
+                state.broadcast_sequence = state.account.sequence
+                state.generation += 1
+                state.turn.notify_all()
+            lease = Lease(
+                network,
+                address,
+                state.account.account_number,
+                state.next_sequence,
+                state.generation,
+            )
+            state.next_sequence += 1
+            state.in_flight += 1
+            return lease
+
+    @asynccontextmanager
+    async def turn(self, lease: Lease):
+        """
+        Wait until every lower sequence from this signer has been broadcast.
+        Yields False if the lease went stale while waiting (retry with a new
+        one); the broadcast must happen inside the block.
+        """
+        state = self._state(lease.network, lease.address)
+        async with state.turn:
+            await state.turn.wait_for(
+                lambda: state.generation != lease.generation
+                or state.broadcast_sequence == lease.sequence
+            )
+            yield state.generation == lease.generation
+
+    def _finish(self, state):
+        state.in_flight = max(0, state.in_flight - 1)
+        state.turn.notify_all()
+
+    async def commit(self, lease: Lease):
+        """
+        The tx was accepted; let the next sequence broadcast.
+        Call while holding the turn.
+        """
+        state = self._state(lease.network, lease.address)
+        if state.generation == lease.generation:
+            state.broadcast_sequence = lease.sequence + 1
+            if state.account is not None:
+                state.account.sequence = lease.sequence + 1
+        self._finish(state)
+
+    async def discard(self, lease: Lease):
+        """
+        Drop a lease that went stale before it was broadcast.
+        Call while holding the turn.
+        """
+        self._finish(self._state(lease.network, lease.address))
+
+    async def resync(self, lease: Lease, expected=None):
+        """
+        The node rejected the lease's sequence. Restart allocation at the
+        sequence the node expects (or re-query the chain if unknown) and
+        invalidate every outstanding lease. Call while holding the turn.
+        """
+        state = self._state(lease.network, lease.address)
+        if state.generation == lease.generation:
+            state.generation += 1
+            if expected is None or state.account is None:
+                logger.warning(f"Resyncing {lease.address} from chain")
+                state.account = None
+            else:
+                logger.warning(f"Resyncing {lease.address} at sequence {expected}")
+                state.account.sequence = expected
+                state.next_sequence = expected
+                state.broadcast_sequence = expected
+        self._finish(state)
+
+    async def release(self, lease: Lease, holding_turn=False):
+        """
+        The tx was never accepted, so its sequence is unused. Rewind to it and
+        invalidate later leases so they re-sign with contiguous sequences.
+        Pass holding_turn=True when called inside `turn()`.
+        """
+        state = self._state(lease.network, lease.address)
+        if holding_turn:
+            self._rewind(state, lease)
+        else:
+            async with state.lock:
+                self._rewind(state, lease)
+
+    def _rewind(self, state, lease):
+        if state.generation == lease.generation:
+            state.generation += 1
+            state.next_sequence = lease.sequence
+            state.broadcast_sequence = lease.sequence
+        self._finish(state)
+
+    def invalidate(self, address=None, network=None):
+        """
+        Forget cached state for one signer (or all), forcing a chain resync
+        on the next acquire. The resync starts from the committed sequence,
+        so sequences of txs still in the mempool are handed out again; only
+        use this for signers with nothing in flight.
+        """
+        for (net, addr), state in self._signers.items():
+            if (address is None or addr == address) and (
+                network is None or net == network
+            ):
+                state.account = None
+
+    def observe(self, address, network, sequence):
+        """
+        A committed tx from `address` used `sequence`. If this manager never
+        handed that sequence out, the key was used elsewhere; resync it.
+        """
+        state = self._signers.get((network, address))
+        if state is not None and state.account is not None:
+            if sequence >= state.next_sequence:
+                logger.info(
+                    f"External tx from {address} at sequence {sequence}; resyncing"
+                )
+                state.account = None
+
+    def snapshot(self):
+        return {
+            f"{network}/{address}": {
+                "account_number": (
+                    state.account.account_number if state.account else None
+                ),
+                "next_sequence": state.next_sequence,
+                "broadcast_sequence": state.broadcast_sequence,
+                "in_flight": state.in_flight,
+            }
+            for (network, address), state in self._signers.items()
+        }
+
+
+class SharedSequenceManager(SequenceManager):
+    """
+    Counters (account number, next and broadcast sequence, generation) live
+    in the shared store and change only inside IMMEDIATE transactions, so
+    allocation is an atomic compare-and-increment across processes. The
+    per-process state still serializes chain queries and broadcasts within
+    this worker; turns owned by other workers are noticed by polling.
+    """
+
+    def __init__(self, store, poll_interval=SHARED_STATE_POLL_INTERVAL):
+        super().__init__()
+        self.store = store
+        self.poll_interval = poll_interval
+
+    def _allocate(self, network, address, account=None):
+        """
+        Hand out the next sequence, (re)initializing the counters from
+        `account` if the signer is not synced. None if it needs a chain query.
+        """
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT account_number, next_sequence, generation, synced "
+                "FROM signers WHERE network = ? AND address = ?",
+                (network, address),
+            ).fetchone()
+            if row is None or not row[3]:
+                if account is None:
+                    return None
+                generation = (row[2] if row else 0) + 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO signers (network, address, "
+                    "account_number, next_sequence, broadcast_sequence, "
+                    "generation, synced) VALUES (?, ?, ?, ?, ?, ?, 1)",
+                    (
+                        network,
+                        address,
+                        account.account_number,
+                        account.sequence,
+                        account.sequence,
+                        generation,
+                    ),
+                )
+                row = (account.account_number, account.sequence, generation, 1)
+            account_number, sequence, generation, _ = row
+            conn.execute(
+                "UPDATE signers SET next_sequence = ? "
+                "WHERE network = ? AND address = ?",
+                (sequence + 1, network, address),
+            )
+        return Lease(network, address, account_number, sequence, generation)
+
+    async def acquire(self, address, network="alpha") -> Lease:
+        state = self._state(network, address)
+        async with state.lock:
+            lease = self._allocate(network, address)
+            if lease is None:
+                account = await query_account_state(address, network)
+                lease = self._allocate(network, address, account)
+            state.in_flight += 1
+            return lease
+
+    def _position(self, lease):
+        rows = self.store.query(
+            "SELECT generation, broadcast_sequence FROM signers "
+            "WHERE network = ? AND address = ?",
+            (lease.network, lease.address),
+        )
+        return rows[0] if rows else (None, None)
+
+    def _update(self, lease, assignments, params=()):
+        """
+        Apply `assignments` to the signer's row if the lease is current.
+        """
+        with self.store.transaction() as conn:
+            conn.execute(
+                f"UPDATE signers SET {assignments} "
+                "WHERE network = ? AND address = ? AND generation = ?",
+                (*params, lease.network, lease.address, lease.generation),
+            )
+
+    @asynccontextmanager
+    async def turn(self, lease: Lease):
+        state = self._state(lease.network, lease.address)
+        deadline = time.monotonic() + SHARED_STATE_TURN_TIMEOUT
+        async with state.turn:
+            while True:
+                generation, broadcast = self._position(lease)
+                if generation != lease.generation or broadcast == lease.sequence:
+                    break
+                if time.monotonic() > deadline:
+                    logger.warning(
+                        f"Sequence {lease.sequence} of {lease.address} not "
+                        f"reached after {SHARED_STATE_TURN_TIMEOUT}s; resyncing"
+                    )
+                    self._update(lease, "generation = generation + 1, synced = 0")
+                    generation = None
+                    break
+                try:
+                    await asyncio.wait_for(state.turn.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            yield generation == lease.generation
+
+    async def commit(self, lease: Lease):
+        self._update(lease, "broadcast_sequence = ?", (lease.sequence + 1,))
+        self._finish(self._state(lease.network, lease.address))
+
+    async def resync(self, lease: Lease, expected=None):
+        if expected is None:
+            logger.warning(f"Resyncing {lease.address} from chain")
+            self._update(lease, "generation = generation + 1, synced = 0")
+        else:
+            logger.warning(f"Resyncing {lease.address} at sequence {expected}")
+            self._update(
+                lease,
+                "generation = generation + 1, next_sequence = ?, "
+                "broadcast_sequence = ?",
+                (expected, expected),
+            )
+        self._finish(self._state(lease.network, lease.address))
+
+    def _rewind(self, state, lease):
+        self._update(
+            lease,
+            "generation = generation + 1, next_sequence = ?, broadcast_sequence = ?",
+            (lease.sequence, lease.sequence),
+        )
+        self._finish(state)
+
+    def invalidate(self, address=None, network=None):
+        clauses, params = ["1"], []
+        if address is not None:
+            clauses.append("address = ?")
+            params.append(address)
+        if network is not None:
+            clauses.append("network = ?")
+            params.append(network)
+        with self.store.transaction() as conn:
+            conn.execute(
+                f"UPDATE signers SET synced = 0 WHERE {' AND '.join(clauses)}", params
+            )
+
+    def observe(self, address, network, sequence):
+        with self.store.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE signers SET synced = 0 WHERE network = ? AND address = ? "
+                "AND synced = 1 AND next_sequence <= ?",
+                (network, address, sequence),
+            )
+        if cursor.rowcount:
+            logger.info(f"External tx from {address} at sequence {sequence}; resyncing")
+
+    def snapshot(self):
+        rows = self.store.query(
+            "SELECT network, address, account_number, next_sequence, "
+            "broadcast_sequence, synced FROM signers"
+        )
+        snapshot = {}
+        for network, address, account_number, next_seq, broadcast, synced in rows:
+            state = self._signers.get((network, address))
+            snapshot[f"{network}/{address}"] = {
+                "account_number": account_number if synced else None,
+                "next_sequence": next_seq,
+                "broadcast_sequence": broadcast,
+                "in_flight": state.in_flight if state else 0,
+            }
+        return snapshot
+
+
+def _default_manager():
+    store = get_shared_store()
+    return SharedSequenceManager(store) if store is not None else SequenceManager()
+
+
+sequence_manager = _default_manager()
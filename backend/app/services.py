@@ -0,0 +1,182 @@
+"""
+Bulk service registration.
+
+Services are grouped by (network, from_account) and their MsgAddService
+messages packed into as few txs as POCKET_TX_MAX_GAS allows, budgeting each
+message the gas learned for txs like them (POCKET_TX_GAS_LIMIT until there
+is some). Each tx is followed through the confirmation tracker so every
+service gets the result of the block that included it. A multi-message tx
+is all-or-nothing: when one message fails (its index is in the tx log),
+that service is reported with the error and the others are resent without
+it, up to SERVICE_BATCH_MAX_ROUNDS txs per chunk.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Optional
+
+from .cache import invalidate_addresses, query_cache
+from .config import SERVICE_BATCH_COMMIT_TIMEOUT, SERVICE_BATCH_MAX_ROUNDS
+from .tracker import tx_tracker
+from .tx import (
+    chunk_messages,
+    message_gas,
+    msg_add_service,
+    resolve_address,
+    submit_tx,
+)
+
+logger = logging.getLogger(__name__)
+
+# "failed to execute message; message index: 3: ..."
+_MESSAGE_INDEX_RE = re.compile(r"message index: (\d+)")
+
+
+def failed_message_index(log) -> Optional[int]:
+    """
+    Index of the message that failed a multi-message tx, from its log.
+    """
+    match = _MESSAGE_INDEX_RE.search(log or "")
+    return int(match.group(1)) if match else None
+
+
+def _result(request, exit_code, status=None, txhash=None, height=None, stderr=""):
+    return {
+        "service_id": request.service_id,
+        "from_account": request.from_account,
+        "network": request.network,
+        "exit_code": exit_code,
+        "status": status,
+        "txhash": txhash,
+        "height": height,
+        "stderr": stderr,
+    }
+
+
+async def create_services(requests: list) -> list:
+    """
+    Register every ServiceRequest; returns one ServiceResult-shaped dict
+    per request, in order.
+    """
+    results = [None] * len(requests)
+    groups: dict[tuple, list] = {}
+    for index, request in enumerate(requests):
+        key = (request.network, request.from_account)
+        groups.setdefault(key, []).append((index, request))
+    await asyncio.gather(
+        *(
+            _create_group(network, from_account, items, results)
+            for (network, from_account), items in groups.items()
+        )
+    )
+    return results
+
+
+async def _create_group(network, from_account, items, results):
+    owner_address, error = await resolve_address(from_account, network)
+    if error is not None:
+        for index, request in items:
+            results[index] = _result(request, 1, stderr=error)
+        return
+    # Sized by the gas learned for txs like these, once there is some
+    gas_per_message = message_gas(
+        [
+            msg_add_service(
+                owner_address, r.service_id, r.service_name, r.compute_units
+            )
+            for _, r in items
+        ],
+        network,
+    )
+    chunks = chunk_messages(items, gas_per_message)
+    logger.info(
+        f"Registering {len(items)} services from {from_account} on {network} "
+        f"in {len(chunks)} txs"
+    )
+    await asyncio.gather(
+        *(
+            _create_chunk(
+                network, from_account, owner_address, chunk, gas_per_message, results
+            )
+            for chunk in chunks
+        )
+    )
+    invalidate_addresses(network, [owner_address])
+
+
+async def _create_chunk(network, signer, owner_address, chunk, gas, results):
+    chunk = list(chunk)
+    for _ in range(SERVICE_BATCH_MAX_ROUNDS):
+        messages = [
+            msg_add_service(
+                owner_address, r.service_id, r.service_name, r.compute_units
+            )
+            for _, r in chunk
+        ]
+        result = await submit_tx(signer, messages, network, gas * len(messages))
+        for _, request in chunk:
+            query_cache.invalidate_tag((network, f"service:{request.service_id}"))
+        if result["exit_code"] != 0:
+            # Rejected at CheckTx, so nothing in it was executed
+            for index, request in chunk:
+                results[index] = _result(
+                    request, 1, txhash=result.txhash, stderr=result["stderr"]
+                )
+            return
+        tx = tx_tracker.get(result.txhash, network)
+        if tx is not None:
+            tx = await tx_tracker.wait(tx, SERVICE_BATCH_COMMIT_TIMEOUT)
+        if tx is None or tx.pending or tx.code == 0:
+            # Committed, or still pending (pollable at GET /tx/{txhash})
+            for index, request in chunk:
+                results[index] = _result(
+                    request,
+                    0,
+                    status=tx.status if tx else None,
+                    txhash=result.txhash,
+                    height=tx.height if tx else None,
+                )
+            return
+        if tx.code is None:
+            # Expired: never seen in a block before the tracker gave up
+            for index, request in chunk:
+                results[index] = _result(
+                    request,
+                    1,
+                    status=tx.status,
+                    txhash=tx.txhash,
+                    stderr=f"Tx {tx.txhash} not confirmed ({tx.status})",
+                )
+            return
+        failed = failed_message_index(tx.raw_log)
+        if failed is None or failed >= len(chunk) or len(chunk) == 1:
+            for index, request in chunk:
+                results[index] = _result(
+                    request,
+                    tx.code,
+                    status=tx.status,
+                    txhash=tx.txhash,
+                    height=tx.height,
+                    stderr=tx.raw_log,
+                )
+            return
+        index, request = chunk.pop(failed)
+        results[index] = _result(
+            request,
+            tx.code,
+            status=tx.status,
+            txhash=tx.txhash,
+            height=tx.height,
+            stderr=tx.raw_log,
+        )
+        logger.warning(
+            f"Service {request.service_id} failed in tx {tx.txhash}; "
+            f"resending the other {len(chunk)}"
+        )
+    for index, request in chunk:
+        results[index] = _result(
+            request,
+            1,
+            stderr=f"Gave up after {SERVICE_BATCH_MAX_ROUNDS} txs with failures",
+        )
@@ -0,0 +1,115 @@
+"""
+State shared between uvicorn workers on one machine.
+
+With SHARED_STATE_BACKEND=sqlite, signer sequences and the query cache live
+in a local SQLite file in WAL mode instead of per-process dicts, so every
+worker allocates from the same sequence counter (atomic
+compare-and-increment in an IMMEDIATE transaction) and sees the same cached
+results. No external service is needed. Transactions are a few indexed
+reads/writes, short enough to run on the event loop.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .config import SHARED_STATE_BACKEND, SHARED_STATE_PATH
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signers (
+    network TEXT NOT NULL,
+    address TEXT NOT NULL,
+    account_number INTEGER,
+    next_sequence INTEGER NOT NULL DEFAULT 0,
+    broadcast_sequence INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0,
+    synced INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (network, address)
+);
+CREATE TABLE IF NOT EXISTS query_cache (
+    key TEXT PRIMARY KEY,
+    network TEXT NOT NULL,
+    raw BLOB,
+    stderr TEXT NOT NULL DEFAULT '',
+    exit_code INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS query_cache_network ON query_cache (network);
+CREATE INDEX IF NOT EXISTS query_cache_expires ON query_cache (expires_at);
+CREATE TABLE IF NOT EXISTS query_cache_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS query_cache_tags_key ON query_cache_tags (key);
+CREATE TABLE IF NOT EXISTS tag_versions (
+    tag TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+class SqliteStore:
+    def __init__(self, path=SHARED_STATE_PATH, schema=SCHEMA):
+        self.path = path
+        self.schema = schema
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so each worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.schema)
+            self._conn, self._pid = conn, os.getpid()
+            logger.info(f"Opened {self.path}")
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        A write transaction; takes the database write lock up front so
+        read-modify-write sequences are atomic across processes.
+        """
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+
+def get_shared_store():
+    """
+    The store for SHARED_STATE_BACKEND, or None for per-process state.
+    """
+    if SHARED_STATE_BACKEND == "sqlite":
+        return shared_store
+    if SHARED_STATE_BACKEND != "memory":
+        logger.warning(
+            f"Unknown SHARED_STATE_BACKEND {SHARED_STATE_BACKEND!r}; using memory"
+        )
+    return None
+
+
+shared_store = SqliteStore()
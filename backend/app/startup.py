@@ -0,0 +1,130 @@
+"""
+Startup warmup and readiness.
+
+Run from the app's lifespan hook: index the keyring, make sure every faucet
+key is imported (all networks and keys concurrently), then open the REST
+and RPC connection pools and load faucet balances into memory. /readyz
+reports 503 until every step has finished, so a new pod only takes traffic
+once its faucets exist.
+"""
+
+import asyncio
+import logging
+import time
+
+from .config import POCKET_NODE_URL, STARTUP_WARMUP_TIMEOUT
+from .faucet import faucet_pool
+from .keyring import keyring_index
+from .pocket import import_hex_key_async, key_exists_async
+from .query_client import rpc_client
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+OK = "ok"
+FAILED = "failed"
+
+
+class Readiness:
+    def __init__(
+        self, steps=("keyring", "faucet_keys", "connections", "faucet_balances")
+    ):
+        self.steps = {step: PENDING for step in steps}
+        self.started_at = time.time()
+        self.ready_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def finish(self, step, ok=True):
+        self.steps[step] = OK if ok else FAILED
+        if PENDING not in self.steps.values():
+            self.ready_at = time.time()
+            logger.info(f"Warmup finished in {self.ready_at - self.started_at:.2f}s")
+
+    def to_dict(self):
+        return {
+            "ready": self.ready,
+            "steps": dict(self.steps),
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+        }
+
+
+async def _ensure_faucet_key(key, network) -> bool:
+    if await key_exists_async(key.name, network):
+        return True
+    imported = await import_hex_key_async(key.name, key.hex_key, network)
+    logger.info(f"Imported faucet key {key.name} for {network}: {imported}")
+    return imported
+
+
+async def ensure_faucet_keys() -> bool:
+    """
+    Import missing faucet keys, all networks at once.
+    """
+    checks = []
+    for network in POCKET_NODE_URL:
+        keys = faucet_pool.keys(network)
+        if not keys:
+            logger.warning(f"No hex key set for faucet_{network}, cannot import.")
+        checks += [_ensure_faucet_key(key, network) for key in keys]
+    return all(await asyncio.gather(*checks))
+
+
+def _faucet_networks():
+    return [n for n in POCKET_NODE_URL if faucet_pool.keys(n)]
+
+
+async def warm_connections() -> bool:
+    """
+    Open a pooled RPC connection to every network that has faucet keys.
+    """
+    networks = _faucet_networks()
+    outcomes = await asyncio.gather(
+        *(rpc_client.call("status", {}, n) for n in networks)
+    )
+    for network, (_, error) in zip(networks, outcomes):
+        if error is not None:
+            logger.warning(f"Warmup of {network} RPC failed: {error}")
+    return all(error is None for _, error in outcomes)
+
+
+async def load_faucet_balances() -> bool:
+    await faucet_pool.refresh_balances()
+    return all(
+        key.balance is not None
+        for network in _faucet_networks()
+        for key in faucet_pool.keys(network)
+    )
+
+
+async def _step(name, coro, timeout=None):
+    try:
+        ok = await asyncio.wait_for(coro, timeout) is not False
+    except Exception as e:
+        logger.error(f"Warmup step {name} failed: {e!r}")
+        ok = False
+    readiness.finish(name, ok)
+
+
+async def _faucets():
+    await _step("faucet_keys", ensure_faucet_keys())
+    await _step("faucet_balances", load_faucet_balances(), STARTUP_WARMUP_TIMEOUT)
+
+
+async def warmup():
+    """
+    Startup sequence; failed steps are logged and reported by /readyz but
+    don't hold readiness back.
+    """
+    readiness.started_at = time.time()
+    await _step("keyring", keyring_index.refresh_async())
+    await asyncio.gather(
+        _faucets(),
+        _step("connections", warm_connections(), STARTUP_WARMUP_TIMEOUT),
+    )
+
+
+readiness = Readiness()
@@ -0,0 +1,271 @@
+"""
+Background confirmation tracker for broadcast transactions.
+
+Every broadcast txhash is registered here. One polling task per network
+watches the latest block height and, once per new block, looks up all
+pending hashes with a single batched JSON-RPC request (`tx` per hash).
+Final height, code and gas are kept in memory so GET /tx/{hash} never has to
+go upstream, and clients can long-poll until a tx is committed. Committed
+results are also written to the persistent immutable cache, so lookups
+survive restarts.
+"""
+
+import asyncio
+import base64
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .config import (
+    TX_TRACKER_BATCH_SIZE,
+    TX_TRACKER_MAX_ENTRIES,
+    TX_TRACKER_POLL_INTERVAL,
+    TX_TRACKER_TIMEOUT,
+)
+from .gas import gas_estimator
+from .immutable import immutable_cache
+from .query_client import rpc_client
+from .result import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+COMMITTED = "committed"
+FAILED = "failed"
+EXPIRED = "expired"
+
+
+@dataclass
+class TxStatus:
+    txhash: str
+    network: str
+    status: str = PENDING
+    height: Optional[int] = None
+    code: Optional[int] = None
+    codespace: str = ""
+    gas_wanted: Optional[int] = None
+    gas_used: Optional[int] = None
+    raw_log: str = ""
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def pending(self):
+        return self.status == PENDING
+
+    def to_dict(self):
+        return {
+            "txhash": self.txhash,
+            "network": self.network,
+            "status": self.status,
+            "height": self.height,
+            "code": self.code,
+            "codespace": self.codespace,
+            "gas_wanted": self.gas_wanted,
+            "gas_used": self.gas_used,
+            "raw_log": self.raw_log,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _hash_param(txhash):
+    # []byte params are base64 in JSON-RPC POST bodies
+    return {"hash": base64.b64encode(bytes.fromhex(txhash)).decode()}
+
+
+def _is_not_found(error):
+    return "not found" in (error or "").lower()
+
+
+# tx_result fields kept in the immutable cache
+_STORED_FIELDS = ("code", "codespace", "gas_wanted", "gas_used", "log")
+
+
+def _stored_key(txhash, network):
+    return immutable_cache.key(network, ("tx", txhash.upper()))
+
+
+class TxTracker:
+    def __init__(self, max_entries=TX_TRACKER_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # (network, txhash) -> TxStatus, oldest first
+        self._txs: OrderedDict = OrderedDict()
+        self._pollers: dict = {}
+        self._heights: dict = {}
+        self.checks = 0
+
+    def track(self, txhash: str, network: str = "alpha") -> Optional[TxStatus]:
+        """
+        Register a broadcast tx; safe to call more than once per hash.
+        """
+        if not txhash:
+            return None
+        txhash = txhash.upper()
+        key = (network, txhash)
+        tx = self._txs.get(key)
+        if tx is None:
+            tx = self._txs[key] = TxStatus(txhash, network)
+            self._evict()
+        poller = self._pollers.get(network)
+        if poller is None or poller.done():
+            self._pollers[network] = asyncio.ensure_future(self._poll(network))
+        return tx
+
+    def get(self, txhash: str, network: str = "alpha") -> Optional[TxStatus]:
+        return self._txs.get((network, txhash.upper()))
+
+    async def lookup(self, txhash: str, network: str = "alpha") -> Optional[TxStatus]:
+        """
+        Status of a tx; hashes not broadcast through this API are looked up
+        once and tracked from then on. None if the node doesn't know it.
+        """
+        tx = self.get(txhash, network)
+        if tx is not None:
+            return tx
+        stored = immutable_cache.get(_stored_key(txhash, network))
+        if stored is not None:
+            tx = self.track(txhash, network)
+            self._finish(tx, loads(stored), persist=False)
+            return tx
+        result, error = await rpc_client.call("tx", _hash_param(txhash), network)
+        if error is not None:
+            if _is_not_found(error):
+                return None
+            raise RuntimeError(error)
+        tx = self.track(txhash, network)
+        self._finish(tx, result)
+        return tx
+
+    def observe(self, txhash: str, network: str, result: dict):
+        """
+        Settle a tracked tx from a pushed Tx event ({"height", "tx_result"}).
+        """
+        tx = self.get(txhash, network)
+        if tx is not None and tx.pending:
+            self._finish(tx, result)
+
+    async def wait(self, tx: TxStatus, timeout: float) -> TxStatus:
+        """
+        Wait up to `timeout` seconds for a pending tx to be committed.
+        """
+        if tx.pending:
+            try:
+                await asyncio.wait_for(tx._done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return tx
+
+    def _evict(self):
+        """
+        Drop the oldest finished txs beyond max_entries (pending ones stay).
+        """
+        excess = len(self._txs) - self.max_entries
+        if excess <= 0:
+            return
+        finished = [key for key, tx in self._txs.items() if not tx.pending]
+        for key in finished[:excess]:
+            del self._txs[key]
+
+    def _pending(self, network):
+        return [
+            tx for (n, _), tx in self._txs.items() if n == network and tx.pending
+        ]
+
+    async def _poll(self, network):
+        """
+        Per-network loop: check pending txs once per new block; exits when
+        nothing is pending.
+        """
+        last_height = None
+        while True:
+            pending = self._pending(network)
+            if not pending:
+                return
+            try:
+                height = await self._latest_height(network)
+                if height is not None and height != last_height:
+                    last_height = height
+                    await self._check(network, pending)
+            except Exception as e:
+                logger.error(f"Tx tracker poll on {network} failed: {e}")
+            self._expire(pending)
+            await asyncio.sleep(TX_TRACKER_POLL_INTERVAL)
+
+    async def _latest_height(self, network):
+        result, error = await rpc_client.call("status", {}, network)
+        if error is not None:
+            logger.warning(f"Tx tracker cannot read status on {network}: {error}")
+            return None
+        height = int(result["sync_info"]["latest_block_height"])
+        self._heights[network] = height
+        return height
+
+    async def _check(self, network, pending):
+        for i in range(0, len(pending), TX_TRACKER_BATCH_SIZE):
+            batch = pending[i : i + TX_TRACKER_BATCH_SIZE]
+            self.checks += 1
+            outcomes = await rpc_client.call_batch(
+                [("tx", _hash_param(tx.txhash)) for tx in batch], network
+            )
+            for tx, (result, error) in zip(batch, outcomes):
+                if error is None:
+                    self._finish(tx, result)
+                elif not _is_not_found(error):
+                    logger.warning(f"Tx tracker lookup of {tx.txhash} failed: {error}")
+
+    def _finish(self, tx: TxStatus, result: dict, persist=True):
+        tx_result = result.get("tx_result") or {}
+        tx.height = int(result.get("height", 0))
+        tx.code = int(tx_result.get("code", 0))
+        tx.codespace = tx_result.get("codespace", "")
+        tx.gas_wanted = int(tx_result.get("gas_wanted", 0))
+        tx.gas_used = int(tx_result.get("gas_used", 0))
+        tx.raw_log = tx_result.get("log", "")
+        tx.status = COMMITTED if tx.code == 0 else FAILED
+        tx.finished_at = time.time()
+        tx._done.set()
+        gas_estimator.settle(
+            tx.txhash, tx.network, tx.gas_used, tx.code, tx.codespace, tx.raw_log
+        )
+        if persist:
+            # Only the fields read above; the full result can be large
+            stored = {
+                "height": result.get("height"),
+                "tx_result": {
+                    k: tx_result[k] for k in _STORED_FIELDS if k in tx_result
+                },
+            }
+            immutable_cache.put(
+                _stored_key(tx.txhash, tx.network), tx.network, dumps(stored)
+            )
+
+    def _expire(self, pending):
+        deadline = time.time() - TX_TRACKER_TIMEOUT
+        for tx in pending:
+            if tx.pending and tx.submitted_at < deadline:
+                logger.warning(
+                    f"Tx {tx.txhash} not committed after {TX_TRACKER_TIMEOUT}s"
+                )
+                tx.status = EXPIRED
+                tx.finished_at = time.time()
+                tx._done.set()
+
+    async def stop(self):
+        pollers = list(self._pollers.values())
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        self._pollers.clear()
+
+    def stats(self):
+        counts = {PENDING: 0, COMMITTED: 0, FAILED: 0, EXPIRED: 0}
+        for tx in self._txs.values():
+            counts[tx.status] += 1
+        return {**counts, "checks": self.checks, "heights": dict(self._heights)}
+
+
+tx_tracker = TxTracker()
@@ -0,0 +1,301 @@
+"""
+Offline transaction pipeline: build -> sign -> encode -> broadcast.
+
+Unsigned transactions are built in-process, signed and encoded by pocketd in
+offline mode using a sequence leased from the SequenceManager, and broadcast
+with a single CometBFT `broadcast_tx_sync` call. Only the broadcast touches
+the network; pocketd never re-queries the account or simulates the tx.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+
+from .config import (
+    POCKET_TX_FEE_DENOM,
+    POCKET_TX_GAS_LIMIT,
+    POCKET_TX_GAS_PRICE,
+    POCKET_TX_MAX_GAS,
+    POCKET_TX_MAX_RETRIES,
+)
+from .gas import gas_estimator, is_out_of_gas, messages_shape
+from .keyring import keyring_index
+from .pocket import run_pocket_command_async
+from .query_client import rpc_client
+from .result import CommandResult
+from .sequence import expected_sequence, is_sequence_mismatch, sequence_manager
+from .tracker import tx_tracker
+
+logger = logging.getLogger(__name__)
+
+_COIN_RE = re.compile(r"^(\d+)([a-zA-Z][a-zA-Z0-9/:._-]{2,127})$")
+
+# key name -> address, per network
+_address_cache: dict[tuple, str] = {}
+
+
+def parse_coins(amount: str) -> list:
+    """
+    Parse a coin string like "1000000upokt" (or "1upokt,2uother") into the
+    [{"denom": ..., "amount": ...}] form used in messages.
+    """
+    coins = []
+    for part in amount.split(","):
+        match = _COIN_RE.match(part.strip())
+        if not match:
+            raise ValueError(f"Invalid coin amount: {amount}")
+        coins.append({"denom": match.group(2), "amount": match.group(1)})
+    return coins
+
+
+def msg_send(from_address: str, to_address: str, amount) -> dict:
+    """
+    MsgSend of `amount`, given as a coin string or already-parsed coins.
+    """
+    return {
+        "@type": "/cosmos.bank.v1beta1.MsgSend",
+        "from_address": from_address,
+        "to_address": to_address,
+        "amount": parse_coins(amount) if isinstance(amount, str) else amount,
+    }
+
+
+def msg_add_service(
+    owner_address: str, service_id: str, service_name: str, compute_units: int
+) -> dict:
+    return {
+        "@type": "/pocket.service.MsgAddService",
+        "owner_address": owner_address,
+        "service": {
+            "id": service_id,
+            "name": service_name,
+            "compute_units_per_relay": str(compute_units),
+            "owner_address": owner_address,
+        },
+    }
+
+
+def estimate_fee(gas_limit: int) -> int:
+    """
+    Fee (in POCKET_TX_FEE_DENOM) paid for a tx with the given gas limit.
+    """
+    return max(1, math.ceil(gas_limit * POCKET_TX_GAS_PRICE))
+
+
+def build_unsigned_tx(messages: list, gas_limit: int = None, memo: str = "") -> dict:
+    """
+    Build an unsigned tx in the JSON format accepted by `pocketd tx sign`.
+    Gas is fixed up front (learned, or POCKET_TX_GAS_LIMIT per message) so no
+    simulation is needed.
+    """
+    if gas_limit is None:
+        gas_limit = POCKET_TX_GAS_LIMIT * len(messages)
+    fee = estimate_fee(gas_limit)
+    return {
+        "body": {
+            "messages": messages,
+            "memo": memo,
+            "timeout_height": "0",
+            "extension_options": [],
+            "non_critical_extension_options": [],
+        },
+        "auth_info": {
+            "signer_infos": [],
+            "fee": {
+                "amount": [{"denom": POCKET_TX_FEE_DENOM, "amount": str(fee)}],
+                "gas_limit": str(gas_limit),
+                "payer": "",
+                "granter": "",
+            },
+        },
+        "signatures": [],
+    }
+
+
+def message_gas(messages: list, network: str = "alpha") -> int:
+    """
+    Gas to budget per message for txs of messages like these: learned for a
+    tx of their shape holding as many as POCKET_TX_GAS_LIMIT each would fit,
+    else POCKET_TX_GAS_LIMIT.
+    """
+    sample = messages[: max(1, POCKET_TX_MAX_GAS // POCKET_TX_GAS_LIMIT)]
+    gas = gas_estimator.estimate(network, messages_shape(sample)) if sample else None
+    return math.ceil(gas / len(sample)) if gas else POCKET_TX_GAS_LIMIT
+
+
+def chunk_messages(messages: list, gas_per_message: int = POCKET_TX_GAS_LIMIT):
+    """
+    Split messages into groups that fit in one tx under POCKET_TX_MAX_GAS.
+    """
+    per_tx = max(1, POCKET_TX_MAX_GAS // gas_per_message)
+    return [messages[i : i + per_tx] for i in range(0, len(messages), per_tx)]
+
+
+async def resolve_address(key_name: str, network: str = "alpha"):
+    """
+    Resolve a keyring name (or pass through a bech32 address) to an address.
+    Returns (address, error).
+    """
+    if key_name.startswith("pokt1"):
+        return key_name, None
+    cached = _address_cache.get((network, key_name))
+    if cached:
+        return cached, None
+    key = await keyring_index.get(key_name, network)
+    if key is not None and key.address:
+        _address_cache[(network, key_name)] = key.address
+        return key.address, None
+    result = await run_pocket_command_async(["keys", "show", key_name], network)
+    if result["exit_code"] != 0:
+        return None, f"Unknown key {key_name}: {result['stderr']}"
+    try:
+        address = result.data["address"]
+    except (TypeError, KeyError):
+        return None, f"Failed to parse key {key_name}: {result.text()}"
+    _address_cache[(network, key_name)] = address
+    return address, None
+
+
+async def sign_and_encode(
+    unsigned: dict, signer: str, account_number: int, sequence: int, network: str
+):
+    """
+    Sign offline with the given account number/sequence and encode to base64
+    tx bytes. Returns (tx_bytes, error).
+    """
+    with tempfile.TemporaryDirectory(prefix="pocket-tx-") as tmpdir:
+        unsigned_path = os.path.join(tmpdir, "unsigned.json")
+        signed_path = os.path.join(tmpdir, "signed.json")
+        with open(unsigned_path, "w") as f:
+            json.dump(unsigned, f)
+        cmd = [
+            "tx",
+            "sign",
+            unsigned_path,
+            "--from",
+            signer,
+            "--offline",
+            "--account-number",
+            str(account_number),
+            "--sequence",
+            str(sequence),
+        ]
+        result = await run_pocket_command_async(cmd, network)
+        if result["exit_code"] != 0:
+            return None, f"Failed to sign tx: {result['stderr']}"
+        with open(signed_path, "wb") as f:
+            f.write(result.raw)
+        result = await run_pocket_command_async(["tx", "encode", signed_path], network)
+        if result["exit_code"] != 0:
+            return None, f"Failed to encode tx: {result['stderr']}"
+        return result.text("compact").strip().strip('"'), None
+
+
+async def broadcast(tx_bytes: str, network: str = "alpha") -> CommandResult:
+    """
+    Broadcast encoded tx bytes with `broadcast_tx_sync` (waits for CheckTx).
+    """
+    result, error = await rpc_client.call(
+        "broadcast_tx_sync", {"tx": tx_bytes}, network
+    )
+    if error is not None:
+        return CommandResult.failure(error)
+    if not isinstance(result, dict):
+        return CommandResult.failure(f"Invalid broadcast_tx_sync result: {result!r}")
+    code = int(result.get("code", 0))
+    if code == 0:
+        tx_tracker.track(result.get("hash"), network)
+    output = {
+        "height": "0",
+        "txhash": result.get("hash"),
+        "codespace": result.get("codespace", ""),
+        "code": code,
+        "raw_log": result.get("log", ""),
+    }
+    return CommandResult(
+        None,
+        result.get("log", "") if code != 0 else "",
+        0 if code == 0 else 1,
+        data=output,
+    )
+
+
+async def submit_tx(
+    signer: str, messages: list, network: str = "alpha", gas_limit: int = None
+) -> CommandResult:
+    """
+    Build, sign and broadcast a tx from `signer` (key name or address).
+    On a sequence mismatch the signer is resynced and the tx is re-signed
+    with a fresh sequence, up to POCKET_TX_MAX_RETRIES times. `gas_limit`
+    is used when none has been learned for this shape of tx (default
+    POCKET_TX_GAS_LIMIT per message).
+    Returns a CommandResult.
+    """
+    address, error = await resolve_address(signer, network)
+    if error is not None:
+        return CommandResult.failure(error)
+    # A learned gas limit for this shape of tx, else the given or fixed one
+    shape = messages_shape(messages)
+    learned = gas_estimator.estimate(network, shape)
+    unsigned = build_unsigned_tx(messages, learned or gas_limit)
+    result = CommandResult.failure(f"Gave up after {POCKET_TX_MAX_RETRIES} retries")
+    retries = 0
+    while retries <= POCKET_TX_MAX_RETRIES:
+        try:
+            lease = await sequence_manager.acquire(address, network)
+        except Exception as e:
+            return CommandResult.failure(str(e))
+        finished = False
+        try:
+            tx_bytes, error = await sign_and_encode(
+                unsigned, signer, lease.account_number, lease.sequence, network
+            )
+            if error is not None:
+                return CommandResult.failure(error)
+            async with sequence_manager.turn(lease) as current:
+                if not current:
+                    # A lower sequence failed while we were signing; re-sign
+                    finished = True
+                    await sequence_manager.discard(lease)
+                    continue
+                result = await broadcast(tx_bytes, network)
+                finished = True
+                if result["exit_code"] == 0:
+                    await sequence_manager.commit(lease)
+                    gas_estimator.expect(result.txhash, network, shape)
+                    # The gas limit it was signed with, as in pocketd's output;
+                    # the fee is charged in full for it
+                    gas_wanted = unsigned["auth_info"]["fee"]["gas_limit"]
+                    result.data["gas_wanted"] = gas_wanted
+                    return result
+                if is_sequence_mismatch(result["stderr"]):
+                    retries += 1
+                    logger.warning(
+                        f"Sequence mismatch for {address} "
+                        f"(retry {retries}): {result['stderr']}"
+                    )
+                    await sequence_manager.resync(
+                        lease, expected_sequence(result["stderr"])
+                    )
+                    continue
+                await sequence_manager.release(lease, holding_turn=True)
+                # Transport failures carry no broadcast response
+                data = result.data if isinstance(result.data, dict) else {}
+                if learned is not None and is_out_of_gas(
+                    data.get("code"), data.get("codespace", ""), result["stderr"]
+                ):
+                    # Rejected at CheckTx, so nothing was spent: retry with
+                    # the default limit
+                    retries += 1
+                    gas_estimator.out_of_gas(network, shape)
+                    learned = None
+                    unsigned = build_unsigned_tx(messages, gas_limit)
+                    continue
+                return result
+        finally:
+            if not finished:
+                await sequence_manager.release(lease)
+    return result
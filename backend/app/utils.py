@@ -2,6 +2,7 @@
 General utility functions for Pocket SDK API backend.
 """
 
+import asyncio
 import random
 import string
 
@@ -10,3 +11,37 @@ def generate_random_key_name(prefix="user"):
     """Generate a random key name with a given prefix."""
     random_suffix = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
     return f"{prefix}_{random_suffix}"
+
+
+def is_tx_command(command) -> bool:
+    """
+    Whether a raw command is a `tx ...` subcommand (`query tx <hash>` is not).
+    """
+    return list(command[:1]) == ["tx"]
+
+
+async def run_bounded(calls, limit: int):
+    """
+    Run coroutine factories from the `calls` iterable with at most `limit`
+    in flight, yielding (index, result) as each completes. Calls are pulled
+    from the iterable lazily, so memory stays bounded by `limit`.
+    """
+    calls = enumerate(calls)
+    pending = {}
+
+    def refill():
+        for index, call in calls:
+            pending[asyncio.ensure_future(call())] = index
+            if len(pending) >= limit:
+                return
+
+    refill()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield pending.pop(task), task.result()
+            refill()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,93 @@
+"""
+Compare API throughput with blocking vs. async pocketd execution.
+
+Runs N concurrent clients against the app in-process and reports
+requests/sec for:
+  - blocking: a route that calls the synchronous run_pocket_command
+    (how every route behaved before the async engine)
+  - async:    the real POST /run route (run_pocket_command_async)
+
+A stub pocketd that sleeps for --latency seconds is used, so no node or
+binary is needed:
+
+    cd backend
+    python -m bench.bench_concurrency --clients 50 --requests 200 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import stat
+import tempfile
+import time
+
+STUB_TEMPLATE = """#!/bin/sh
+sleep {latency}
+echo '{{"account": {{"value": {{"account_number": "1", "sequence": "0"}}}}}}'
+"""
+
+
+def write_stub(latency):
+    fd, path = tempfile.mkstemp(prefix="pocketd-stub-")
+    with os.fdopen(fd, "w") as f:
+        f.write(STUB_TEMPLATE.format(latency=latency))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+async def drive(client, path, clients, total):
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+    body = {"command": ["query", "auth", "account", "pokt1bench"], "network": "alpha"}
+    headers = {"Authorization": "Bearer bench"}
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            resp = await client.post(path, json=body, headers=headers)
+            resp.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args):
+    import httpx
+    from fastapi import Depends
+
+    from app.auth import verify_token
+    from app.main import app
+    from app.models import CommandRequest, CommandResponse
+    from app.pocket import run_pocket_command
+
+    @app.post("/bench/blocking-run", response_model=CommandResponse)
+    async def blocking_run(request: CommandRequest, user=Depends(verify_token)):
+        return run_pocket_command(request.command, request.network)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for label, path in (("blocking", "/bench/blocking-run"), ("async", "/run")):
+            rps = await drive(c, path, args.clients, args.requests)
+            print(
+                f"{label:>8}: {rps:8.1f} req/s "
+                f"({args.clients} clients, {args.requests} requests, "
+                f"{args.latency}s pocketd latency)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Must be set before the app (and its config) is imported
+    stub_path = write_stub(args.latency)
+    os.environ["POCKET_BIN_PATH"] = stub_path
+    try:
+        asyncio.run(main(args))
+    finally:
+        os.remove(stub_path)
@@ -0,0 +1,92 @@
+"""
+Compare bulk account creation before and after in-process key derivation.
+
+Creates --accounts keys and reports accounts/sec for:
+  - keys-add:     one `pocketd keys add` per account, POCKET_MAX_CONCURRENCY
+                  at a time (how accounts were created before
+                  POST /account/create-batch)
+  - create-batch: keygen.create_accounts, which derives keys on the process
+                  pool and imports each with `keys import-hex`
+  - derive:       key derivation alone, in this process
+
+Runs against the fake pocketd unless --pocketd points at a real binary; the
+fake's latency for keys commands is set with FAKE_POCKETD_LATENCY_KEYS, and
+only a real pocketd shows what `keys add` itself costs. Keys go to a
+throwaway POCKET_HOME with the test keyring backend.
+
+    cd backend
+    python -m bench.bench_keygen --accounts 200
+    python -m bench.bench_keygen --accounts 200 --pocketd "$(which pocketd)"
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from functools import partial
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_POCKETD = os.path.join(BENCH_DIR, "fake_pocketd.py")
+
+
+def report(label, count, elapsed, failed=0):
+    print(
+        f"{label:>12}: {count / elapsed:8.1f} accounts/s "
+        f"({count} accounts in {elapsed:.2f}s, {failed} failed)"
+    )
+
+
+async def main(args):
+    from app.config import POCKET_MAX_CONCURRENCY
+    from app.keygen import create_accounts, derive_accounts, shutdown_pool
+    from app.pocket import run_pocket_command_async
+    from app.utils import run_bounded
+
+    # Every pocketd call logs at INFO
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    count = args.accounts
+    calls = (
+        partial(run_pocket_command_async, ["keys", "add", f"before_{i}"], "alpha")
+        for i in range(count)
+    )
+    failed = 0
+    start = time.perf_counter()
+    async for _, result in run_bounded(calls, POCKET_MAX_CONCURRENCY):
+        failed += result["exit_code"] != 0
+    report("keys-add", count, time.perf_counter() - start, failed)
+
+    failed = 0
+    start = time.perf_counter()
+    try:
+        names = [f"after_{i}" for i in range(count)]
+        async for account in create_accounts(names, "alpha"):
+            failed += "error" in account
+    finally:
+        shutdown_pool()
+    report("create-batch", count, time.perf_counter() - start, failed)
+
+    start = time.perf_counter()
+    derive_accounts([f"derive_{i}" for i in range(count)])
+    report("derive", count, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--pocketd", default=FAKE_POCKETD)
+    args = parser.parse_args()
+
+    # Must be set before the app (and its config) is imported
+    home = tempfile.mkdtemp(prefix="pocket-bench-")
+    os.environ.update(
+        POCKET_HOME=home, POCKET_BIN_PATH=args.pocketd, SHARED_STATE_BACKEND="memory"
+    )
+    os.environ.setdefault("FAKE_POCKETD_LATENCY_KEYS", "fixed:0.02")
+    try:
+        asyncio.run(main(args))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
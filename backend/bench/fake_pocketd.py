@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Fake pocketd executable for benchmarks.
+
+Emulates the JSON output of the pocketd subcommands the API uses, after
+sleeping for a latency drawn from a configurable distribution. Point
+POCKET_BIN_PATH at this file (it must be executable).
+
+Latency is configured with FAKE_POCKETD_LATENCY, or per command group with
+FAKE_POCKETD_LATENCY_QUERY / _TX / _KEYS, using one of:
+
+    fixed:<seconds>
+    uniform:<low>,<high>
+    normal:<mean>,<stddev>
+    lognormal:<median>,<sigma>
+
+Set FAKE_POCKETD_FAIL_RATE to a 0-1 fraction to make that share of calls
+exit with an error.
+
+Txs "use" FAKE_POCKETD_GAS_USED gas: `--gas auto` simulates (sleeping
+FAKE_POCKETD_LATENCY_SIMULATE) and prints a gas estimate, and a smaller
+explicit --gas fails CheckTx out of gas.
+"""
+
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+
+WORDS = (
+    "abandon ability able about above absent absorb abstract absurd abuse "
+    "access accident account accuse achieve acid acoustic acquire across act "
+    "action actor actress actual"
+).split()
+
+
+def sample_latency(spec):
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return random.uniform(values[0], values[1])
+    if kind == "normal":
+        return max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def fake_address(name):
+    return "pokt1" + hashlib.sha256(name.encode()).hexdigest()[:38]
+
+
+def fake_pubkey(name):
+    key = base64.b64encode(hashlib.sha256(b"pub" + name.encode()).digest()).decode()
+    return json.dumps({"@type": "/cosmos.crypto.secp256k1.PubKey", "key": key})
+
+
+def fake_txhash(*parts):
+    seed = " ".join(parts + (str(time.time()),)).encode()
+    return hashlib.sha256(seed).hexdigest().upper()
+
+
+def key_info(name):
+    return {
+        "name": name,
+        "type": "local",
+        "address": fake_address(name),
+        "pubkey": fake_pubkey(name),
+    }
+
+
+def tx_response(txhash):
+    return {
+        "height": "0",
+        "txhash": txhash,
+        "codespace": "",
+        "code": 0,
+        "data": "",
+        "raw_log": "",
+        "logs": [],
+        "info": "",
+        "gas_wanted": "0",
+        "gas_used": "0",
+        "tx": None,
+        "timestamp": "",
+        "events": [],
+    }
+
+
+def flag(args, name, default=None):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def broadcast(args, *parts):
+    gas_used = int(os.getenv("FAKE_POCKETD_GAS_USED", "85000"))
+    gas = flag(args, "--gas", "200000")
+    if gas == "auto":
+        spec = os.getenv("FAKE_POCKETD_LATENCY_SIMULATE", "fixed:0.05")
+        time.sleep(sample_latency(spec))
+        print(f"gas estimate: {gas_used}", file=sys.stderr)
+    response = tx_response(fake_txhash(*parts))
+    if gas != "auto" and int(gas) < gas_used:
+        response["code"] = 11
+        response["codespace"] = "sdk"
+        response["raw_log"] = f"out of gas in location: txSize; gasWanted: {gas}"
+    return json.dumps(response), 0
+
+
+def run(args):
+    """
+    Returns (stdout, exit_code) for a pocketd invocation.
+    """
+    words = [a for a in args if not a.startswith("-")]
+
+    if words[:2] == ["keys", "add"]:
+        info = key_info(words[2])
+        info["mnemonic"] = " ".join(random.choice(WORDS) for _ in range(24))
+        return json.dumps(info), 0
+    if words[:2] == ["keys", "show"]:
+        return json.dumps(key_info(words[2])), 0
+    if words[:2] == ["keys", "list"]:
+        count = int(os.getenv("FAKE_POCKETD_KEY_COUNT", "5"))
+        return json.dumps([key_info(f"user_{i}") for i in range(count)]), 0
+    if words[:2] == ["keys", "import-hex"]:
+        return "", 0
+    if words[:2] == ["keys", "export"]:
+        return hashlib.sha256(words[2].encode()).hexdigest(), 0
+
+    if words[:3] == ["query", "auth", "account"]:
+        value = {
+            "address": words[3],
+            "pub_key": None,
+            "account_number": "42",
+            "sequence": "7",
+        }
+        account = {"type": "/cosmos.auth.v1beta1.BaseAccount", "value": value}
+        return json.dumps({"account": account}), 0
+    if words[:3] == ["query", "service", "show-service"]:
+        service = {
+            "id": words[3],
+            "name": f"{words[3]} service",
+            "compute_units_per_relay": "10",
+            "owner_address": fake_address("owner"),
+        }
+        return json.dumps({"service": service}), 0
+
+    if words[:3] == ["tx", "bank", "send"]:
+        return broadcast(args, *words[3:6])
+    if words[:3] == ["tx", "service", "add-service"]:
+        return broadcast(args, *words[3:6])
+    if words[:2] == ["tx", "sign"]:
+        with open(words[2]) as f:
+            tx = json.load(f)
+        signer = flag(args, "--from", "")
+        tx["auth_info"]["signer_infos"] = [
+            {
+                "public_key": json.loads(fake_pubkey(signer)),
+                "mode_info": {"single": {"mode": "SIGN_MODE_DIRECT"}},
+                "sequence": flag(args, "--sequence", "0"),
+            }
+        ]
+        tx["signatures"] = [base64.b64encode(os.urandom(64)).decode()]
+        return json.dumps(tx), 0
+    if words[:2] == ["tx", "encode"]:
+        with open(words[2], "rb") as f:
+            return base64.b64encode(f.read()).decode(), 0
+
+    print(f"Error: unknown command {' '.join(words)}", file=sys.stderr)
+    return "", 1
+
+
+def main():
+    args = sys.argv[1:]
+    group = next((a for a in args if not a.startswith("-")), "").upper()
+    spec = os.getenv(f"FAKE_POCKETD_LATENCY_{group}") or os.getenv(
+        "FAKE_POCKETD_LATENCY", "fixed:0.05"
+    )
+    time.sleep(sample_latency(spec))
+    if random.random() < float(os.getenv("FAKE_POCKETD_FAIL_RATE", "0")):
+        print("Error: injected failure", file=sys.stderr)
+        sys.exit(1)
+    stdout, exit_code = run(args)
+    if stdout:
+        print(stdout)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
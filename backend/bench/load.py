@@ -0,0 +1,196 @@
+"""
+Load driver for the API: runs a mix of /run, /account/* and /service/*
+requests at a fixed concurrency and reports p50/p95/p99 latency and
+requests/sec per scenario.
+
+By default the app runs in-process against the fake pocketd
+(bench/fake_pocketd.py) and the stub node, so no binary or network is
+needed; latency of the fake binary is set with FAKE_POCKETD_LATENCY (see
+fake_pocketd.py). Pass --url to drive an already running server instead.
+
+    cd backend
+    python -m bench.load --concurrency 50 --requests 1000
+    FAKE_POCKETD_LATENCY=lognormal:0.08,0.5 python -m bench.load \
+        --scenarios run,account-query,service-create
+    python -m bench.load --url http://127.0.0.1:8000 --scenarios account-query
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_POCKETD = os.path.join(BENCH_DIR, "fake_pocketd.py")
+
+ADDRESSES = [f"pokt1bench{i:033d}" for i in range(100)]
+SERVICES = [f"bench-svc-{i}" for i in range(20)]
+_counter = itertools.count()
+
+
+def _run(n, network):
+    body = {"command": ["query", "auth", "account", ADDRESSES[n % 100]]}
+    return "POST", "/run", {**body, "network": network}
+
+
+def _account_query(n, network):
+    return "GET", f"/account/{ADDRESSES[n % 100]}?network={network}", None
+
+
+def _account_create(n, network):
+    return "POST", "/account/create", {"network": network, "key_name": f"bench_{n}"}
+
+
+def _account_fund(n, network):
+    body = {
+        "address": ADDRESSES[n % 100],
+        "amount": "1000upokt",
+        "network": network,
+        "from_account": "bench_funder",
+    }
+    return "POST", "/account/fund", body
+
+
+def _service_query(n, network):
+    return "GET", f"/service/{SERVICES[n % 20]}?network={network}", None
+
+
+def _service_create(n, network):
+    body = {
+        "service_id": f"bench-svc-new-{n}",
+        "service_name": "Bench service",
+        "from_account": "bench_owner",
+        "network": network,
+    }
+    return "POST", "/service/create", body
+
+
+# scenario name -> builder(n, network) returning (method, path, json body)
+SCENARIOS = {
+    "run": _run,
+    "account-query": _account_query,
+    "account-create": _account_create,
+    "account-fund": _account_fund,
+    "service-query": _service_query,
+    "service-create": _service_create,
+}
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def drive(client, scenarios, concurrency, total, network):
+    """
+    Issue `total` requests from `concurrency` workers, cycling through
+    `scenarios`. Returns ({scenario: ([latencies], errors)}, elapsed).
+    """
+    results = {name: ([], 0) for name in scenarios}
+    plan = itertools.islice(itertools.cycle(scenarios), total)
+    headers = {"Authorization": "Bearer bench"}
+
+    async def worker():
+        for name in plan:
+            method, path, body = SCENARIOS[name](next(_counter), network)
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=body, headers=headers)
+                ok = resp.status_code < 400
+            except Exception:
+                ok = False
+            latencies, errors = results[name]
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                results[name] = (latencies, errors + 1)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def report(results, elapsed):
+    print(
+        f"{'scenario':<16}{'requests':>9}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    everything = []
+    for name, (latencies, errors) in results.items():
+        everything.extend(latencies)
+        _report_row(name, sorted(latencies), errors, elapsed)
+    total_errors = sum(errors for _, errors in results.values())
+    _report_row("total", sorted(everything), total_errors, elapsed)
+
+
+def _report_row(name, latencies, errors, elapsed):
+    print(
+        f"{name:<16}{len(latencies):>9}{errors:>8}{len(latencies) / elapsed:>9.1f}"
+        f"{percentile(latencies, 50) * 1000:>9.1f}"
+        f"{percentile(latencies, 95) * 1000:>9.1f}"
+        f"{percentile(latencies, 99) * 1000:>9.1f}"
+    )
+
+
+async def main(args):
+    import httpx
+
+    scenarios = args.scenarios.split(",")
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    if args.url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60)
+    else:
+        from app.main import app
+
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        results, elapsed = await drive(
+            client, scenarios, args.concurrency, args.requests, args.network
+        )
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{elapsed:.2f}s"
+    )
+    report(results, elapsed)
+
+
+def setup_in_process():
+    """
+    Point the app at the fake pocketd and a stub node. Must run before the
+    app (and its config) is imported.
+    """
+    from bench.stub_node import start_stub_node
+
+    _, url = start_stub_node()
+    os.environ.setdefault("POCKET_BIN_PATH", FAKE_POCKETD)
+    os.environ.setdefault("FAKE_POCKETD_LATENCY", "fixed:0.05")
+    # Every bench request comes from the same demo user
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    for network in ("ALPHA", "BETA", "MAINNET"):
+        os.environ[f"POCKET_{network}_API_URL"] = url
+        os.environ[f"POCKET_{network}_NODE_URL"] = url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="base URL of a running server")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--network", default="alpha")
+    args = parser.parse_args()
+    if not args.url:
+        setup_in_process()
+    asyncio.run(main(args))
@@ -0,0 +1,116 @@
+"""
+Local stand-in for a CometBFT websocket event endpoint.
+
+Acknowledges `subscribe` requests and pushes whatever is passed to
+publish() to every subscriber whose query matches the event type, in the
+format CometBFT uses. Point the websocket URL at it to exercise block-event
+cache invalidation without a node:
+
+    from bench.stub_events import publish, start_stub_events, tx_event
+    server, url = start_stub_events()
+    # POCKET_EVENTS_NETWORKS=alpha POCKET_ALPHA_WS_URL=<url>
+    publish(tx_event("ABC...", 12, {"transfer.recipient": ["pokt1..."]}))
+"""
+
+import json
+import threading
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+# (connection, subscription id, query) for every live subscription
+_subscriptions = []
+_lock = threading.Lock()
+
+
+def _handler(connection):
+    try:
+        for message in connection:
+            request = json.loads(message)
+            if request.get("method") != "subscribe":
+                continue
+            query = request["params"]["query"]
+            with _lock:
+                _subscriptions.append((connection, request.get("id"), query))
+            connection.send(
+                json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": {}})
+            )
+    except ConnectionClosed:
+        pass
+    finally:
+        with _lock:
+            _subscriptions[:] = [s for s in _subscriptions if s[0] is not connection]
+
+
+def block_event(height, events=None):
+    return {
+        "query": "tm.event='NewBlock'",
+        "data": {
+            "type": "tendermint/event/NewBlock",
+            "value": {"block": {"header": {"height": str(height)}}},
+        },
+        "events": {"tm.event": ["NewBlock"], **(events or {})},
+    }
+
+
+def tx_event(txhash, height, events=None, code=0):
+    return {
+        "query": "tm.event='Tx'",
+        "data": {
+            "type": "tendermint/event/Tx",
+            "value": {
+                "TxResult": {
+                    "height": str(height),
+                    "index": 0,
+                    "result": {
+                        "code": code,
+                        "log": "",
+                        "gas_wanted": "200000",
+                        "gas_used": "85000",
+                        "codespace": "",
+                    },
+                }
+            },
+        },
+        "events": {"tm.event": ["Tx"], "tx.hash": [txhash], **(events or {})},
+    }
+
+
+def publish(event):
+    """
+    Push an event (see block_event / tx_event) to matching subscribers.
+    Returns the number of subscriptions it was sent to.
+    """
+    with _lock:
+        targets = [s for s in _subscriptions if s[2] == event["query"]]
+    for connection, request_id, _ in targets:
+        message = {"jsonrpc": "2.0", "id": request_id, "result": event}
+        try:
+            connection.send(json.dumps(message))
+        except Exception:
+            pass
+    return len(targets)
+
+
+def subscription_count():
+    with _lock:
+        return len(_subscriptions)
+
+
+def disconnect_all():
+    """
+    Drop every client connection, e.g. to exercise reconnects.
+    """
+    with _lock:
+        connections = {s[0] for s in _subscriptions}
+    for connection in connections:
+        connection.close()
+
+
+def start_stub_events(host="127.0.0.1", port=0):
+    """
+    Start the stub endpoint in a background thread. Returns (server, ws_url).
+    """
+    server = serve(_handler, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"ws://{host}:{server.socket.getsockname()[1]}/websocket"
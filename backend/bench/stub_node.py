@@ -0,0 +1,342 @@
+"""
+Local stand-in for a Pocket node that serves recorded responses.
+
+GET requests emulate the REST API; POST requests emulate the CometBFT
+JSON-RPC endpoint. Point the node and API URLs at it to exercise the
+in-process clients and the tx pipeline without network access (run several
+with --delay and list them comma-separated to exercise endpoint routing):
+
+    cd backend
+    python -m bench.stub_node --port 1317
+    POCKET_ALPHA_API_URL=http://127.0.0.1:1317 \
+    POCKET_ALPHA_NODE_URL=http://127.0.0.1:1317 uvicorn app.main:app
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Recorded responses, keyed by a regex over the request path
+RECORDED_GET = [
+    (
+        re.compile(r"^/cosmos/auth/v1beta1/accounts/(?P<address>[^/]+)$"),
+        lambda m: {
+            "account": {
+                "@type": "/cosmos.auth.v1beta1.BaseAccount",
+                "address": m["address"],
+                "pub_key": None,
+                "account_number": "42",
+                "sequence": str(_sequences.get(m["address"], INITIAL_SEQUENCE)),
+            }
+        },
+    ),
+    (
+        re.compile(r"^/status$"),
+        lambda m: {"jsonrpc": "2.0", "id": -1, "result": _status({})},
+    ),
+    (
+        re.compile(r"^/cosmos/base/tendermint/v1beta1/syncing$"),
+        lambda m: {"syncing": False},
+    ),
+    (
+        re.compile(r"^/cosmos/bank/v1beta1/balances/(?P<address>[^/]+)/by_denom$"),
+        lambda m: {"balance": {"denom": "upokt", "amount": "1000000000"}},
+    ),
+    (
+        re.compile(r"^/pokt-network/poktroll/service/service/(?P<service_id>[^/]+)$"),
+        lambda m: {
+            "service": {
+                "id": m["service_id"],
+                "name": f"{m['service_id']} service",
+                "compute_units_per_relay": "10",
+                "owner_address": "pokt1stubowner",
+            }
+        },
+    ),
+]
+
+
+# Blocks are produced every BLOCK_TIME seconds; a broadcast tx lands in the
+# next block
+BLOCK_TIME = 1.0
+_GENESIS = time.time()
+_committed = {}
+# Like CheckTx, a JSON-encoded tx (as the fake pocketd signs them) must carry
+# its signer's next sequence; accounts start at INITIAL_SEQUENCE
+INITIAL_SEQUENCE = 7
+_sequences = {}
+_sequence_lock = threading.Lock()
+# Service ids registered by MsgAddService; adding one twice fails the tx
+# at DeliverTx with the index of the offending message
+_services = set()
+
+
+def _height():
+    return int((time.time() - _GENESIS) / BLOCK_TIME) + 1
+
+
+class RpcError(Exception):
+    def __init__(self, message, data=""):
+        super().__init__(message)
+        self.data = data
+
+
+def _signer_sequence(tx):
+    """
+    (signer address, sequence) of a JSON tx, or None for other encodings.
+    """
+    try:
+        tx = json.loads(tx)
+        msg = tx["body"]["messages"][0]
+        address = msg.get("from_address") or msg.get("owner_address")
+        sequence = int(tx["auth_info"]["signer_infos"][0]["sequence"])
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+    return address, sequence
+
+
+def _deliver(tx):
+    """
+    (code, log) of executing a JSON tx's messages; all or nothing.
+    """
+    try:
+        messages = json.loads(tx)["body"]["messages"]
+    except (ValueError, KeyError, TypeError):
+        return 0, ""
+    added = set()
+    for i, msg in enumerate(messages):
+        if not str(msg.get("@type", "")).endswith("MsgAddService"):
+            continue
+        service_id = msg["service"]["id"]
+        if service_id in _services or service_id in added:
+            log = (
+                f"failed to execute message; message index: {i}: "
+                f"service {service_id} already exists"
+            )
+            return 2, log
+        added.add(service_id)
+    _services.update(added)
+    return 0, ""
+
+
+def _broadcast_tx_sync(params):
+    tx = base64.b64decode(params["tx"])
+    txhash = hashlib.sha256(tx).hexdigest().upper()
+    signer = _signer_sequence(tx)
+    if signer is not None:
+        address, sequence = signer
+        with _sequence_lock:
+            expected = _sequences.get(address, INITIAL_SEQUENCE)
+            if sequence != expected:
+                log = (
+                    f"account sequence mismatch, expected {expected}, got "
+                    f"{sequence}: incorrect account sequence"
+                )
+                return {
+                    "code": 32,
+                    "data": "",
+                    "log": log,
+                    "codespace": "sdk",
+                    "hash": txhash,
+                }
+            _sequences[address] = expected + 1
+            code, log = _deliver(tx)
+    else:
+        code, log = 0, ""
+    _committed[txhash] = (_height() + 1, code, log)
+    return {"code": 0, "data": "", "log": "", "codespace": "", "hash": txhash}
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _pb(fields):
+    """
+    Protobuf-encode [(field number, int | str | bytes), ...].
+    """
+    out = bytearray()
+    for number, value in fields:
+        if isinstance(value, int):
+            out += _varint(number << 3) + _varint(value)
+        else:
+            value = value.encode() if isinstance(value, str) else value
+            out += _varint(number << 3 | 2) + _varint(len(value)) + value
+    return bytes(out)
+
+
+def _abci_account(address):
+    base_account = _pb(
+        [
+            (1, address),
+            (3, 42),
+            (4, _sequences.get(address, INITIAL_SEQUENCE)),
+        ]
+    )
+    any_account = _pb([(1, "/cosmos.auth.v1beta1.BaseAccount"), (2, base_account)])
+    return _pb([(1, any_account)])
+
+
+def _abci_balances(address):
+    return _pb([(1, _pb([(1, "upokt"), (2, "1000000000")]))])
+
+
+# abci_query path -> handler(address) returning the encoded response
+ABCI_QUERIES = {
+    "/cosmos.auth.v1beta1.Query/Account": _abci_account,
+    "/cosmos.bank.v1beta1.Query/AllBalances": _abci_balances,
+}
+
+
+def _abci_query(params):
+    handler = ABCI_QUERIES.get(params.get("path"))
+    # Both requests carry the address as field 1
+    data = bytes.fromhex(params.get("data") or "")
+    response = {"code": 0, "log": "", "height": str(_height()), "codespace": ""}
+    if handler is None or len(data) < 2 or data[0] != 0x0A:
+        response.update(code=6, log="unknown query path", codespace="sdk")
+        return {"response": response}
+    value = handler(data[2 : 2 + data[1]].decode())
+    response["value"] = base64.b64encode(value).decode()
+    return {"response": response}
+
+
+def _status(params):
+    return {"sync_info": {"latest_block_height": str(_height())}}
+
+
+def _tx(params):
+    txhash = base64.b64decode(params["hash"]).hex().upper()
+    height, code, log = _committed.get(txhash, (None, 0, ""))
+    if height is None or height > _height():
+        raise RpcError("Internal error", f"tx ({txhash}) not found")
+    return {
+        "hash": txhash,
+        "height": str(height),
+        "index": 0,
+        "tx_result": {
+            "code": code,
+            "log": log,
+            "gas_wanted": "200000",
+            "gas_used": "85000",
+            "codespace": "service" if code else "",
+        },
+    }
+
+
+# JSON-RPC method -> handler(params) returning the result object
+RPC_METHODS = {
+    "abci_query": _abci_query,
+    "broadcast_tx_sync": _broadcast_tx_sync,
+    "status": _status,
+    "tx": _tx,
+}
+
+
+class StubNodeServer(ThreadingHTTPServer):
+    # Room for bursts of new connections from the load driver and hedging
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubNodeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _wait(self):
+        delay = self.server.delay
+        if random.random() < self.server.tail_rate:
+            delay += self.server.tail_delay
+        time.sleep(delay)
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request, e.g. a cancelled hedge
+            pass
+
+    def do_GET(self):
+        self._wait()
+        path = self.path.split("?", 1)[0]
+        for pattern, render in RECORDED_GET:
+            match = pattern.match(path)
+            if match:
+                self._send_json(200, render(match))
+                return
+        self._send_json(404, {"code": 5, "message": f"{path}: not found"})
+
+    def do_POST(self):
+        self._wait()
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        if isinstance(request, list):
+            self._send_json(200, [self._rpc(r) for r in request])
+        else:
+            self._send_json(200, self._rpc(request))
+
+    def _rpc(self, request):
+        handler = RPC_METHODS.get(request.get("method"))
+        if handler is None:
+            error = {"code": -32601, "message": "Method not found"}
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": error}
+        try:
+            result = handler(request.get("params") or {})
+        except RpcError as e:
+            error = {"code": -32603, "message": str(e), "data": e.data}
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": error}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_node(host="127.0.0.1", port=0, delay=0.0, tail_rate=0.0, tail_delay=0.0):
+    """
+    Start the stub node in a background thread, answering every request
+    after `delay` seconds, and a `tail_rate` fraction of them `tail_delay`
+    seconds later still. Returns (server, base_url).
+    """
+    server = StubNodeServer((host, port), StubNodeHandler)
+    server.delay = delay
+    server.tail_rate = tail_rate
+    server.tail_delay = tail_delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded node responses")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1317)
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="Seconds added to every response"
+    )
+    parser.add_argument(
+        "--tail-rate", type=float, default=0.0, help="Fraction of slow responses"
+    )
+    parser.add_argument(
+        "--tail-delay", type=float, default=0.0, help="Extra seconds for slow ones"
+    )
+    args = parser.parse_args()
+    server = StubNodeServer((args.host, args.port), StubNodeHandler)
+    server.delay = args.delay
+    server.tail_rate = args.tail_rate
+    server.tail_delay = args.tail_delay
+    print(f"Stub node listening on http://{args.host}:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,146 @@
+"""
+Test setup: the app runs against the fake pocketd (bench/fake_pocketd.py) in
+a throwaway POCKET_HOME, and the node's REST and JSON-RPC endpoints are
+mocked with httpx.MockTransport. Config is read at import time, so the
+environment is set before any app module is imported.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.update(
+    POCKET_HOME=tempfile.mkdtemp(prefix="pocket-test-"),
+    POCKET_BIN_PATH=os.path.join(BACKEND_DIR, "bench", "fake_pocketd.py"),
+    FAKE_POCKETD_LATENCY="fixed:0",
+    POCKET_ALPHA_API_URL="http://api.test",
+    POCKET_ALPHA_NODE_URL="http://rpc.test",
+    NODE_PROBE_INTERVAL="0",
+    POCKET_EVENTS_BACKOFF_MIN="0.05",
+    SHARED_STATE_BACKEND="memory",
+)
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app.query_client import query_client, rpc_client  # noqa: E402
+from app.tracker import tx_tracker  # noqa: E402
+
+_ACCOUNT_RE = re.compile(r"^/cosmos/auth/v1beta1/accounts/(?P<address>[^/]+)$")
+
+
+class FakeNode:
+    """
+    Mock node behind httpx.MockTransport. REST GETs go to `rest` handlers
+    (path regex -> handler(match) returning (status, body)); JSON-RPC calls go
+    to `rpc` handlers (method -> handler(params) returning the result).
+    Every request is recorded in `requests` as (method, path or rpc method).
+    """
+
+    def __init__(self):
+        self.sequences = {}
+        self.broadcasts = []
+        self.requests = []
+        self.rest = [(_ACCOUNT_RE, self._account)]
+        self.rpc = {
+            "broadcast_tx_sync": self._broadcast,
+            "status": lambda params: {"sync_info": {"latest_block_height": "1"}},
+        }
+
+    def _account(self, match):
+        address = match["address"]
+        account = {
+            "@type": "/cosmos.auth.v1beta1.BaseAccount",
+            "address": address,
+            "pub_key": None,
+            "account_number": "42",
+            "sequence": str(self.sequences.get(address, 7)),
+        }
+        return 200, {"account": account}
+
+    def _broadcast(self, params):
+        tx_bytes = base64.b64decode(params["tx"])
+        self.broadcasts.append(json.loads(tx_bytes))
+        txhash = hashlib.sha256(tx_bytes).hexdigest().upper()
+        return {"code": 0, "log": "", "codespace": "", "hash": txhash}
+
+    def _rpc_call(self, call):
+        self.requests.append(("RPC", call["method"]))
+        handler = self.rpc.get(call["method"])
+        if handler is None:
+            error = {"code": -32601, "message": "Method not found"}
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": error}
+        result = handler(call["params"])
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            body = json.loads(request.content)
+            if isinstance(body, list):
+                return httpx.Response(200, json=[self._rpc_call(c) for c in body])
+            return httpx.Response(200, json=self._rpc_call(body))
+        self.requests.append(("GET", request.url.path))
+        for pattern, handler in self.rest:
+            match = pattern.match(request.url.path)
+            if match:
+                status_code, body = handler(match)
+                return httpx.Response(status_code, json=body)
+        return httpx.Response(404, json={"code": 5, "message": "not found"})
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def wait_until(condition, timeout=5.0):
+    """
+    Poll `condition()` until it is true; fail the test after `timeout` seconds.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def client():
+    """
+    An HTTP client for the app (without its lifespan hook).
+    """
+    from app.jobs import job_queue
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": "Bearer test"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://app.test", headers=headers
+    ) as http:
+        yield http
+    # Job workers belong to this test's event loop
+    await job_queue.stop()
+
+
+@pytest.fixture
+def node(monkeypatch):
+    """
+    A FakeNode answering for the shared REST and RPC clients.
+    """
+    fake = FakeNode()
+    transport = httpx.MockTransport(fake.handle)
+    for client in (query_client, rpc_client):
+        monkeypatch.setattr(client, "_transport", transport)
+        monkeypatch.setattr(client, "_clients", {})
+    yield fake
+    # Confirmation pollers and waits belong to this test's event loop
+    for poller in tx_tracker._pollers.values():
+        poller.cancel()
+    tx_tracker._pollers.clear()
+    tx_tracker._txs.clear()
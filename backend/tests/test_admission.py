@@ -0,0 +1,60 @@
+"""
+Per-user admission control on the routes.
+"""
+
+import asyncio
+
+import pytest
+
+from app.admission import TX, admission
+from app.jobs import job_queue
+from app.result import CommandResult
+from app.routes import command as command_routes
+from conftest import wait_until
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_unknown_networks_are_rejected_before_admission(client, node):
+    admitted = dict(admission.admitted)
+    requests = [
+        ("POST", "/run", {"json": {"command": ["status"], "network": "alpha1"}}),
+        ("GET", "/account/pokt1a", {"params": {"network": "alpha2"}}),
+        ("GET", "/service/svc", {"params": {"network": "alpha3"}}),
+        ("GET", "/tx/" + "AB" * 32, {"params": {"network": "alpha4"}}),
+        ("POST", "/account/balances", {"json": {"addresses": [], "network": "x"}}),
+    ]
+    for method, path, kwargs in requests:
+        resp = await client.request(method, path, **kwargs)
+        assert resp.status_code == 422, path
+    assert admission.admitted == admitted
+    assert {network for _, network, _ in admission._states} <= {"alpha"}
+
+
+async def test_async_jobs_hold_their_ticket(client, node, monkeypatch):
+    release = asyncio.Event()
+
+    async def run(request):
+        await release.wait()
+        return CommandResult.from_data({"code": 0})
+
+    monkeypatch.setattr(command_routes, "_run", run)
+    body = {"command": ["tx", "bank", "send", "alice", "pokt1b", "1upokt"]}
+    resp = await client.post("/run?async=true", json=body)
+    assert resp.status_code == 202
+    state = admission._states[("demo-user", "alpha", TX)]
+    # Still queued or running, so still counted
+    assert state.in_flight == 1
+
+    release.set()
+    job = job_queue.get(resp.json()["id"])
+    await wait_until(lambda: job.finished_at is not None)
+    assert state.in_flight == 0
+
+
+async def test_full_job_queue_gives_the_ticket_back(client, node, monkeypatch):
+    monkeypatch.setattr(job_queue, "queue_size", 0)
+    body = {"command": ["tx", "bank", "send", "bob", "pokt1b", "1upokt"]}
+    resp = await client.post("/run?async=true", json=body)
+    assert resp.status_code == 429
+    assert admission._states[("demo-user", "alpha", TX)].in_flight == 0
@@ -0,0 +1,237 @@
+"""
+The abci_query protobuf codec behind POST /account/balances.
+"""
+
+import base64
+
+import pytest
+
+from app import balances
+from app.protobuf import decode_message, encode_message, encode_varint, first, text
+
+pytestmark = pytest.mark.anyio
+
+FUNDED = "pokt1" + "n" * 38
+NEW = "pokt1" + "p" * 38
+PUB_KEY = bytes(range(33))
+
+
+def _any(type_url, value: bytes) -> bytes:
+    return encode_message([(1, type_url), (2, value)])
+
+
+def _base_account(address, account_number, sequence) -> bytes:
+    pub_key = _any("/cosmos.crypto.secp256k1.PubKey", encode_message([(1, PUB_KEY)]))
+    return encode_message(
+        [(1, address), (2, pub_key), (3, account_number), (4, sequence)]
+    )
+
+
+def _account_response(address) -> bytes:
+    account = _any(
+        "/cosmos.auth.v1beta1.BaseAccount", _base_account(address, 42, 300)
+    )
+    return encode_message([(1, account)])
+
+
+def _balances_response(*coins) -> bytes:
+    return encode_message(
+        [(1, encode_message([(1, denom), (2, amount)])) for denom, amount in coins]
+    )
+
+
+def test_varints_round_trip():
+    for value in (0, 1, 127, 128, 300, 2**32, 2**63 - 1):
+        assert decode_message(encode_message([(4, value)])) == {4: [value]}
+    assert encode_varint(300) == b"\xac\x02"
+
+
+def test_messages_round_trip():
+    fields = decode_message(
+        encode_message([(1, "pokt1a"), (2, b"\x00\xff"), (2, b""), (3, None), (5, 9)])
+    )
+    assert fields == {1: [b"pokt1a"], 2: [b"\x00\xff", b""], 5: [9]}
+    assert text(fields, 1) == "pokt1a"
+    assert first(fields, 3, "unset") == "unset"
+
+
+def test_fixed_width_fields_are_read():
+    # Field 1 fixed64 = 1, field 2 fixed32 = 2
+    data = b"\x09" + (1).to_bytes(8, "little") + b"\x15" + (2).to_bytes(4, "little")
+    assert decode_message(data) == {1: [1], 2: [2]}
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        (b"\x08\x80", "truncated varint"),
+        (b"\x08" + b"\xff" * 10, "varint too long"),
+        (b"\x0a\x05abc", "truncated field"),
+        (b"\x0b", "unsupported wire type 3"),
+    ],
+)
+def test_malformed_messages_raise(data, error):
+    with pytest.raises(ValueError, match=error):
+        decode_message(data)
+
+
+def test_decode_base_account():
+    assert balances.decode_account(_account_response(FUNDED)) == {
+        "@type": "/cosmos.auth.v1beta1.BaseAccount",
+        "address": FUNDED,
+        "pub_key": {
+            "@type": "/cosmos.crypto.secp256k1.PubKey",
+            "key": base64.b64encode(PUB_KEY).decode(),
+        },
+        "account_number": "42",
+        "sequence": "300",
+    }
+
+
+def test_decode_module_account():
+    module = encode_message(
+        [
+            (1, encode_message([(1, FUNDED), (3, 5)])),
+            (2, "fee_collector"),
+            (3, "minter"),
+            (3, "burner"),
+        ]
+    )
+    value = encode_message([(1, _any("/cosmos.auth.v1beta1.ModuleAccount", module))])
+    assert balances.decode_account(value) == {
+        "@type": "/cosmos.auth.v1beta1.ModuleAccount",
+        "base_account": {
+            "address": FUNDED,
+            "pub_key": None,
+            "account_number": "5",
+            "sequence": "0",
+        },
+        "name": "fee_collector",
+        "permissions": ["minter", "burner"],
+    }
+
+
+def test_decode_other_account_types():
+    value = encode_message([(1, _any("/cosmos.vesting.v1beta1.Other", b"\x08\x01"))])
+    assert balances.decode_account(value) == {
+        "@type": "/cosmos.vesting.v1beta1.Other"
+    }
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        # Account as a varint
+        encode_message([(1, 7)]),
+        # Account number as a string
+        encode_message(
+            [
+                (
+                    1,
+                    _any(
+                        "/cosmos.auth.v1beta1.BaseAccount",
+                        encode_message([(1, FUNDED), (3, "42")]),
+                    ),
+                )
+            ]
+        ),
+    ],
+)
+def test_wrong_wire_types_raise_value_error(value):
+    with pytest.raises(ValueError, match="expected a"):
+        balances.decode_account(value)
+
+
+def test_decode_balances():
+    value = _balances_response(("upokt", "1000"), ("uother", "5"))
+    assert balances.decode_balances(value) == [
+        {"denom": "upokt", "amount": "1000"},
+        {"denom": "uother", "amount": "5"},
+    ]
+    assert balances.decode_balances(b"") == []
+
+
+@pytest.fixture
+def abci(node):
+    """
+    The mock node answering auth Account and bank AllBalances abci_queries:
+    FUNDED has an account and balance, NEW has neither, and anything else
+    gets a corrupt account response.
+    """
+
+    def abci_query(params):
+        address = text(decode_message(bytes.fromhex(params["data"])), 1)
+        if params["path"] == balances.ACCOUNT_PATH:
+            if address == NEW:
+                log = f"account {address} not found: key not found"
+                return {"response": {"code": 22, "log": log}}
+            value = _account_response(address) if address == FUNDED else b"\x0a\x05"
+        else:
+            coins = [("upokt", "1000")] if address == FUNDED else []
+            value = _balances_response(*coins)
+        return {"response": {"code": 0, "value": base64.b64encode(value).decode()}}
+
+    node.rpc["abci_query"] = abci_query
+    return node
+
+
+async def test_get_balances(abci, monkeypatch):
+    # Two addresses, four calls, per batch
+    monkeypatch.setattr(balances, "BALANCES_BATCH_SIZE", 4)
+    corrupt = "pokt1" + "r" * 38
+    results = await balances.get_balances([FUNDED, NEW, corrupt])
+
+    assert [r["address"] for r in results] == [FUNDED, NEW, corrupt]
+    funded, new, broken = results
+    assert funded["account"]["sequence"] == "300"
+    assert funded["balances"] == [{"denom": "upokt", "amount": "1000"}]
+    assert funded["error"] is None
+    # Never funded: no account yet, which is not an error
+    assert (new["account"], new["balances"], new["error"]) == (None, [], None)
+    assert broken["error"].startswith("Invalid account response: truncated field")
+    assert broken["balances"] == []
+    assert abci.requests == [("RPC", "abci_query")] * 6
+
+
+async def test_balances_route(client, abci):
+    resp = await client.post("/account/balances", json={"addresses": [FUNDED]})
+    assert resp.status_code == 200
+    [result] = resp.json()["results"]
+    assert result["account"]["account_number"] == "42"
+    assert result["balances"] == [{"denom": "upokt", "amount": "1000"}]
+
+    resp = await client.post("/account/balances", json={"addresses": []})
+    assert resp.status_code == 400
+
+
+async def test_bad_responses_fail_only_their_address(abci, monkeypatch):
+    wrong_type, bad_value, not_a_response = (
+        "pokt1" + "s" * 38,
+        "pokt1" + "t" * 38,
+        "pokt1" + "u" * 38,
+    )
+    abci_query = abci.rpc["abci_query"]
+
+    def broken_abci_query(params):
+        address = text(decode_message(bytes.fromhex(params["data"])), 1)
+        if params["path"] != balances.ACCOUNT_PATH or address == FUNDED:
+            return abci_query(params)
+        if address == wrong_type:
+            value = base64.b64encode(encode_message([(1, 7)])).decode()
+            return {"response": {"code": 0, "value": value}}
+        if address == bad_value:
+            return {"response": {"code": 0, "value": 5}}
+        return ["not", "a", "response"]
+
+    abci.rpc["abci_query"] = broken_abci_query
+    results = await balances.get_balances(
+        [FUNDED, wrong_type, bad_value, not_a_response]
+    )
+    assert results[0]["error"] is None
+    assert results[0]["account"]["sequence"] == "300"
+    for result in results[1:]:
+        assert result["account"] is None
+        assert result["balances"] == []
+    assert results[1]["error"].startswith("Invalid account response: expected a")
+    assert results[2]["error"].startswith("Invalid ABCI query response")
+    assert results[3]["error"].startswith("Invalid ABCI query response")
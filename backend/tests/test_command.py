@@ -0,0 +1,78 @@
+"""
+POST /run: tx vs query classification.
+"""
+
+import pytest
+
+from app.admission import QUERY, TX, admission
+from app.gas import command_shape
+from app.routes import command as command_routes
+
+pytestmark = pytest.mark.anyio
+
+TXHASH = "AB" * 32
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    """
+    Admission kinds requested, in order.
+    """
+    kinds = []
+    slot = admission.slot
+
+    def recording_slot(user, network, kind):
+        kinds.append(kind)
+        return slot(user, network, kind)
+
+    monkeypatch.setattr(admission, "slot", recording_slot)
+    return kinds
+
+
+async def test_query_tx_is_a_query(client, node, slots):
+    for command in (["query", "tx", TXHASH], ["query", "txs", "--query", "x"]):
+        resp = await client.post("/run", json={"command": command})
+        assert resp.status_code == 200
+    assert slots == [QUERY, QUERY]
+
+
+async def test_query_tx_cannot_run_async(client, node, slots):
+    body = {"command": ["query", "tx", TXHASH]}
+    resp = await client.post("/run?async=true", json=body)
+    assert resp.status_code == 400
+    assert slots == []
+
+
+async def test_tx_command_is_a_tx(client, node, slots):
+    command = ["tx", "bank", "send", "alice", "pokt1bob", "1upokt", "--from", "alice"]
+    resp = await client.post("/run", json={"command": command})
+    assert resp.status_code == 200
+    assert slots == [TX]
+
+
+def test_only_tx_commands_have_a_gas_shape():
+    assert command_shape(["query", "tx", TXHASH, "hash"]) is None
+    # A multisig `keys show` of keys named tx, alice and bob
+    assert command_shape(["keys", "show", "tx", "alice", "bob"]) is None
+    command = ["tx", "bank", "send", "alice", "pokt1bob", "1upokt", "--from", "x"]
+    assert command_shape(command)[0] == "bank send"
+
+
+async def test_only_tx_commands_invalidate_addresses(client, node, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(
+        command_routes,
+        "invalidate_addresses",
+        lambda network, addresses: invalidated.append(list(addresses)),
+    )
+    sender = "pokt1" + "c" * 38
+    for command in (
+        ["query", "tx", TXHASH],
+        ["query", "tx", "--type", "acc_seq", f"{sender}/7"],
+        ["query", "txs", "--query", f"message.sender='{sender}'"],
+        ["tx", "bank", "send", sender, "pokt1bob", "1upokt", "--from", sender],
+    ):
+        resp = await client.post("/run", json={"command": command})
+        assert resp.status_code == 200
+    assert len(invalidated) == 1
+    assert set(invalidated[0]) == {sender, "pokt1bob"}
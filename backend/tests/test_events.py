@@ -0,0 +1,117 @@
+"""
+Block-event driven invalidation against the stub websocket endpoint.
+"""
+
+import asyncio
+
+import pytest
+
+from app.cache import query_cache
+from app.events import SUBSCRIPTIONS, BlockSubscriber
+from app.result import CommandResult
+from app.sequence import sequence_manager
+from app.tracker import tx_tracker
+from bench.stub_events import (
+    block_event,
+    disconnect_all,
+    publish,
+    start_stub_events,
+    subscription_count,
+    tx_event,
+)
+from conftest import wait_until
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def subscriber():
+    server, url = start_stub_events()
+    subscriber = BlockSubscriber("alpha", url)
+    subscriber.start()
+    await wait_until(lambda: subscription_count() == len(SUBSCRIPTIONS))
+    yield subscriber
+    await subscriber.stop()
+    server.shutdown()
+
+
+def _fetcher(calls):
+    async def fetch():
+        calls.append(1)
+        return CommandResult.from_data({"calls": len(calls)})
+
+    return fetch
+
+
+async def test_reconnect_drops_queries_but_keeps_sequences(node, subscriber):
+    signer = "pokt1" + "e" * 38
+    first = await sequence_manager.acquire(signer)
+    second = await sequence_manager.acquire(signer)
+    calls = []
+    key = ("alpha", ("query", "auth", "account", signer))
+    await query_cache.get_or_fetch(key, _fetcher(calls), ttl=60)
+
+    # The close handshake needs this loop to answer, so close from a thread
+    await asyncio.to_thread(disconnect_all)
+    await wait_until(lambda: subscriber.reconnects and subscriber.connected)
+    await wait_until(lambda: subscription_count() == len(SUBSCRIPTIONS))
+
+    # Missed events could have changed anything that was cached...
+    await query_cache.get_or_fetch(key, _fetcher(calls), ttl=60)
+    assert len(calls) == 2
+    # ...but txs still in the mempool keep their sequences
+    third = await sequence_manager.acquire(signer)
+    assert [first.sequence, second.sequence, third.sequence] == [7, 8, 9]
+    assert node.requests.count(("GET", f"/cosmos/auth/v1beta1/accounts/{signer}")) == 1
+
+
+def _account_key(address):
+    return ("alpha", ("query", "auth", "account", address))
+
+
+async def test_block_event_drops_touched_addresses(subscriber):
+    touched, untouched = "pokt1" + "k" * 38, "pokt1" + "l" * 38
+    calls = {touched: [], untouched: []}
+    for address in calls:
+        await query_cache.get_or_fetch(
+            _account_key(address),
+            _fetcher(calls[address]),
+            ttl=60,
+            tags=[("alpha", address)],
+        )
+
+    publish(block_event(5, {"transfer.recipient": [touched]}))
+    await wait_until(lambda: subscriber.height == 5)
+
+    for address in calls:
+        await query_cache.get_or_fetch(
+            _account_key(address), _fetcher(calls[address]), ttl=60
+        )
+    assert len(calls[touched]) == 2
+    assert len(calls[untouched]) == 1
+
+
+async def test_tx_event_settles_tracked_tx(node, subscriber):
+    txhash = "CA" * 32
+    tx = tx_tracker.track(txhash)
+    publish(tx_event(txhash.lower(), 12))
+    await wait_until(lambda: not tx.pending)
+    assert (tx.code, tx.height, tx.gas_used) == (0, 12, 85000)
+
+
+async def test_external_sequence_resyncs_signer(node, subscriber):
+    signer = "pokt1" + "m" * 38
+    lease = await sequence_manager.acquire(signer)
+    assert lease.sequence == 7
+
+    # A sequence this API handed out is not news
+    publish(tx_event("CB" * 32, 13, {"tx.acc_seq": [f"{signer}/7"]}))
+    await wait_until(lambda: subscriber.events == 1)
+    assert (await sequence_manager.acquire(signer)).sequence == 8
+
+    # One it did not means the key was used elsewhere
+    node.sequences[signer] = 20
+    publish(tx_event("CC" * 32, 13, {"tx.acc_seq": [f"{signer}/9"]}))
+    await wait_until(lambda: subscriber.events == 2)
+    assert (await sequence_manager.acquire(signer)).sequence == 20
+    assert node.requests.count(("GET", f"/cosmos/auth/v1beta1/accounts/{signer}")) == 2
@@ -0,0 +1,92 @@
+"""
+Batched funding from the faucet key pool.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app import funding, tx
+from app.result import CommandResult
+from app.routes import account as account_routes
+from app.faucet import FaucetKey, FaucetPool
+from app.gas import gas_estimator, messages_shape
+
+pytestmark = pytest.mark.anyio
+
+FAUCET = "pokt1" + "f" * 38
+RECIPIENTS = [("pokt1" + "b" * 38, "1000upokt"), ("pokt1" + "c" * 38, "2000upokt")]
+
+
+async def test_faucet_spend_uses_the_fee_paid(node, monkeypatch):
+    key = FaucetKey(
+        FAUCET, "alpha", "00", balance=10**9, balance_checked_at=time.monotonic()
+    )
+    monkeypatch.setattr(funding, "faucet_pool", FaucetPool({"alpha": [key]}))
+    monkeypatch.setattr(tx, "POCKET_TX_GAS_PRICE", 0.01)
+    # A learned limit well under POCKET_TX_GAS_LIMIT per message
+    messages = [tx.msg_send(FAUCET, a, tx.parse_coins(n)) for a, n in RECIPIENTS]
+    for _ in range(gas_estimator.min_samples):
+        gas_estimator.observe("alpha", messages_shape(messages), 50000)
+
+    results = await funding.send_batch("faucet", RECIPIENTS)
+    assert [r["exit_code"] for r in results] == [0, 0]
+    fee = node.broadcasts[0]["auth_info"]["fee"]
+    assert int(fee["gas_limit"]) < funding.POCKET_TX_GAS_LIMIT * len(RECIPIENTS)
+    assert results[0].data["gas_wanted"] == fee["gas_limit"]
+    assert key.balance == 10**9 - 3000 - int(fee["amount"][0]["amount"])
+
+
+async def test_batch_txs_in_flight_are_bounded(monkeypatch):
+    monkeypatch.setattr(tx, "POCKET_TX_MAX_GAS", tx.POCKET_TX_GAS_LIMIT)
+    monkeypatch.setattr(funding, "FUND_BATCH_CONCURRENCY", 2)
+    in_flight, peak = 0, 0
+
+    async def send_chunk(from_account, chunk, network):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return CommandResult.from_data({"txhash": chunk[0][1]})
+
+    monkeypatch.setattr(funding, "_send_chunk", send_chunk)
+    recipients = [(f"pokt1{i}", "1upokt") for i in range(7)]
+    results = await funding.send_batch(FAUCET, recipients)
+    assert [r.txhash for r in results] == [a for a, _ in recipients]
+    assert peak == 2
+
+
+async def test_fund_batch_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr(account_routes, "FUND_BATCH_MAX", 2)
+    for count in (0, 3):
+        recipients = [{"address": f"pokt1{i}"} for i in range(count)]
+        resp = await client.post(
+            "/account/fund-batch", json={"recipients": recipients}
+        )
+        assert resp.status_code == 400
+
+
+async def test_stop_fails_waiting_fund_calls(monkeypatch):
+    sending = asyncio.Event()
+
+    async def send_batch(from_account, recipients, network):
+        sending.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(funding, "send_batch", send_batch)
+    accumulator = funding.FundAccumulator(window=3600)
+    accumulator.max_batch = 2
+    flushed = [
+        asyncio.ensure_future(accumulator.fund(FAUCET, address, amount))
+        for address, amount in RECIPIENTS
+    ]
+    await sending.wait()
+    collecting = asyncio.ensure_future(accumulator.fund(FAUCET, "pokt1d", "1upokt"))
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(accumulator.stop(), 1)
+    results = await asyncio.wait_for(asyncio.gather(*flushed, collecting), 1)
+    assert [r["exit_code"] for r in results] == [1, 1, 1]
+    assert accumulator.stats() == {"pending": 0, "flushing": 0}
@@ -0,0 +1,34 @@
+"""
+Per-signer job lanes.
+"""
+
+import asyncio
+
+import pytest
+
+from app.jobs import DONE, JobQueue
+from app.result import CommandResult
+from conftest import wait_until
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_drained_lanes_and_finished_jobs_are_dropped():
+    queue = JobQueue(workers=2)
+
+    async def run():
+        await asyncio.sleep(0.01)
+        return CommandResult.from_data({"code": 0})
+
+    jobs = [queue.submit("run", "alpha", signer, run) for signer in "aaaaab"]
+    assert queue.stats()["lanes"] == 2
+    await wait_until(lambda: all(job.finished_at for job in jobs))
+    await asyncio.sleep(0)
+    assert queue.stats()["lanes"] == 0
+    assert [job.status for job in jobs] == [DONE] * 6
+    assert all(job.run is None for job in jobs)
+
+    # A job submitted to a dropped lane starts a new one
+    job = queue.submit("run", "alpha", "a", run)
+    await wait_until(lambda: job.status == DONE)
+    await queue.stop()
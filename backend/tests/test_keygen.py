@@ -0,0 +1,22 @@
+"""
+In-process key derivation, against a published BIP39/BIP44 vector.
+"""
+
+import base64
+import json
+
+from app.keygen import derive_account, pubkey_address
+
+MNEMONIC = " ".join(["abandon"] * 11 + ["about"])
+
+
+def test_derives_the_cosmos_address_for_a_known_mnemonic():
+    info, private_key = derive_account("vector", MNEMONIC)
+    pubkey = base64.b64decode(json.loads(info["pubkey"])["key"])
+    # The address cosmos wallets derive on m/44'/118'/0'/0/0
+    assert pubkey_address(pubkey, "cosmos") == (
+        "cosmos19rl4cm2hmr8afy4kldpxz3fka4jguq0auqdal4"
+    )
+    assert info["address"] == "pokt19rl4cm2hmr8afy4kldpxz3fka4jguq0apxjfrd"
+    assert info["mnemonic"] == MNEMONIC
+    assert len(bytes.fromhex(private_key)) == 32
@@ -0,0 +1,51 @@
+"""
+The in-memory keyring index and GET /account/list.
+"""
+
+import os
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_account_list_requires_a_token(client):
+    resp = await client.get("/account/list")
+    assert resp.status_code == 200
+    del client.headers["Authorization"]
+    resp = await client.get("/account/list")
+    assert resp.status_code == 403
+
+
+async def test_overwritten_key_is_reloaded_alone(tmp_path, monkeypatch):
+    from app import keyring
+    from bench.fake_pocketd import fake_address
+
+    directory = tmp_path / "keyring-test"
+    directory.mkdir()
+    for i in range(5):
+        (directory / f"user_{i}.info").write_text("key")
+    commands = []
+    run = keyring.run_pocket_command_async
+
+    async def record(command, network="alpha"):
+        commands.append(command)
+        return await run(command, network)
+
+    monkeypatch.setattr(keyring, "run_pocket_command_async", record)
+    index = keyring.KeyringIndex(home=str(tmp_path), backend="test")
+    assert (await index.page())[0] == 5
+    assert commands == [["keys", "list"]]
+
+    # Overwrite a key in place: the directory's mtime does not change
+    dir_mtime = directory.stat().st_mtime_ns
+    info = directory / "user_0.info"
+    info.write_text("re-imported")
+    os.utime(info, ns=(dir_mtime + 10**9, dir_mtime + 10**9))
+    os.utime(directory, ns=(dir_mtime, dir_mtime))
+    assert (await index.get("user_0")).address == fake_address("user_0")
+    assert commands == [["keys", "list"]]
+
+    index._scanned_at -= keyring._RESCAN_INTERVAL
+    assert (await index.get("user_0")).address == fake_address("user_0")
+    assert commands == [["keys", "list"], ["keys", "show", "user_0"]]
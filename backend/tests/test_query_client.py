@@ -0,0 +1,178 @@
+"""
+Pooled REST and JSON-RPC clients against httpx mock transports.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.hedge import query_hedging
+from app.query_client import QueryClient, RpcClient
+
+pytestmark = pytest.mark.anyio
+
+ACCOUNT_PATH = "/cosmos/auth/v1beta1/accounts/pokt1a"
+ACCOUNT = {"account": {"@type": "/cosmos.auth.v1beta1.BaseAccount"}}
+
+
+@pytest.fixture
+def hedge_now(monkeypatch):
+    """
+    Hedge every query as soon as it starts.
+    """
+    monkeypatch.setattr(query_hedging, "delay", lambda network, query: 0.0)
+    monkeypatch.setattr(query_hedging, "allow", lambda network, query: True)
+
+
+async def test_single_endpoint_is_not_hedged(hedge_now):
+    hosts = []
+
+    async def handle(request):
+        hosts.append(request.url.host)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=ACCOUNT)
+
+    client = QueryClient(
+        {"alpha": ["http://one.test"]}, transport=httpx.MockTransport(handle)
+    )
+    data, error = await client.get_json(ACCOUNT_PATH, query="account")
+    assert error is None
+    assert hosts == ["one.test"]
+
+
+async def test_single_endpoint_queries_do_not_grow_the_budget(monkeypatch):
+    monkeypatch.setattr(query_hedging, "enabled", True)
+    monkeypatch.setattr(query_hedging, "budget", 0.0)
+    monkeypatch.setattr(query_hedging, "counts", query_hedging.counts.copy())
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=ACCOUNT))
+    client = QueryClient({"alpha": ["http://one.test"]}, transport=transport)
+    for _ in range(10):
+        await client.get_json(ACCOUNT_PATH, query="account")
+    assert query_hedging.budget == 0.0
+    assert query_hedging.counts[("alpha", "account", "requests")] == 0
+
+
+async def test_hedge_goes_to_the_next_endpoint(hedge_now):
+    hosts = []
+
+    async def handle(request):
+        hosts.append(request.url.host)
+        if len(hosts) == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=ACCOUNT)
+
+    client = QueryClient(
+        {"alpha": ["http://one.test", "http://two.test"]},
+        transport=httpx.MockTransport(handle),
+    )
+    data, error = await client.get_json(ACCOUNT_PATH, query="account")
+    assert error is None
+    assert sorted(hosts) == ["one.test", "two.test"]
+
+
+async def test_no_endpoints_is_an_error(hedge_now):
+    client = QueryClient({"alpha": []}, transport=httpx.MockTransport(None))
+    for query in (None, "account"):
+        data, error = await client.get_json(ACCOUNT_PATH, query=query)
+        assert data is None
+        assert "No rest endpoints for alpha" in error
+
+
+async def test_malformed_rpc_responses_are_errors():
+    bodies = iter([[1], {"error": "boom"}, ["nope", {"id": 1, "result": {}}]])
+
+    def handle(request):
+        return httpx.Response(200, json=next(bodies))
+
+    client = RpcClient(
+        {"alpha": ["http://rpc.test"]}, transport=httpx.MockTransport(handle)
+    )
+    result, error = await client.call("status")
+    assert result is None
+    assert error.startswith("Invalid JSON-RPC response")
+    assert await client.call("status") == (None, "boom")
+    outcomes = await client.call_batch([("status", None), ("status", None)])
+    assert outcomes == [(None, "Missing JSON-RPC response"), ({}, None)]
+
+
+def _rest_client(handle, *urls):
+    return QueryClient({"alpha": list(urls)}, transport=httpx.MockTransport(handle))
+
+
+async def test_account_in_pocketd_shape():
+    def handle(request):
+        account = {
+            "@type": "/cosmos.auth.v1beta1.BaseAccount",
+            "address": "pokt1a",
+            "sequence": "3",
+        }
+        return httpx.Response(200, json={"account": account})
+
+    result = await _rest_client(handle, "http://one.test").get_account("pokt1a")
+    assert result["exit_code"] == 0
+    assert result.data == {
+        "account": {
+            "type": "/cosmos.auth.v1beta1.BaseAccount",
+            "value": {"address": "pokt1a", "sequence": "3"},
+        }
+    }
+
+
+async def test_fails_over_on_connection_errors():
+    hosts = []
+
+    def handle(request):
+        hosts.append(request.url.host)
+        if request.url.host == "down.test":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json=ACCOUNT)
+
+    client = _rest_client(handle, "http://down.test", "http://up.test")
+    down, up = client.nodes.candidates("alpha")
+    # Seen as the fastest, so tried first
+    down.latency, up.latency = 0.001, 0.1
+    data, error = await client.get_json(ACCOUNT_PATH)
+    assert error is None
+    assert hosts == ["down.test", "up.test"]
+    assert down.failures == 1
+    assert up.failures == 0
+
+
+async def test_node_errors_are_not_retried():
+    hosts = []
+
+    def handle(request):
+        hosts.append(request.url.host)
+        return httpx.Response(404, json={"code": 5, "message": "account not found"})
+
+    client = _rest_client(handle, "http://one.test", "http://two.test")
+    result = await client.get_account("pokt1a")
+    assert result["exit_code"] == 1
+    assert result["stderr"] == "account not found"
+    assert len(hosts) == 1
+
+
+async def test_connections_are_pooled_per_endpoint():
+    def handle(request):
+        return httpx.Response(200, json=ACCOUNT)
+
+    client = _rest_client(handle, "http://one.test")
+    for _ in range(3):
+        await client.get_json(ACCOUNT_PATH)
+    assert list(client._clients) == ["http://one.test"]
+    await client.aclose()
+    assert client._clients == {}
+
+
+async def test_account_route_uses_the_shared_client(client, node):
+    address = "pokt1" + "q" * 38
+    node.sequences[address] = 11
+    for _ in range(2):
+        resp = await client.get(f"/account/{address}", params={"output": "compact"})
+        assert resp.status_code == 200
+        account = json.loads(resp.json()["stdout"])["account"]
+        assert account["value"]["sequence"] == "11"
+    # The second read is served from the query cache
+    assert node.requests == [("GET", f"/cosmos/auth/v1beta1/accounts/{address}")]
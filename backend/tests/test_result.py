@@ -0,0 +1,29 @@
+"""
+CommandResult: lazy parsing and the pocketd JSON timing metric.
+"""
+
+from app.metrics import COMMAND_JSON_DURATION
+from app.result import CommandResult
+
+
+def _count(label, operation):
+    state = COMMAND_JSON_DURATION._values.get((label, operation))
+    return sum(state[0]) if state else 0
+
+
+def test_pocketd_output_is_timed_once():
+    before = _count("query bank balances", "parse")
+    before_text = _count("query bank balances", "serialize")
+    result = CommandResult(b'{"code": 0}', label="query bank balances")
+    assert result.data == {"code": 0}
+    assert result.text() == result.text()
+    assert _count("query bank balances", "parse") == before + 1
+    assert _count("query bank balances", "serialize") == before_text + 1
+
+
+def test_in_process_results_are_not_timed():
+    before = dict(COMMAND_JSON_DURATION._values)
+    result = CommandResult.from_data({"code": 0})
+    result.text()
+    CommandResult(b'{"code": 0}').data
+    assert COMMAND_JSON_DURATION._values == before
@@ -0,0 +1,69 @@
+"""
+Bulk service registration.
+"""
+
+import pytest
+
+from app import services, tx
+from app.gas import gas_estimator, messages_shape
+from app.models import ServiceRequest
+from app.tracker import EXPIRED, tx_tracker
+
+pytestmark = pytest.mark.anyio
+
+OWNER = "pokt1" + "d" * 38
+
+
+def _requests(count):
+    return [
+        ServiceRequest(service_id=f"svc-{i}", service_name="Svc", from_account=OWNER)
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def small_txs(monkeypatch):
+    """
+    Room for 5 messages per tx at POCKET_TX_GAS_LIMIT each.
+    """
+    monkeypatch.setattr(tx, "POCKET_TX_MAX_GAS", 5 * tx.POCKET_TX_GAS_LIMIT)
+    monkeypatch.setattr(services, "SERVICE_BATCH_COMMIT_TIMEOUT", 0.01)
+
+
+async def test_chunks_use_the_static_limit_before_learning(node, small_txs):
+    results = await services.create_services(_requests(12))
+    assert [r["exit_code"] for r in results] == [0] * 12
+    assert [len(b["body"]["messages"]) for b in node.broadcasts] == [5, 5, 2]
+
+
+async def test_chunks_are_sized_by_learned_gas(node, small_txs):
+    requests = _requests(12)
+    sample = [
+        tx.msg_add_service(OWNER, r.service_id, r.service_name, r.compute_units)
+        for r in requests[:5]
+    ]
+    for _ in range(gas_estimator.min_samples):
+        gas_estimator.observe("alpha", messages_shape(sample), 5 * 20000)
+
+    results = await services.create_services(requests)
+    assert [r["exit_code"] for r in results] == [0] * 12
+    [broadcast] = node.broadcasts
+    assert len(broadcast["body"]["messages"]) == 12
+    gas_limit = int(broadcast["auth_info"]["fee"]["gas_limit"])
+    assert gas_limit == 12 * tx.message_gas(sample)
+    assert gas_limit <= tx.POCKET_TX_MAX_GAS
+
+
+async def test_unconfirmed_txs_are_failures(client, node, small_txs, monkeypatch):
+    async def expire(tx_status, timeout):
+        tx_status.status = EXPIRED
+        return tx_status
+
+    monkeypatch.setattr(tx_tracker, "wait", expire)
+    services_json = [r.model_dump() for r in _requests(2)]
+    resp = await client.post("/service/create-batch", json={"services": services_json})
+    assert resp.status_code == 200
+    for result in resp.json()["results"]:
+        assert result["exit_code"] == 1
+        assert result["status"] == EXPIRED
+        assert result["stderr"] == f"Tx {result['txhash']} not confirmed (expired)"
@@ -0,0 +1,134 @@
+"""
+Sequences and cached queries shared between workers through SQLite. Each
+"worker" is a manager or cache with its own SqliteStore connection to one
+file.
+"""
+
+import asyncio
+
+import pytest
+
+from app import sequence
+from app.cache import QueryCache, SqliteEntries
+from app.pocket import AccountState
+from app.result import CommandResult
+from app.sequence import SharedSequenceManager
+from app.shared_state import SqliteStore
+
+pytestmark = pytest.mark.anyio
+
+SIGNER = "pokt1" + "s" * 38
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """
+    The committed account state query_account_state returns; counts queries.
+    """
+    state = {"sequence": 10, "queries": 0}
+
+    async def query_account_state(address, network="alpha"):
+        state["queries"] += 1
+        return AccountState(7, state["sequence"])
+
+    monkeypatch.setattr(sequence, "query_account_state", query_account_state)
+    return state
+
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "shared_state.db")
+    return [SharedSequenceManager(SqliteStore(path), poll_interval=0) for _ in "ab"]
+
+
+def _lease_many(manager, count):
+    async def lease():
+        return await asyncio.gather(*(manager.acquire(SIGNER) for _ in range(count)))
+
+    return asyncio.run(lease())
+
+
+async def test_concurrent_leases_never_share_a_sequence(chain, workers):
+    # One thread (and event loop) per worker, so the SQLite write lock is
+    # contended for real
+    leases = await asyncio.gather(
+        *(asyncio.to_thread(_lease_many, manager, 50) for manager in workers)
+    )
+    sequences = sorted(lease.sequence for batch in leases for lease in batch)
+    assert sequences == list(range(10, 110))
+    assert {lease.account_number for batch in leases for lease in batch} == {7}
+
+
+async def test_failed_broadcast_rewinds_every_worker(chain, workers):
+    a, b = workers
+    first, second = await a.acquire(SIGNER), await a.acquire(SIGNER)
+    other = await b.acquire(SIGNER)
+    assert [first.sequence, second.sequence, other.sequence] == [10, 11, 12]
+
+    # The broadcast at 10 was never accepted: 10 is handed out again and the
+    # later leases, in either worker, must re-sign
+    async with a.turn(first) as current:
+        assert current
+        await a.release(first, holding_turn=True)
+    async with b.turn(other) as current:
+        assert not current
+        await b.discard(other)
+    assert (await b.acquire(SIGNER)).sequence == 10
+    assert (await a.acquire(SIGNER)).sequence == 11
+    async with a.turn(second) as current:
+        assert not current
+
+
+async def test_resync_is_seen_by_every_worker(chain, workers):
+    a, b = workers
+    lease = await a.acquire(SIGNER)
+    async with a.turn(lease):
+        await a.resync(lease, expected=15)
+    lease = await b.acquire(SIGNER)
+    assert lease.sequence == 15
+
+    # Without an expected sequence the next lease, from any worker, comes
+    # from a fresh chain query
+    chain["sequence"] = 20
+    async with b.turn(lease) as current:
+        assert current
+        await b.resync(lease)
+    queries = chain["queries"]
+    assert (await a.acquire(SIGNER)).sequence == 20
+    assert chain["queries"] == queries + 1
+
+
+async def test_query_cache_is_shared(tmp_path):
+    path = str(tmp_path / "shared_state.db")
+    a, b = (QueryCache(entries=SqliteEntries(SqliteStore(path))) for _ in "ab")
+    key = ("alpha", ("query", "bank", "balances", SIGNER))
+    tags = [("alpha", SIGNER)]
+    fetches = []
+
+    async def fetch():
+        fetches.append(len(fetches))
+        return CommandResult.from_data({"balance": len(fetches)})
+
+    assert (await a.get_or_fetch(key, fetch, 60, tags)).data == {"balance": 1}
+    assert (await b.get_or_fetch(key, fetch, 60, tags)).data == {"balance": 1}
+    assert len(fetches) == 1
+
+    # A tx through either worker invalidates the entry for both
+    b.invalidate_tag(("alpha", SIGNER))
+    assert (await a.get_or_fetch(key, fetch, 60, tags)).data == {"balance": 2}
+    assert a.snapshot()["entries"] == b.snapshot()["entries"] == 1
+
+
+async def test_invalidation_during_fetch_is_not_overwritten(tmp_path):
+    path = str(tmp_path / "shared_state.db")
+    a, b = (QueryCache(entries=SqliteEntries(SqliteStore(path))) for _ in "ab")
+    key = ("alpha", ("query", "bank", "balances", SIGNER))
+    tags = [("alpha", SIGNER)]
+
+    async def stale_fetch():
+        # Another worker's tx lands while this result is in flight
+        b.invalidate_tag(("alpha", SIGNER))
+        return CommandResult.from_data({"balance": "old"})
+
+    await a.get_or_fetch(key, stale_fetch, 60, tags)
+    assert b.snapshot()["entries"] == 0
@@ -0,0 +1,75 @@
+"""
+NDJSON streaming endpoints: admission tickets are released even when the
+body is never sent.
+"""
+
+import json
+
+import pytest
+
+from app.admission import QUERY, TX, admission
+from app.models import CreateAccountBatchRequest, QueryStreamRequest
+from app.routes.account import create_account_batch
+from app.routes.query import query_stream
+
+pytestmark = pytest.mark.anyio
+
+USER = {"sub": "streaming-test"}
+
+
+def _in_flight_for(sub, kind):
+    state = admission._states.get((sub, "alpha", kind))
+    return state.in_flight if state is not None else 0
+
+
+def _in_flight(kind):
+    return _in_flight_for(USER["sub"], kind)
+
+
+async def _serve_to_gone_client(response):
+    """
+    Serve a response to a client that left before the headers went out.
+    """
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client disconnected")
+
+    with pytest.raises(Exception):
+        await response({"type": "http"}, receive, send)
+
+
+async def test_account_batch_releases_ticket_when_body_never_sent(node):
+    request = CreateAccountBatchRequest(count=2, prefix="stream")
+    response = await create_account_batch(request, user=USER)
+    assert _in_flight(TX) == 1
+    await _serve_to_gone_client(response)
+    assert _in_flight(TX) == 0
+
+
+async def test_account_batch_streams_and_releases_ticket(client, node):
+    resp = await client.post("/account/create-batch", json={"count": 2})
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(lines) == 2 and all("address" in line for line in lines)
+    assert _in_flight_for("demo-user", TX) == 0
+
+
+async def test_query_stream_releases_ticket_when_body_never_sent(node):
+    targets = [{"type": "account", "id": "pokt1" + "d" * 38}]
+    response = await query_stream(QueryStreamRequest(targets=targets), user=USER)
+    assert _in_flight(QUERY) == 1
+    await _serve_to_gone_client(response)
+    assert _in_flight(QUERY) == 0
+
+
+async def test_query_stream_streams_and_releases_ticket(client, node):
+    targets = [{"type": "account", "id": "pokt1" + "d" * 38}]
+    resp = await client.post("/query/stream", json={"targets": targets})
+    assert resp.status_code == 200
+    [line] = [json.loads(line) for line in resp.text.splitlines()]
+    assert line["exit_code"] == 0
+    assert line["data"]["account"]["value"]["account_number"] == "42"
+    assert _in_flight_for("demo-user", QUERY) == 0
@@ -0,0 +1,132 @@
+"""
+Offline tx pipeline: submit_tx against the fake pocketd and a mock node.
+"""
+
+import pytest
+
+from app import tx
+from app.gas import gas_estimator, messages_shape
+from app.result import CommandResult
+from app.sequence import sequence_manager
+from app.tracker import tx_tracker
+
+pytestmark = pytest.mark.anyio
+
+SIGNER = "pokt1" + "a" * 38
+
+
+@pytest.fixture(autouse=True)
+def fresh_gas(monkeypatch):
+    """
+    Nothing learned about gas yet.
+    """
+    monkeypatch.setattr(gas_estimator, "_samples", {})
+
+
+def _signer(letter):
+    return "pokt1" + letter * 38
+
+
+def _signer_sequences(node):
+    return [int(b["auth_info"]["signer_infos"][0]["sequence"]) for b in node.broadcasts]
+
+
+def _learn(messages, gas=50000):
+    shape = messages_shape(messages)
+    for _ in range(gas_estimator.min_samples):
+        gas_estimator.observe("alpha", shape, gas)
+    return shape
+
+
+async def test_failed_broadcast_with_learned_gas(node, monkeypatch):
+    messages = [tx.msg_send(SIGNER, "pokt1recipient", "1000upokt")]
+    _learn(messages)
+
+    async def broadcast(tx_bytes, network="alpha"):
+        return CommandResult.failure("Error calling broadcast_tx_sync: refused")
+
+    monkeypatch.setattr(tx, "broadcast", broadcast)
+    result = await tx.submit_tx(SIGNER, messages)
+    assert result["exit_code"] == 1
+    assert "refused" in result["stderr"]
+
+
+async def test_out_of_gas_retries_with_default_limit(node, monkeypatch):
+    messages = [tx.msg_add_service(SIGNER, "svc-gas", "Gas", 10)]
+    shape = _learn(messages)
+    attempts = []
+
+    async def broadcast(tx_bytes, network="alpha"):
+        attempts.append(tx_bytes)
+        if len(attempts) == 1:
+            data = {"code": 11, "codespace": "sdk", "raw_log": "out of gas"}
+            return CommandResult(None, "out of gas", 1, data=data)
+        return CommandResult(None, data={"code": 0, "txhash": "CD" * 32})
+
+    monkeypatch.setattr(tx, "broadcast", broadcast)
+    result = await tx.submit_tx(SIGNER, messages)
+    assert result["exit_code"] == 0
+    assert len(attempts) == 2
+    assert gas_estimator.estimate("alpha", shape) is None
+
+
+async def test_signs_offline_and_broadcasts(node):
+    signer = _signer("g")
+    node.sequences[signer] = 3
+    messages = [tx.msg_send(signer, _signer("h"), "1000upokt")]
+    results = [await tx.submit_tx(signer, messages) for _ in range(2)]
+    assert [r["exit_code"] for r in results] == [0, 0]
+    assert _signer_sequences(node) == [3, 4]
+    fee = node.broadcasts[0]["auth_info"]["fee"]
+    assert fee["gas_limit"] == str(tx.POCKET_TX_GAS_LIMIT)
+    assert fee["amount"] == [
+        {"denom": "upokt", "amount": str(tx.estimate_fee(tx.POCKET_TX_GAS_LIMIT))}
+    ]
+    assert node.broadcasts[0]["body"]["messages"] == messages
+    # One account read for the first sequence; no simulation round trips
+    # (the confirmation tracker's status and tx polls aside)
+    sent = [r for r in node.requests if r[1] not in ("status", "tx")]
+    assert sent == [
+        ("GET", f"/cosmos/auth/v1beta1/accounts/{signer}"),
+        ("RPC", "broadcast_tx_sync"),
+        ("RPC", "broadcast_tx_sync"),
+    ]
+
+
+async def test_sequence_mismatch_is_resigned(node):
+    signer = _signer("i")
+    broadcast = node.rpc["broadcast_tx_sync"]
+
+    rejected = []
+
+    def mismatch_once(params):
+        if rejected:
+            return broadcast(params)
+        rejected.append(params)
+        log = "account sequence mismatch, expected 9, got 7: incorrect account sequence"
+        return {"code": 32, "codespace": "sdk", "log": log, "hash": "EF" * 32}
+
+    node.rpc["broadcast_tx_sync"] = mismatch_once
+    result = await tx.submit_tx(signer, [tx.msg_send(signer, _signer("j"), "1upokt")])
+    assert result["exit_code"] == 0
+    assert len(rejected) == 1
+    assert _signer_sequences(node) == [9]
+
+
+async def test_null_broadcast_result_is_a_failure(node):
+    signer = _signer("k")
+    node.rpc["broadcast_tx_sync"] = lambda params: None
+    result = await tx.submit_tx(signer, [tx.msg_send(signer, _signer("l"), "1upokt")])
+    assert result["exit_code"] == 1
+    assert result["stderr"] == "Invalid broadcast_tx_sync result: None"
+    # The unused sequence is handed out again
+    lease = await sequence_manager.acquire(signer)
+    assert lease.sequence == 7
+
+
+async def test_stop_cancels_confirmation_pollers(node):
+    tx_tracker.track("AB" * 32)
+    poller = tx_tracker._pollers["alpha"]
+    await tx_tracker.stop()
+    assert poller.cancelled()
+    assert tx_tracker._pollers == {}
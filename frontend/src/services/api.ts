@@ -1,6 +1,13 @@
 // API Service for communicating with the backend
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+// Bearer token for authenticated routes (login is simulated for now, and the
+// backend's demo verification accepts any token)
+const API_TOKEN = import.meta.env.VITE_API_TOKEN || 'demo';
+
+function authHeaders(): Record<string, string> {
+  return { Authorization: `Bearer ${API_TOKEN}` };
+}
 
 // Types
 export interface CreateAccountRequest {
@@ -57,33 +64,23 @@ export async function exportAccountHex(name: string, network: string = 'alpha'):
   return data.hex;
 }
 
-// List accounts (calls backend to run 'pocketd keys list --output json')
-export async function listAccounts(network: string = 'alpha'): Promise<Array<{ name: string; address: string }>> {
+// List accounts (served from the backend's in-memory keyring index)
+export async function listAccounts(
+  network: string = 'alpha',
+  offset: number = 0,
+  limit: number = 1000
+): Promise<Array<{ name: string; address: string }>> {
   try {
-    const response = await fetch(`${API_URL}/run-mock`, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({
-        command: ['keys', 'list', '--output', 'json'],
-        network,
-      }),
-    });
+    const response = await fetch(
+      `${API_URL}/account/list?network=${network}&offset=${offset}&limit=${limit}`,
+      { headers: authHeaders() }
+    );
     if (!response.ok) {
       const errorData = await response.json();
       throw new Error(errorData.detail || 'Failed to list accounts');
     }
     const data = await response.json();
-    // If backend returns CommandResponse, parse stdout
-    let accounts: Array<{ name: string; address: string }> = [];
-    if (data.stdout) {
-      try {
-        const parsed = JSON.parse(data.stdout);
-        accounts = parsed.map((acc: any) => ({ name: acc.name, address: acc.address }));
-      } catch {
-        // fallback: return empty
-      }
-    }
-    return accounts;
+    return data.keys.map((acc: any) => ({ name: acc.name, address: acc.address }));
   } catch (error) {
     console.error('Error listing accounts:', error);
     throw error;